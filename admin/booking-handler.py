@@ -16,26 +16,35 @@
 
 import json
 import os
+import sqlite3
 import sys
 import hashlib
 import hmac
 import time
 from datetime import datetime, timedelta
 from http.server import HTTPServer, BaseHTTPRequestHandler, SimpleHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import parse_qs, urlparse, unquote
 import uuid
 import mimetypes
+import select
 import threading
+import atexit
+import tempfile
 
 # Configuration
 BOOKINGS_FILE = 'bookings.json'
+BOOKINGS_DB_FILE = 'bookings.db'
 SESSIONS_FILE = 'admin_sessions.json'
 SESSION_EXPIRY_HOURS = 24
 SESSION_COOKIE_NAME = 'admin_session_token'
 BOATS_FILE = 'boats.json'
+AVAILABILITY_DEFAULT_DAYS = 366
+AVAILABILITY_MAX_DAYS = 731
 
-# Thread lock for session file access
+# Thread locks for the session cache and the session file
 session_lock = threading.Lock()
+session_file_lock = threading.Lock()
 
 # Load .env file if it exists (for local development)
 # This matches the PHP handler's behavior
@@ -72,6 +81,27 @@ def load_env_file():
 # Load .env file at module level
 load_env_file()
 
+# Shared session store: with STATE_BACKEND_URL set (e.g. redis://host:6379/0),
+# sessions live in the shared state backend so every app server accepts them
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.shared.state_backend import get_state_backend, state_backend_configured, StateBackendError
+from backend.shared.booking_store import BookingStore
+from backend.shared.occupancy_index import parse_date as parse_booking_date, run_length_encode
+from backend.shared.atomic_json import JSONFileError, locked, read_json, write_json
+from backend.shared.static_assets import get_static_assets, accepts_gzip, not_modified, send_file
+
+SESSION_KEY_PREFIX = 'admin_session:'
+# Seconds between writes of coalesced last_used updates and sweeps of expired sessions
+SESSION_FLUSH_SECONDS = float(os.environ.get('ADMIN_SESSION_FLUSH_SECONDS', '30'))
+
+# Server: request worker threads and how long an idle keep-alive connection is kept
+SERVER_WORKERS = int(os.environ.get('BOOKING_SERVER_WORKERS', '16'))
+KEEPALIVE_TIMEOUT = float(os.environ.get('BOOKING_SERVER_KEEPALIVE_TIMEOUT', '15'))
+
+def session_backend():
+    """The shared state backend for sessions, or None for the local sessions file"""
+    return get_state_backend() if state_backend_configured() else None
+
 # Admin credentials from environment variables (REQUIRED)
 # This matches the PHP handler's behavior
 ENV_ADMIN_USER = os.environ.get('ADMIN_USERNAME', '')
@@ -90,6 +120,14 @@ def secure_compare(a, b):
     return hmac.compare_digest(str(a), str(b))
 
 # Session management
+# File-based sessions are cached in memory: validation is a dict lookup,
+# last_used updates are coalesced and written every SESSION_FLUSH_SECONDS
+# by a background thread that also sweeps expired sessions. Logins and
+# logouts are written immediately.
+_session_cache = None
+_session_dirty = False
+_session_flusher_pid = None
+
 def load_sessions():
     """Load sessions from file"""
     script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -104,61 +142,163 @@ def load_sessions():
     return {}
 
 def save_sessions(sessions):
-    """Save sessions to file"""
+    """Save sessions to file (atomically, via a temp file); call with session_file_lock held"""
     script_dir = os.path.dirname(os.path.abspath(__file__))
     sessions_path = os.path.join(script_dir, SESSIONS_FILE)
     
     try:
-        with session_lock:
-            with open(sessions_path, 'w', encoding='utf-8') as f:
+        fd, tmp_path = tempfile.mkstemp(prefix='.admin_sessions_', suffix='.tmp', dir=script_dir)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
                 json.dump(sessions, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, sessions_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
         return True
     except IOError:
         return False
 
+def _cached_sessions():
+    """The session cache, loaded from file on first use (call with session_lock held)"""
+    global _session_cache
+    if _session_cache is None:
+        _session_cache = cleanup_expired_sessions(load_sessions())
+    return _session_cache
+
+def flush_sessions(force=False):
+    """
+    Write the session cache to file if it has unsaved changes
+
+    The snapshot is taken and written under session_file_lock, so flushes
+    reach the file in the order of their snapshots and an older one can
+    never overwrite a logout. Validation only needs session_lock and does
+    not wait for the write.
+    """
+    global _session_dirty
+    with session_file_lock:
+        with session_lock:
+            if _session_cache is None or not (_session_dirty or force):
+                return True
+            snapshot = {token: dict(session) for token, session in _session_cache.items()}
+            _session_dirty = False
+        if not save_sessions(snapshot):
+            with session_lock:
+                _session_dirty = True
+            return False
+    return True
+
+def sweep_expired_sessions():
+    """Drop expired sessions from the cache"""
+    global _session_cache, _session_dirty
+    with session_lock:
+        if _session_cache is None:
+            return
+        valid_sessions = cleanup_expired_sessions(_session_cache)
+        if len(valid_sessions) != len(_session_cache):
+            _session_cache = valid_sessions
+            _session_dirty = True
+
+def _ensure_session_flusher():
+    """Start the flush/sweep thread in this process"""
+    global _session_flusher_pid
+    if _session_flusher_pid == os.getpid() or SESSION_FLUSH_SECONDS <= 0:
+        return
+    _session_flusher_pid = os.getpid()
+    
+    def flush_loop():
+        while True:
+            time.sleep(SESSION_FLUSH_SECONDS)
+            try:
+                sweep_expired_sessions()
+                flush_sessions()
+            except Exception as e:
+                print(f"Warning: Could not flush sessions: {e}", file=sys.stderr)
+    
+    threading.Thread(target=flush_loop, daemon=True).start()
+
+atexit.register(flush_sessions)
+
 def create_session(username):
-    """Create a new session for a user"""
+    """Create a new session for a user; None if the shared session store is unavailable"""
     session_token = hashlib.sha256(f"{username}:{time.time()}:{uuid.uuid4().hex}".encode()).hexdigest()
     expires_at = (datetime.now() + timedelta(hours=SESSION_EXPIRY_HOURS)).isoformat()
-    
-    sessions = load_sessions()
-    sessions[session_token] = {
+    session = {
         'username': username,
         'created_at': datetime.now().isoformat(),
         'expires_at': expires_at,
         'last_used': datetime.now().isoformat()
     }
     
-    # Clean up expired sessions
-    sessions = cleanup_expired_sessions(sessions)
-    save_sessions(sessions)
+    backend = session_backend()
+    if backend is not None:
+        # The backend expires the key itself
+        try:
+            backend.set_json(SESSION_KEY_PREFIX + session_token, session, ttl=SESSION_EXPIRY_HOURS * 3600)
+        except StateBackendError as e:
+            print(f"Warning: Session store unavailable: {e}", file=sys.stderr)
+            return None
+        return session_token
+    
+    with session_lock:
+        _cached_sessions()[session_token] = session
+    # Written now so the login survives a restart
+    flush_sessions(force=True)
+    _ensure_session_flusher()
     
     return session_token
 
 def validate_session(session_token):
     """Validate a session token and return username if valid"""
+    global _session_dirty
     if not session_token:
         return None
     
-    sessions = load_sessions()
-    
-    if session_token not in sessions:
-        return None
+    backend = session_backend()
+    if backend is not None:
+        return validate_shared_session(backend, session_token)
     
-    session = sessions[session_token]
-    expires_at = datetime.fromisoformat(session['expires_at'])
+    with session_lock:
+        sessions = _cached_sessions()
+        session = sessions.get(session_token)
+        if session is None:
+            return None
+        
+        # Check if session expired
+        if datetime.now() > datetime.fromisoformat(session['expires_at']):
+            # Remove expired session (written by the next flush)
+            del sessions[session_token]
+            _session_dirty = True
+            return None
+        
+        # Update last used time (written by the next flush)
+        session['last_used'] = datetime.now().isoformat()
+        _session_dirty = True
+        username = session['username']
+    _ensure_session_flusher()
     
-    # Check if session expired
-    if datetime.now() > expires_at:
-        # Remove expired session
-        del sessions[session_token]
-        save_sessions(sessions)
+    return username
+
+def validate_shared_session(backend, session_token):
+    """validate_session() against the shared state backend"""
+    key = SESSION_KEY_PREFIX + session_token
+    try:
+        session = backend.get_json(key)
+        if not session:
+            return None
+        remaining = (datetime.fromisoformat(session['expires_at']) - datetime.now()).total_seconds()
+        if remaining <= 0:
+            backend.delete(key)
+            return None
+        
+        # Update last used time, keeping the original expiry
+        session['last_used'] = datetime.now().isoformat()
+        backend.set_json(key, session, ttl=remaining)
+    except StateBackendError as e:
+        print(f"Warning: Session store unavailable: {e}", file=sys.stderr)
         return None
     
-    # Update last used time
-    session['last_used'] = datetime.now().isoformat()
-    save_sessions(sessions)
-    
     return session['username']
 
 def cleanup_expired_sessions(sessions):
@@ -175,10 +315,18 @@ def cleanup_expired_sessions(sessions):
 
 def delete_session(session_token):
     """Delete a session"""
-    sessions = load_sessions()
-    if session_token in sessions:
-        del sessions[session_token]
-        save_sessions(sessions)
+    backend = session_backend()
+    if backend is not None:
+        try:
+            backend.delete(SESSION_KEY_PREFIX + session_token)
+        except StateBackendError as e:
+            print(f"Warning: Session store unavailable: {e}", file=sys.stderr)
+        return
+    
+    with session_lock:
+        removed = _cached_sessions().pop(session_token, None) is not None
+    if removed:
+        flush_sessions(force=True)
 
 def get_session_token_from_cookies(cookie_header):
     """Extract session token from cookie header"""
@@ -194,7 +342,34 @@ def get_session_token_from_cookies(cookie_header):
     
     return cookies.get(SESSION_COOKIE_NAME)
 
+# Booking storage: SQLite (admin/bookings.db), kept in sync with
+# admin/bookings.json for the PHP handlers
+_booking_store = None
+_booking_store_lock = threading.Lock()
+
+def get_booking_store():
+    """Get the booking store, importing bookings.json on first use"""
+    global _booking_store
+    if _booking_store is None:
+        with _booking_store_lock:
+            if _booking_store is None:
+                admin_dir = os.path.dirname(os.path.abspath(__file__))
+                _booking_store = BookingStore(
+                    os.path.join(admin_dir, BOOKINGS_DB_FILE),
+                    os.path.join(admin_dir, BOOKINGS_FILE)
+                )
+    return _booking_store
+
 class BookingHandler(SimpleHTTPRequestHandler):
+    # Keep-alive: every response sends Content-Length. An idle connection
+    # holds its pool worker, so it is closed after KEEPALIVE_TIMEOUT, or as
+    # soon as other connections are waiting for a worker (see handle())
+    protocol_version = 'HTTP/1.1'
+    timeout = KEEPALIVE_TIMEOUT
+    # Headers and body are separate writes; without TCP_NODELAY the body of a
+    # reused connection waits for the client's delayed ACK (~40ms)
+    disable_nagle_algorithm = True
+    
     def __init__(self, *args, **kwargs):
         # Get the directory of booking-handler.py and set it as the base directory
         script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -204,6 +379,30 @@ class BookingHandler(SimpleHTTPRequestHandler):
             kwargs['directory'] = self.project_root
         super().__init__(*args, **kwargs)
     
+    def handle(self):
+        """Handle requests until the client closes, the connection idles past
+        the timeout, or an idle connection must give its worker to a waiting one"""
+        wait_for_request = getattr(self.server, 'wait_for_request', None)
+        self.handle_one_request()
+        while not self.close_connection:
+            if wait_for_request and not self._request_buffered() \
+                    and not wait_for_request(self.connection, self.timeout):
+                return
+            self.handle_one_request()
+    
+    def _request_buffered(self):
+        """True if a pipelined request is already in the read buffer"""
+        try:
+            self.connection.setblocking(False)
+            return bool(self.rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            try:
+                self.connection.settimeout(self.timeout)
+            except OSError:
+                pass
+    
     def log_message(self, format, *args):
         # Custom logging - don't use default stderr logging
         print(f"[{self.log_date_time_string()}] {format % args}")
@@ -216,6 +415,7 @@ class BookingHandler(SimpleHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Headers', 'Content-Type, X-CSRF-Token')
         self.send_header('Access-Control-Allow-Credentials', 'true')
         self.send_header('Access-Control-Max-Age', '86400')
+        self.send_header('Content-Length', '0')
         self.end_headers()
     
     def is_public_path(self, path):
@@ -250,6 +450,20 @@ class BookingHandler(SimpleHTTPRequestHandler):
         return False
     
     def do_GET(self):
+        self.guard_data_errors(self.route_get)
+    
+    def do_POST(self):
+        self.guard_data_errors(self.route_post)
+    
+    def guard_data_errors(self, route):
+        """Answer 503 when bookings or boats cannot be read, instead of treating them as empty"""
+        try:
+            route()
+        except (JSONFileError, sqlite3.Error) as e:
+            print(f"⚠️ Booking data unavailable: {e}")
+            self.send_error_response(503, 'Booking data temporarily unavailable, please try again')
+    
+    def route_get(self):
         # Parse URL and query parameters
         parsed_path = urlparse(self.path)
         path = parsed_path.path
@@ -258,13 +472,13 @@ class BookingHandler(SimpleHTTPRequestHandler):
         
         # Check if this is an API request to booking-handler
         if '/admin/booking-handler.py' in path or '/admin/booking-handler.php' in path:
+            # Public availability calendar (remaining boats per day)
+            if action == 'availability':
+                self.handle_availability(query_params)
+                return
+            
             # Handle session check, boats, and bookings/public endpoints
             if action in ('session', 'boats', 'bookings'):
-                self.send_response(200)
-                self.send_header('Content-Type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Access-Control-Allow-Credentials', 'true')
-                self.end_headers()
                 if action == 'session':
                     cookie_header = self.headers.get('Cookie', '')
                     session_token = get_session_token_from_cookies(cookie_header)
@@ -298,7 +512,14 @@ class BookingHandler(SimpleHTTPRequestHandler):
                         for b in bookings
                     ]
                     response = {'success': True, 'bookings': public_bookings}
-                self.wfile.write(json.dumps(response).encode('utf-8'))
+                response_bytes = json.dumps(response).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(response_bytes)))
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.send_header('Access-Control-Allow-Credentials', 'true')
+                self.end_headers()
+                self.wfile.write(response_bytes)
                 self.wfile.flush()
                 return
             
@@ -311,6 +532,7 @@ class BookingHandler(SimpleHTTPRequestHandler):
                 # Redirect to login if not authenticated
                 self.send_response(302)
                 self.send_header('Location', '/pages/admin-login.html')
+                self.send_header('Content-Length', '0')
                 self.end_headers()
                 return
             
@@ -319,6 +541,7 @@ class BookingHandler(SimpleHTTPRequestHandler):
             response_bytes = json.dumps(response).encode('utf-8')
             self.send_response(200)
             self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(response_bytes)))
             self.send_header('Access-Control-Allow-Origin', '*')
             self.send_header('Access-Control-Allow-Credentials', 'true')
             self.end_headers()
@@ -344,13 +567,59 @@ class BookingHandler(SimpleHTTPRequestHandler):
                 # Redirect to login page
                 self.send_response(302)
                 self.send_header('Location', '/pages/admin-login.html')
+                self.send_header('Content-Length', '0')
                 self.end_headers()
                 return
         
         # For public paths or authenticated users, serve static files
-        return super().do_GET()
+        self.serve_static()
     
-    def do_POST(self):
+    def serve_static(self):
+        """Serve a file with ETag/Last-Modified, 304s, sendfile and .gz variants"""
+        fs_path = self.translate_path(self.path)
+        if os.path.isdir(fs_path):
+            # Directory redirects, index.html and listings
+            return super().do_GET()
+        
+        asset = get_static_assets().lookup(fs_path)
+        if asset is None:
+            self.send_error(404, 'File not found')
+            return
+        variant = asset.variant(accepts_gzip(self.headers.get('Accept-Encoding', '')))
+        
+        if not_modified(self.headers.get('If-None-Match'), self.headers.get('If-Modified-Since'),
+                        variant.etag, asset.mtime):
+            self.send_response(304)
+            self.send_asset_validators(asset, variant)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        
+        self.send_response(200)
+        self.send_header('Content-Type', self.guess_type(fs_path))
+        if variant.encoding:
+            self.send_header('Content-Encoding', variant.encoding)
+        self.send_asset_validators(asset, variant)
+        self.send_header('Content-Length', str(variant.size))
+        self.end_headers()
+        try:
+            sent = send_file(self.connection, variant.path, variant.size)
+        except OSError:
+            self.close_connection = True
+            return
+        if sent < variant.size:
+            # File shrank while sending: the response is short, so end it here
+            self.close_connection = True
+    
+    def send_asset_validators(self, asset, variant):
+        self.send_header('ETag', variant.etag)
+        self.send_header('Last-Modified', asset.last_modified)
+        # Always revalidate: asset names are not fingerprinted
+        self.send_header('Cache-Control', 'no-cache')
+        if asset.gzip:
+            self.send_header('Vary', 'Accept-Encoding')
+    
+    def route_post(self):
         # Parse URL to check if this is an API request
         parsed_path = urlparse(self.path)
         path = parsed_path.path
@@ -358,6 +627,8 @@ class BookingHandler(SimpleHTTPRequestHandler):
         # Only handle POST requests to booking-handler endpoints
         if '/admin/booking-handler.py' not in path and '/admin/booking-handler.php' not in path:
             # Not an API request, let parent handle it (might be a form submission)
+            # The body is not read, so the connection cannot be reused
+            self.close_connection = True
             self.send_error_response(404, 'Not Found')
             return
         
@@ -365,6 +636,7 @@ class BookingHandler(SimpleHTTPRequestHandler):
         try:
             content_length = int(self.headers.get('Content-Length', 0))
         except (ValueError, TypeError):
+            self.close_connection = True
             self.send_error_response(400, 'Invalid Content-Length')
             return
             
@@ -400,12 +672,14 @@ class BookingHandler(SimpleHTTPRequestHandler):
         if 'action' in input_data:
             # Public boats fetch via POST
             if input_data.get('action') == 'boats':
+                response_bytes = json.dumps({'success': True, 'boats': self.load_boats()}).encode('utf-8')
                 self.send_response(200)
                 self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(response_bytes)))
                 self.send_header('Access-Control-Allow-Origin', '*')
                 self.send_header('Access-Control-Allow-Credentials', 'true')
                 self.end_headers()
-                self.wfile.write(json.dumps({'success': True, 'boats': self.load_boats()}).encode('utf-8'))
+                self.wfile.write(response_bytes)
                 self.wfile.flush()
                 return
             self.handle_admin_action(input_data)
@@ -435,9 +709,13 @@ class BookingHandler(SimpleHTTPRequestHandler):
             (secure_compare(username, manager_user) and secure_compare(password, manager_pass))
         )
         
-        if is_valid:
-            # Create session
-            session_token = create_session(username)
+        # Create session
+        session_token = create_session(username) if is_valid else None
+        if is_valid and session_token is None:
+            response = {'success': False, 'message': 'Session store unavailable, please try again'}
+            status_code = 503
+            cookie_value = None
+        elif is_valid:
             expires_at = (datetime.now() + timedelta(hours=SESSION_EXPIRY_HOURS)).isoformat()
             
             # Set HTTP-only cookie
@@ -455,8 +733,10 @@ class BookingHandler(SimpleHTTPRequestHandler):
             status_code = 401
             cookie_value = None
         
+        response_bytes = json.dumps(response).encode('utf-8')
         self.send_response(status_code)
         self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(response_bytes)))
         self.send_header('Access-Control-Allow-Origin', self.headers.get('Origin', '*'))
         self.send_header('Access-Control-Allow-Credentials', 'true')
         self.send_header('Access-Control-Allow-Methods', 'POST, GET, OPTIONS')
@@ -464,7 +744,6 @@ class BookingHandler(SimpleHTTPRequestHandler):
         if cookie_value:
             self.send_header('Set-Cookie', cookie_value)
         self.end_headers()
-        response_bytes = json.dumps(response).encode('utf-8')
         self.wfile.write(response_bytes)
         self.wfile.flush()
     
@@ -496,12 +775,8 @@ class BookingHandler(SimpleHTTPRequestHandler):
             'updatedAt': datetime.now().isoformat()
         }
         
-        # Load existing bookings
-        bookings = self.load_bookings()
-        bookings.append(new_booking)
-        
-        # Save bookings
-        if self.save_bookings(bookings):
+        # Save booking
+        if self.add_booking(new_booking):
             response = {
                 'success': True, 
                 'message': 'Booking submitted successfully',
@@ -512,14 +787,15 @@ class BookingHandler(SimpleHTTPRequestHandler):
             response = {'success': False, 'message': 'Failed to save booking'}
             status_code = 500
         
+        response_bytes = json.dumps(response).encode('utf-8')
         self.send_response(status_code)
         self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(response_bytes)))
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Credentials', 'true')
         self.send_header('Access-Control-Allow-Methods', 'POST, GET, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type, X-CSRF-Token')
         self.end_headers()
-        response_bytes = json.dumps(response).encode('utf-8')
         self.wfile.write(response_bytes)
         self.wfile.flush()
     
@@ -559,10 +835,7 @@ class BookingHandler(SimpleHTTPRequestHandler):
                 'updatedAt': datetime.now().isoformat()
             }
             
-            bookings = self.load_bookings()
-            bookings.append(new_booking)
-            
-            if self.save_bookings(bookings):
+            if self.add_booking(new_booking):
                 response = {
                     'success': True,
                     'message': 'Booking created successfully',
@@ -579,29 +852,22 @@ class BookingHandler(SimpleHTTPRequestHandler):
                 self.send_error_response(400, 'Booking ID required')
                 return
             
-            booking_data = input_data.get('bookingData', {})
-            bookings = self.load_bookings()
-            
-            booking_index = -1
-            for i, booking in enumerate(bookings):
-                if booking['id'] == booking_id:
-                    booking_index = i
-                    break
-            
-            if booking_index == -1:
-                self.send_error_response(404, 'Booking not found')
-                return
-            
-            # Update booking
-            bookings[booking_index].update(booking_data)
-            bookings[booking_index]['updatedAt'] = datetime.now().isoformat()
+            booking_data = dict(input_data.get('bookingData', {}))
+            booking_data['updatedAt'] = datetime.now().isoformat()
             
-            if self.save_bookings(bookings):
-                response = {'success': True, 'message': 'Booking updated successfully'}
-                status_code = 200
-            else:
+            # Update booking (indexed lookup by id)
+            try:
+                updated = get_booking_store().update(booking_id, booking_data)
+            except Exception as e:
+                print(f"Error updating booking {booking_id}: {e}")
                 response = {'success': False, 'message': 'Failed to update booking'}
                 status_code = 500
+            else:
+                if updated is None:
+                    self.send_error_response(404, 'Booking not found')
+                    return
+                response = {'success': True, 'message': 'Booking updated successfully'}
+                status_code = 200
         
         elif action == 'deleteBooking':
             booking_id = input_data.get('bookingId')
@@ -609,13 +875,12 @@ class BookingHandler(SimpleHTTPRequestHandler):
                 self.send_error_response(400, 'Booking ID required')
                 return
             
-            bookings = self.load_bookings()
-            bookings = [b for b in bookings if b['id'] != booking_id]
-            
-            if self.save_bookings(bookings):
+            try:
+                get_booking_store().delete(booking_id)
                 response = {'success': True, 'message': 'Booking deleted successfully'}
                 status_code = 200
-            else:
+            except Exception as e:
+                print(f"Error deleting booking {booking_id}: {e}")
                 response = {'success': False, 'message': 'Failed to delete booking'}
                 status_code = 500
 
@@ -626,60 +891,26 @@ class BookingHandler(SimpleHTTPRequestHandler):
                 self.send_error_response(400, 'Cart items required')
                 return
 
-            boats = self.load_boats()
-            bookings = self.load_bookings()
-
-            def parse_date(s):
-                return datetime.strptime(s, '%Y-%m-%d')
-
-            def is_blocking_booking(b):
-                status = (b.get('status') or '').strip()
-                payment_id = (b.get('paymentId') or '').strip()
-                has_online_payment = bool(payment_id) and not payment_id.startswith('manual_')
-
-                # Non-blocking statuses
-                if status in ('canceled', 'cancelled', 'payment-rejected', 'failed', 'expired', 'rejected'):
-                    return False
-                if status == 'temporary':
-                    return False
-                if has_online_payment and status in ('pending', 'open', 'not-confirmed'):
-                    return False
-
-                # Blocking statuses
-                return status in ('success', 'manual', 'paid', 'picked_up', 'confirmed', 'confirmed-paid')
+            # First boat per id wins, as with a linear search
+            boats_by_id = {boat.get('id'): boat for boat in reversed(self.load_boats())}
+            occupancy = get_booking_store().occupancy()
 
             def is_available(boat_id, start_date_str, end_date_str):
-                boat = next((x for x in boats if x.get('id') == boat_id), None)
+                boat = boats_by_id.get(boat_id)
                 if not boat:
                     return False, 'boat_not_found'
                 total = int(boat.get('total') or 1)
 
                 try:
-                    start = parse_date(start_date_str)
-                    end = parse_date(end_date_str or start_date_str)
+                    start = parse_booking_date(start_date_str)
+                    end = parse_booking_date(end_date_str or start_date_str)
                 except Exception:
                     return False, 'invalid_date'
 
-                day = start
-                while day <= end:
-                    count = 0
-                    for b in bookings:
-                        if b.get('boatType') != boat_id:
-                            continue
-                        if not b.get('date'):
-                            continue
-                        if not is_blocking_booking(b):
-                            continue
-                        try:
-                            b_start = parse_date(b.get('date'))
-                            b_end = parse_date(b.get('endDate') or b.get('date'))
-                        except Exception:
-                            continue
-                        if b_start <= day <= b_end:
-                            count += 1
-                    if count >= total:
-                        return False, day.strftime('%Y-%m-%d')
-                    day += timedelta(days=1)
+                # One counter read per day from the occupancy index
+                full_day = occupancy.first_full_day(boat_id, start, end, total)
+                if full_day is not None:
+                    return False, full_day.strftime('%Y-%m-%d')
 
                 return True, None
 
@@ -756,15 +987,84 @@ class BookingHandler(SimpleHTTPRequestHandler):
                 self.send_error_response(401, 'Unauthorized - Please login')
                 return
             
+            response_bytes = json.dumps(response).encode()
             self.send_response(status_code)
             self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(response_bytes)))
             self.send_header('Access-Control-Allow-Origin', self.headers.get('Origin', '*'))
             self.send_header('Access-Control-Allow-Credentials', 'true')
             if action == 'logout':
                 cookie_value = f"{SESSION_COOKIE_NAME}=; HttpOnly; Path=/; Max-Age=0; SameSite=Lax"
                 self.send_header('Set-Cookie', cookie_value)
             self.end_headers()
-            self.wfile.write(json.dumps(response).encode())
+            self.wfile.write(response_bytes)
+    
+    def handle_availability(self, query_params):
+        """
+        GET ?action=availability[&boat=<id>][&from=YYYY-MM-DD][&to=YYYY-MM-DD]
+        
+        Remaining boats per day for one or all boats, read from the occupancy
+        index. Per boat: {"total": n, "remaining": [value, run, value, run, ...]}
+        (run-length encoded, one entry per day from `from` to `to`). Defaults
+        to a year from today. Clients revalidate with the ETag.
+        """
+        boat_filter = query_params.get('boat', [None])[0]
+        try:
+            start = parse_booking_date(query_params.get('from', [None])[0] or datetime.now().strftime('%Y-%m-%d'))
+            to_param = query_params.get('to', [None])[0]
+            end = parse_booking_date(to_param) if to_param else start + timedelta(days=AVAILABILITY_DEFAULT_DAYS - 1)
+        except ValueError:
+            self.send_error_response(400, 'Invalid date (expected YYYY-MM-DD)')
+            return
+        days = (end - start).days + 1
+        if days < 1 or days > AVAILABILITY_MAX_DAYS:
+            self.send_error_response(400, f'Date range must be 1 to {AVAILABILITY_MAX_DAYS} days')
+            return
+        
+        boats = self.load_boats()
+        if boat_filter:
+            boats = [boat for boat in boats if boat.get('id') == boat_filter]
+            if not boats:
+                self.send_error_response(404, 'Boat not found')
+                return
+        
+        occupancy = get_booking_store().occupancy()
+        availability = {}
+        for boat in boats:
+            boat_id = boat.get('id')
+            if not boat_id or boat_id in availability:
+                continue
+            total = int(boat.get('total') or 1)
+            remaining = (max(0, total - count) for count in occupancy.counts(boat_id, start, end))
+            availability[boat_id] = {'total': total, 'remaining': run_length_encode(remaining)}
+        
+        response = {
+            'success': True,
+            'from': start.strftime('%Y-%m-%d'),
+            'to': end.strftime('%Y-%m-%d'),
+            'days': days,
+            'boats': availability
+        }
+        response_bytes = json.dumps(response, separators=(',', ':')).encode('utf-8')
+        etag = '"' + hashlib.sha1(response_bytes).hexdigest()[:20] + '"'
+        
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(response_bytes)))
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('ETag', etag)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(response_bytes)
+        self.wfile.flush()
     
     def validate_booking(self, booking_data):
         required_fields = ['date', 'boatType', 'customerName', 'customerEmail', 'customerPhone']
@@ -829,24 +1129,24 @@ class BookingHandler(SimpleHTTPRequestHandler):
         return True
     
     def load_bookings(self):
-        # Use absolute path to bookings file in admin directory
-        bookings_path = os.path.join(self.project_root, 'admin', BOOKINGS_FILE)
-        if os.path.exists(bookings_path):
-            try:
-                with open(bookings_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError):
-                return []
-        return []
+        # Errors propagate (503): an empty list would show every boat as available
+        return get_booking_store().all()
     
     def save_bookings(self, bookings):
-        # Use absolute path to bookings file in admin directory
-        bookings_path = os.path.join(self.project_root, 'admin', BOOKINGS_FILE)
+        # Replaces the full list; single changes use add_booking and the store directly
         try:
-            with open(bookings_path, 'w', encoding='utf-8') as f:
-                json.dump(bookings, f, indent=2, ensure_ascii=False)
+            get_booking_store().replace_all(bookings)
             return True
-        except IOError:
+        except Exception as e:
+            print(f"Error saving bookings: {e}")
+            return False
+    
+    def add_booking(self, booking):
+        try:
+            get_booking_store().add(booking)
+            return True
+        except Exception as e:
+            print(f"Error saving booking: {e}")
             return False
     
     def _boats_path(self):
@@ -856,21 +1156,15 @@ class BookingHandler(SimpleHTTPRequestHandler):
         return os.path.join(self.project_root, 'admin', BOATS_FILE)
 
     def load_boats(self):
-        boats_path = self._boats_path()
-        if os.path.exists(boats_path):
-            try:
-                with open(boats_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError):
-                return []
-        return []
+        # A damaged boats.json raises JSONFileError (503) instead of reading as no boats
+        return read_json(self._boats_path(), default=[])
     
     def save_boats(self, boats):
+        # Atomic replace under the file's write lock; readers are not blocked
         boats_path = self._boats_path()
         try:
-            os.makedirs(os.path.dirname(boats_path), exist_ok=True)
-            with open(boats_path, 'w', encoding='utf-8') as f:
-                json.dump(boats, f, indent=2, ensure_ascii=False)
+            with locked(boats_path):
+                write_json(boats_path, boats)
             return True
         except IOError:
             return False
@@ -881,27 +1175,95 @@ class BookingHandler(SimpleHTTPRequestHandler):
     def send_error_response(self, status_code, message):
         response = {'success': False, 'message': message}
         try:
+            response_bytes = json.dumps(response).encode()
             self.send_response(status_code)
             self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(response_bytes)))
             self.send_header('Access-Control-Allow-Origin', '*')
             self.send_header('Access-Control-Allow-Credentials', 'true')
             self.end_headers()
-            self.wfile.write(json.dumps(response).encode())
+            self.wfile.write(response_bytes)
             self.wfile.flush()
         except Exception as e:
             print(f"Error sending error response: {e}")
 
-def run_server(port=8000):
+class PooledHTTPServer(HTTPServer):
+    """
+    HTTPServer that handles each connection on a fixed pool of worker threads,
+    so a slow client or a large download does not block other requests.
+    Connections beyond the pool size wait in the queue until a worker is free.
+    A worker stays with its connection between keep-alive requests; while
+    connections are queued, idle ones are closed to free their workers
+    (browsers reconnect transparently).
+    """
+    
+    request_queue_size = 64
+    # How often an idle keep-alive connection checks for queued connections
+    idle_poll_interval = 0.05
+    
+    def __init__(self, server_address, handler_class, workers=SERVER_WORKERS):
+        super().__init__(server_address, handler_class)
+        self.workers = max(1, workers)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='booking-worker')
+        self._queued = 0
+        self._queued_lock = threading.Lock()
+    
+    def process_request(self, request, client_address):
+        with self._queued_lock:
+            self._queued += 1
+        self._pool.submit(self._process_request_worker, request, client_address)
+    
+    def _process_request_worker(self, request, client_address):
+        with self._queued_lock:
+            self._queued -= 1
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+    
+    @property
+    def saturated(self) -> bool:
+        """True if accepted connections are waiting for a worker"""
+        return self._queued > 0
+    
+    def wait_for_request(self, connection, timeout) -> bool:
+        """
+        Wait until a keep-alive connection sends its next request. Returns
+        False if it stays idle for timeout seconds, or while connections are
+        queued for a worker (the caller then closes it and frees its worker).
+        """
+        deadline = time.monotonic() + (timeout if timeout is not None else KEEPALIVE_TIMEOUT)
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            try:
+                readable, _, _ = select.select([connection], [], [], min(self.idle_poll_interval, remaining))
+            except (OSError, ValueError):
+                return False
+            if readable:
+                return True
+            if self.saturated:
+                return False
+    
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=False)
+
+def run_server(port=8000, workers=SERVER_WORKERS):
     # Change to project root directory
     script_dir = os.path.dirname(os.path.abspath(__file__))
     project_root = os.path.dirname(script_dir)
     os.chdir(project_root)
     
     server_address = ('', port)
-    httpd = HTTPServer(server_address, BookingHandler)
+    httpd = PooledHTTPServer(server_address, BookingHandler, workers)
     print(f"🚀 Starting Nijenhuis Development Server on port {port}")
     print(f"=" * 60)
     print(f"📁 Serving from: {project_root}")
+    print(f"🧵 Workers: {httpd.workers} (keep-alive timeout {KEEPALIVE_TIMEOUT:g}s)")
     print(f"")
     print(f"🌐 Available URLs:")
     print(f"   - Admin Login:    http://localhost:{port}/pages/admin-login.html")
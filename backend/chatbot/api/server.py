@@ -34,6 +34,13 @@ try:
     from backend.chatbot.core.chatbot import Chatbot as EnhancedChatbot
     from backend.chatbot.core.security_manager import get_security_manager
     from backend.chatbot.core.connection_monitor import get_connection_monitor, start_connection_monitoring
+    from backend.chatbot.core.unsupervised_learning import LearningStatsSnapshot
+    from backend.chatbot.core.training_journal import get_training_journal
+    from backend.chatbot.core.invalidation import get_invalidation_bus
+    from backend.chatbot.core.async_logging import get_async_logger
+    from backend.chatbot.core.health_board import SharedHealthBoard, start_monitor_sidecar, stop_monitor_sidecar
+    from backend.chatbot.core.process_memory import freeze_preloaded_heap, current_process_report
+    from backend.chatbot.core.warmup import warm_up_chatbot
 except ImportError as e:
     print(f"Error: Required modules not found. {e}")
     print("Please ensure all required modules are available.")
@@ -41,6 +48,9 @@ except ImportError as e:
 
 app = Flask(__name__)
 
+# Per-request log lines go through a queue; a listener thread writes them as JSON
+request_logger = get_async_logger('nijenhuis.chatbot.api.requests')
+
 # Security configuration
 flask_secret_key = os.environ.get('FLASK_SECRET_KEY')
 if not flask_secret_key:
@@ -65,45 +75,44 @@ if os.environ.get('TRUST_PROXY', 'false').lower() in ('true', '1', 'yes'):
         x_prefix=1        # Trust X-Forwarded-Prefix header
     )
 
+# Comprehensive emoji pattern covering all Unicode emoji ranges
+EMOJI_PATTERN = re.compile(
+    "["
+    "\U0001F600-\U0001F64F"  # Emoticons
+    "\U0001F300-\U0001F5FF"  # Symbols & pictographs
+    "\U0001F680-\U0001F6FF"  # Transport & map symbols
+    "\U0001F1E0-\U0001F1FF"  # Flags
+    "\U00002702-\U000027B0"  # Dingbats
+    "\U000024C2-\U0001F251"  # Enclosed characters
+    "\U0001F900-\U0001F9FF"  # Supplemental Symbols and Pictographs
+    "\U0001FA00-\U0001FA6F"  # Chess Symbols
+    "\U0001FA70-\U0001FAFF"  # Symbols and Pictographs Extended-A
+    "\U00002600-\U000026FF"  # Miscellaneous Symbols
+    "\U00002700-\U000027BF"  # Dingbats
+    "\U0000FE00-\U0000FE0F"  # Variation Selectors
+    "\U0001F000-\U0001F02F"  # Mahjong Tiles
+    "\U0001F0A0-\U0001F0FF"  # Playing Cards
+    "]+", 
+    flags=re.UNICODE
+)
+WHITESPACE_PATTERN = re.compile(r'\s+')
+CONTROL_CHARS_PATTERN = re.compile(r'[\x00-\x08\x0B-\x0C\x0E-\x1F\x7F]')
+
 # Emoji removal function - strips all emojis from chatbot responses
 def remove_emojis(text: str) -> str:
     """Remove all emojis and emoji-like characters from text"""
     if not text:
         return text
     
-    # Comprehensive emoji pattern covering all Unicode emoji ranges
-    emoji_pattern = re.compile(
-        "["
-        "\U0001F600-\U0001F64F"  # Emoticons
-        "\U0001F300-\U0001F5FF"  # Symbols & pictographs
-        "\U0001F680-\U0001F6FF"  # Transport & map symbols
-        "\U0001F1E0-\U0001F1FF"  # Flags
-        "\U00002702-\U000027B0"  # Dingbats
-        "\U000024C2-\U0001F251"  # Enclosed characters
-        "\U0001F900-\U0001F9FF"  # Supplemental Symbols and Pictographs
-        "\U0001FA00-\U0001FA6F"  # Chess Symbols
-        "\U0001FA70-\U0001FAFF"  # Symbols and Pictographs Extended-A
-        "\U00002600-\U000026FF"  # Miscellaneous Symbols
-        "\U00002700-\U000027BF"  # Dingbats
-        "\U0000FE00-\U0000FE0F"  # Variation Selectors
-        "\U0001F000-\U0001F02F"  # Mahjong Tiles
-        "\U0001F0A0-\U0001F0FF"  # Playing Cards
-        "]+", 
-        flags=re.UNICODE
-    )
-    
     # Remove emojis and clean up any double spaces left behind
-    cleaned = emoji_pattern.sub('', text)
-    cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+    cleaned = EMOJI_PATTERN.sub('', text)
+    cleaned = WHITESPACE_PATTERN.sub(' ', cleaned).strip()
     
     return cleaned
 
-# Security headers middleware
-@app.after_request
-def set_security_headers(response):
-    """Add security headers to all responses"""
+def build_security_headers(is_production: bool) -> list:
+    """Build the static security header set (computed once at startup)"""
     # Content Security Policy - restrict resource loading to prevent XSS
-    is_production = os.environ.get('FLASK_ENV', '').lower() == 'production'
     connect_src_dev = "connect-src 'self' https://nijenhuis-botenverhuur.com http://localhost:*; "
     connect_src_prod = "connect-src 'self' https://nijenhuis-botenverhuur.com; "
     connect_src = connect_src_prod if is_production else connect_src_dev
@@ -122,26 +131,53 @@ def set_security_headers(response):
         "worker-src 'none'; "
         "manifest-src 'self';"
     )
-    response.headers['Content-Security-Policy'] = csp_policy
-    
-    # Other security headers
-    response.headers['X-Content-Type-Options'] = 'nosniff'
-    response.headers['X-Frame-Options'] = 'DENY'
-    response.headers['X-XSS-Protection'] = '1; mode=block'
-    response.headers['Referrer-Policy'] = 'strict-origin-when-cross-origin'
-    response.headers['Permissions-Policy'] = 'geolocation=(), microphone=(), camera=(), payment=()'
+    return [
+        ('Content-Security-Policy', csp_policy),
+        # Other security headers
+        ('X-Content-Type-Options', 'nosniff'),
+        ('X-Frame-Options', 'DENY'),
+        ('X-XSS-Protection', '1; mode=block'),
+        ('Referrer-Policy', 'strict-origin-when-cross-origin'),
+        ('Permissions-Policy', 'geolocation=(), microphone=(), camera=(), payment=()'),
+        # Additional security headers
+        ('X-Permitted-Cross-Domain-Policies', 'none'),
+        ('Cross-Origin-Embedder-Policy', 'require-corp'),
+        ('Cross-Origin-Opener-Policy', 'same-origin'),
+        ('Cross-Origin-Resource-Policy', 'same-origin'),
+    ]
+
+class SecurityHeadersMiddleware:
+    """
+    WSGI middleware that appends the precomputed security headers to every response.
+    Working on the raw header list avoids per-header validation and scans in
+    werkzeug's Headers, which dominated the old after_request hook.
+    """
     
-    # Additional security headers
-    response.headers['X-Permitted-Cross-Domain-Policies'] = 'none'
-    response.headers['Cross-Origin-Embedder-Policy'] = 'require-corp'
-    response.headers['Cross-Origin-Opener-Policy'] = 'same-origin'
-    response.headers['Cross-Origin-Resource-Policy'] = 'same-origin'
+    HSTS_HEADER = ('Strict-Transport-Security', 'max-age=31536000; includeSubDomains; preload')
     
-    # HSTS (only if HTTPS is confirmed)
-    if request.is_secure or request.headers.get('X-Forwarded-Proto') == 'https':
-        response.headers['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains; preload'
+    def __init__(self, wsgi_app, headers: list):
+        self.wsgi_app = wsgi_app
+        self.headers = headers
+        self.names = frozenset(name.lower() for name, _ in headers)
     
-    return response
+    def __call__(self, environ, start_response):
+        def _start_response(status, response_headers, exc_info=None):
+            # Headers a view set explicitly win over the defaults
+            if any(name.lower() in self.names for name, _ in response_headers):
+                existing = {name.lower() for name, _ in response_headers}
+                response_headers.extend(h for h in self.headers if h[0].lower() not in existing)
+            else:
+                response_headers.extend(self.headers)
+            
+            # HSTS (only if HTTPS is confirmed)
+            if environ.get('wsgi.url_scheme') == 'https' or environ.get('HTTP_X_FORWARDED_PROTO') == 'https':
+                response_headers.append(self.HSTS_HEADER)
+            return start_response(status, response_headers, exc_info)
+        return self.wsgi_app(environ, _start_response)
+
+# Security headers middleware
+SECURITY_HEADERS = build_security_headers(os.environ.get('FLASK_ENV', '').lower() == 'production')
+app.wsgi_app = SecurityHeadersMiddleware(app.wsgi_app, SECURITY_HEADERS)
 
 # Restrict CORS to known origins with enhanced security
 # Prioritize HTTPS origins in production
@@ -182,6 +218,8 @@ CORS(app, resources={
 # Initialize security and monitoring
 security_manager = get_security_manager()
 connection_monitor = get_connection_monitor()
+training_journal = get_training_journal()
+invalidation_bus = get_invalidation_bus()
 
 # Input sanitization functions
 def sanitize_text(text: str, max_length: int = 1000) -> str:
@@ -206,7 +244,7 @@ def sanitize_text(text: str, max_length: int = 1000) -> str:
         text = text[:max_length]
     
     # Remove control characters (except newlines and tabs)
-    text = re.sub(r'[\x00-\x08\x0B-\x0C\x0E-\x1F\x7F]', '', text)
+    text = CONTROL_CHARS_PATTERN.sub('', text)
     
     # HTML escape to prevent XSS
     text = html.escape(text)
@@ -282,6 +320,58 @@ except Exception as e:
 # Import boat translation function
 from backend.chatbot.core.boat_translations import translate_boat_names
 
+# Cross-worker invalidation: training changes, cache clears and JWT revocations
+# published by one gunicorn worker are picked up by the others before their
+# next request
+def _on_training_invalidated(payload):
+    if chatbot and getattr(chatbot, 'knowledge_base', None):
+        chatbot.knowledge_base.refresh_trained_responses()
+
+def _on_cache_invalidated(payload):
+    if chatbot and getattr(chatbot, 'knowledge_base', None):
+        chatbot.knowledge_base.clear_cache()
+
+invalidation_bus.subscribe('training', _on_training_invalidated)
+invalidation_bus.subscribe('cache', _on_cache_invalidated)
+
+# Connection health: probe the chatbot in-process instead of HTTP self-requests.
+# The board is created before gunicorn forks (preload_app), so a single monitor
+# process started from the master can publish status to every worker.
+# The probe runs in that monitor process, so it checks the knowledge base loaded
+# there (not each worker's copy); it bypasses the response cache so every probe
+# runs the intent matchers instead of returning the first cached answer.
+def _in_process_health_probe() -> bool:
+    result = chatbot.knowledge_base.answer_query('openingstijden', 'nl', use_cache=False)
+    return bool(result and result.get('response'))
+
+health_board = SharedHealthBoard()
+connection_monitor.set_health_probe(_in_process_health_probe)
+connection_monitor.attach_shared_board(health_board)
+_health_monitor_pid = None
+
+def start_shared_health_monitor() -> int:
+    """Start the single shared connection monitor (called from the gunicorn master)"""
+    global _health_monitor_pid
+    if _health_monitor_pid is None:
+        prepare_for_fork()
+        _health_monitor_pid = start_monitor_sidecar(connection_monitor, health_board)
+    return _health_monitor_pid
+
+def stop_shared_health_monitor():
+    """Stop the shared connection monitor"""
+    global _health_monitor_pid
+    stop_monitor_sidecar(_health_monitor_pid)
+    _health_monitor_pid = None
+
+def prepare_for_fork() -> dict:
+    """Freeze the preloaded heap so workers share its pages (called from gunicorn's pre_fork)"""
+    return freeze_preloaded_heap()
+
+@app.before_request
+def poll_invalidations():
+    """Pick up invalidations published by other workers"""
+    invalidation_bus.poll()
+
 # Security decorators
 def require_api_key(permission='chat'):
     """Decorator to require authentication via JWT Bearer token or legacy API key"""
@@ -297,6 +387,9 @@ def require_api_key(permission='chat'):
             
             # Prefer JWT Bearer token when present
             if bearer_token:
+                is_ip_allowed, ip_message = security_manager.check_ip_blocking(client_ip)
+                if not is_ip_allowed:
+                    return jsonify({'error': ip_message, 'success': False}), 403
                 payload = security_manager.verify_jwt_token(bearer_token)
                 if not payload:
                     return jsonify({'error': 'Invalid or expired token', 'success': False}), 401
@@ -361,16 +454,16 @@ def require_connection_health():
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            if not connection_monitor.is_connection_healthy():
-                # Try to reconnect
-                if not connection_monitor.attempt_reconnection():
-                    # Return fallback response
-                    return jsonify({
-                        'response': connection_monitor.get_fallback_response('nl', 'offline'),
-                        'response_type': 'fallback',
-                        'success': True,
-                        'connection_status': 'offline'
-                    })
+            # O(1) read of the health snapshot; probes and reconnection only
+            # ever run in the background, never on the request thread
+            if not connection_monitor.get_health_snapshot().is_healthy:
+                connection_monitor.request_reconnection()
+                return jsonify({
+                    'response': connection_monitor.get_fallback_response('nl', 'offline'),
+                    'response_type': 'fallback',
+                    'success': True,
+                    'connection_status': 'offline'
+                })
             
             return f(*args, **kwargs)
         return decorated_function
@@ -381,37 +474,41 @@ def log_request():
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            start_time = time.time()
-            
-            # Log request
-            request_data = {
-                'endpoint': request.endpoint,
-                'method': request.method,
-                'ip': getattr(g, 'client_ip', request.remote_addr),
-                'user_agent': request.headers.get('User-Agent', ''),
-                'timestamp': datetime.now().isoformat()
-            }
+            start_time = time.perf_counter()
             
             try:
                 result = f(*args, **kwargs)
-                response_time = time.time() - start_time
+                response_time = time.perf_counter() - start_time
                 
                 # Update connection health
                 connection_monitor.update_connection_health(success=True)
                 
-                # Log successful request
-                print(f"✅ {request.method} {request.endpoint} - {response_time:.3f}s")
+                # Log successful request (written by the listener thread)
+                request_logger.info('request', extra={
+                    'method': request.method,
+                    'endpoint': request.endpoint,
+                    'ip': getattr(g, 'client_ip', request.remote_addr),
+                    'duration_ms': round(response_time * 1000, 2),
+                    'outcome': 'ok'
+                })
                 
                 return result
                 
             except Exception as e:
-                response_time = time.time() - start_time
+                response_time = time.perf_counter() - start_time
                 
                 # Update connection health
                 connection_monitor.update_connection_health(success=False)
                 
                 # Log failed request
-                print(f"❌ {request.method} {request.endpoint} - {response_time:.3f}s - Error: {str(e)}")
+                request_logger.error('request failed', extra={
+                    'method': request.method,
+                    'endpoint': request.endpoint,
+                    'ip': getattr(g, 'client_ip', request.remote_addr),
+                    'duration_ms': round(response_time * 1000, 2),
+                    'outcome': 'error',
+                    'error': str(e)
+                })
                 
                 # Return error response
                 return jsonify({
@@ -425,18 +522,13 @@ def log_request():
 
 # Load website content extractor
 try:
-    from backend.chatbot.core.website_content_extractor import WebsiteContentExtractor, get_website_content
-    # Extract content from actual HTML pages
-    print("📄 Extracting content from website pages...")
-    extractor = WebsiteContentExtractor()
-    NIJENHUIS_WEBSITE_CONTENT = extractor.extract_all_content()
+    from backend.chatbot.core.content_snapshot import load_website_content
+    # Prefer the build-time snapshot (scripts/build_content_snapshot.py); pages are
+    # only parsed when it is missing or stale. Content is capped at 50000 characters.
+    NIJENHUIS_WEBSITE_CONTENT, website_content_source = load_website_content()
     
     if NIJENHUIS_WEBSITE_CONTENT:
-        print(f"✅ Loaded {len(NIJENHUIS_WEBSITE_CONTENT)} characters of website content")
-        # Limit content size to avoid memory issues (keep first 50000 chars)
-        if len(NIJENHUIS_WEBSITE_CONTENT) > 50000:
-            NIJENHUIS_WEBSITE_CONTENT = NIJENHUIS_WEBSITE_CONTENT[:50000]
-            print("⚠️ Content truncated to 50000 characters")
+        print(f"✅ Loaded {len(NIJENHUIS_WEBSITE_CONTENT)} characters of website content ({website_content_source})")
     else:
         print("⚠️ No website content extracted, using fallback")
         # Fallback to basic content if extraction fails
@@ -501,6 +593,10 @@ Telefoon: 0522 281 528
 Adres: Veneweg 199, 7946 LP Wanneperveen
 """
 
+def warm_up_worker() -> dict:
+    """Prime this worker's caches before it accepts traffic (called from gunicorn's post_worker_init)"""
+    return warm_up_chatbot(chatbot, NIJENHUIS_WEBSITE_CONTENT)
+
 @app.route('/api/chat', methods=['POST'])
 @require_api_key('chat')
 @require_connection_health()
@@ -663,6 +759,7 @@ def reload_training_data():
         # Reload the knowledge base training data
         if chatbot and hasattr(chatbot, 'knowledge_base') and chatbot.knowledge_base:
             chatbot.knowledge_base.reload_trained_responses()
+            invalidation_bus.publish('training', {'reload': True})
             count = len(chatbot.knowledge_base.trained_responses)
             return jsonify({
                 'success': True,
@@ -707,13 +804,40 @@ def get_training_stats():
             'message': str(e)
         }), 500
 
+def build_training_session(question: str, original_response: str, corrected_response: str,
+                           language: str = 'nl', response_type: str = 'general') -> dict:
+    """Build a training session record in the enhanced_training_data.json format"""
+    return {
+        "question": question,
+        "original_response": original_response,
+        "corrected_response": corrected_response,
+        "detected_language": language,
+        "response_type": response_type,
+        "timestamp": datetime.now().isoformat(),
+        "status": "Corrected",
+        "source": "VYBR1S"
+    }
+
+def record_training_sessions(sessions: list) -> int:
+    """
+    Journal new corrections and apply them to the live knowledge base.
+    The JSON snapshot is compacted in the background by the training journal.
+    Returns the number of trained responses now loaded.
+    """
+    training_journal.append(sessions)
+    invalidation_bus.publish('training', {'corrections': len(sessions)})
+    if chatbot and hasattr(chatbot, 'knowledge_base') and chatbot.knowledge_base:
+        chatbot.knowledge_base.apply_corrections(sessions)
+        return len(chatbot.knowledge_base.trained_responses)
+    return 0
+
 @app.route('/api/train', methods=['POST'])
 @require_api_key('train')
 @log_request()
 def submit_training_correction():
     """
     Submit a corrected response from external training platform (VYBR1S).
-    This endpoint saves corrections to the training data file and reloads the knowledge base.
+    This endpoint journals the correction and applies it to the knowledge base immediately.
     
     Expected JSON body:
     {
@@ -742,60 +866,10 @@ def submit_training_correction():
                 'message': 'Both "question" and "corrected_response" are required'
             }), 400
         
-        # Load existing training data (correct path with 'data' subdirectory)
-        training_file = os.path.join(
-            os.path.dirname(__file__), '..', 'training', 'data', 'enhanced_training_data.json'
+        new_session = build_training_session(
+            question, original_response, corrected_response, language, response_type
         )
-        
-        try:
-            with open(training_file, 'r', encoding='utf-8') as f:
-                training_data = json.load(f)
-        except FileNotFoundError:
-            training_data = {
-                "metadata": {
-                    "created": datetime.now().isoformat(),
-                    "version": "2.1",
-                    "enhanced": True
-                },
-                "training_sessions": [],
-                "training_data": {
-                    "improved_responses": {}
-                }
-            }
-        
-        # Add the new correction
-        new_session = {
-            "question": question,
-            "original_response": original_response,
-            "corrected_response": corrected_response,
-            "detected_language": language,
-            "response_type": response_type,
-            "timestamp": datetime.now().isoformat(),
-            "status": "Corrected",
-            "source": "VYBR1S"
-        }
-        
-        # Add to training_sessions at root level (this is what knowledge_base reads)
-        if 'training_sessions' not in training_data:
-            training_data['training_sessions'] = []
-        
-        training_data['training_sessions'].append(new_session)
-        
-        # Update metadata
-        training_data['metadata'] = training_data.get('metadata', {})
-        training_data['metadata']['last_updated'] = datetime.now().isoformat()
-        training_data['metadata']['last_source'] = 'VYBR1S'
-        
-        # Save updated training data
-        with open(training_file, 'w', encoding='utf-8') as f:
-            json.dump(training_data, f, indent=2, ensure_ascii=False)
-        
-        # Reload the knowledge base to use the new correction immediately
-        if chatbot and hasattr(chatbot, 'knowledge_base') and chatbot.knowledge_base:
-            chatbot.knowledge_base.reload_trained_responses()
-            trained_count = len(chatbot.knowledge_base.trained_responses)
-        else:
-            trained_count = 0
+        trained_count = record_training_sessions([new_session])
         
         return jsonify({
             'success': True,
@@ -843,59 +917,22 @@ def submit_training_batch():
         if not isinstance(corrections, list) or len(corrections) == 0:
             return jsonify({'success': False, 'message': 'corrections must be a non-empty array'}), 400
         
-        # Load existing training data (correct path with 'data' subdirectory)
-        training_file = os.path.join(
-            os.path.dirname(__file__), '..', 'training', 'data', 'enhanced_training_data.json'
-        )
-        
-        try:
-            with open(training_file, 'r', encoding='utf-8') as f:
-                training_data = json.load(f)
-        except FileNotFoundError:
-            training_data = {
-                "metadata": {"created": datetime.now().isoformat(), "version": "2.1", "enhanced": True},
-                "training_sessions": []
-            }
-        
-        # Ensure training_sessions exists at root level
-        if 'training_sessions' not in training_data:
-            training_data['training_sessions'] = []
-        
-        added_count = 0
+        new_sessions = []
         for correction in corrections:
             question = correction.get('question', '').strip()
             corrected_response = correction.get('corrected_response', '').strip()
             
             if question and corrected_response:
-                new_session = {
-                    "question": question,
-                    "original_response": correction.get('original_response', ''),
-                    "corrected_response": corrected_response,
-                    "detected_language": correction.get('language', 'nl'),
-                    "response_type": correction.get('response_type', 'general'),
-                    "timestamp": datetime.now().isoformat(),
-                    "status": "Corrected",
-                    "source": "VYBR1S"
-                }
-                training_data['training_sessions'].append(new_session)
-                added_count += 1
+                new_sessions.append(build_training_session(
+                    question,
+                    correction.get('original_response', ''),
+                    corrected_response,
+                    correction.get('language', 'nl'),
+                    correction.get('response_type', 'general')
+                ))
         
-        # Update metadata
-        training_data['metadata'] = training_data.get('metadata', {})
-        training_data['metadata']['last_updated'] = datetime.now().isoformat()
-        training_data['metadata']['last_source'] = 'VYBR1S'
-        training_data['metadata']['batch_import_count'] = added_count
-        
-        # Save updated training data
-        with open(training_file, 'w', encoding='utf-8') as f:
-            json.dump(training_data, f, indent=2, ensure_ascii=False)
-        
-        # Reload the knowledge base
-        if chatbot and hasattr(chatbot, 'knowledge_base') and chatbot.knowledge_base:
-            chatbot.knowledge_base.reload_trained_responses()
-            trained_count = len(chatbot.knowledge_base.trained_responses)
-        else:
-            trained_count = 0
+        added_count = len(new_sessions)
+        trained_count = record_training_sessions(new_sessions)
         
         return jsonify({
             'success': True,
@@ -964,6 +1001,13 @@ def security_status():
     """Get security status and statistics"""
     return jsonify(security_manager.get_security_stats())
 
+@app.route('/api/monitoring/memory', methods=['GET'])
+@require_api_key('config')
+@log_request()
+def memory_status():
+    """USS/PSS of the worker answering the request and how much of its memory is shared"""
+    return jsonify(current_process_report())
+
 @app.route('/api/security/create-key', methods=['POST'])
 @require_api_key('config')
 @log_request()
@@ -999,8 +1043,8 @@ def clear_cache():
     """Clear the knowledge base response cache"""
     try:
         if chatbot and hasattr(chatbot, 'knowledge_base') and chatbot.knowledge_base:
-            chatbot.knowledge_base._response_cache = {}
-            chatbot.knowledge_base._cache_order = []
+            chatbot.knowledge_base.clear_cache()
+            invalidation_bus.publish('cache')
             return jsonify({
                 'success': True,
                 'message': 'Cache cleared successfully'
@@ -1036,17 +1080,86 @@ def force_reconnect():
         'message': 'Reconnection successful' if success else 'Reconnection failed'
     })
 
+# Static metadata responses
+# These payloads never change while the process runs, so they are built and
+# serialized once at import time and served as raw bytes with a strong ETag.
+STATIC_RESPONSE_MAX_AGE = int(os.environ.get('STATIC_RESPONSE_MAX_AGE', '3600'))
+
+def precompute_json_response(payload) -> dict:
+    """Serialize a constant payload once and derive its ETag"""
+    body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return {'body': body, 'etag': hashlib.sha256(body).hexdigest()[:32]}
+
+def serve_precomputed(entry: dict, max_age: int = STATIC_RESPONSE_MAX_AGE, scope: str = 'public'):
+    """Serve a precomputed JSON entry, answering conditional requests with 304"""
+    if request.if_none_match.contains(entry['etag']):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(entry['body'], status=200, mimetype='application/json')
+    response.set_etag(entry['etag'])
+    response.headers['Cache-Control'] = f'{scope}, max-age={max_age}'
+    return response
+
+def count_network_parameters(layer_sizes: list) -> int:
+    """Number of weights and biases in a fully connected network"""
+    return sum(n_in * n_out + n_out for n_in, n_out in zip(layer_sizes[:-1], layer_sizes[1:]))
+
+NEURAL_NETWORK_LAYERS = [100, 64, 32, 5]
+
+LANGUAGES_RESPONSE = precompute_json_response({
+    'languages': {
+        'nl': 'Nederlands',
+        'en': 'English',
+        'de': 'German'
+    },
+    'default': 'nl'
+})
+
+CONFIG_RESPONSE = precompute_json_response({
+    'name': 'Nijenhuis Customer Support Chatbot',
+    'version': '2.0.0',
+    'features': [
+        'multilingual_support',
+        'website_analysis',
+        'real_time_chat',
+        'responsive_design',
+        'faq_integration',
+        'contact_information',
+        'unsupervised_learning',
+        'boat_translations'
+    ],
+    'supported_languages': ['nl', 'en', 'de'],
+    'max_message_length': 500
+})
+
+NEURAL_NETWORK_INFO_RESPONSE = precompute_json_response({
+    'architecture': {
+        'input_size': NEURAL_NETWORK_LAYERS[0],
+        'hidden_layers': NEURAL_NETWORK_LAYERS[1:-1],
+        'output_size': NEURAL_NETWORK_LAYERS[-1],
+        'total_parameters': count_network_parameters(NEURAL_NETWORK_LAYERS)
+    },
+    'activation_functions': {
+        'hidden_layers': 'ReLU',
+        'output_layer': 'Softmax'
+    },
+    'features': {
+        'text_preprocessing': True,
+        'response_type_classification': True,
+        'confidence_scoring': True,
+        'multilingual_support': True
+    },
+    'training': {
+        'learning_rate': 0.001,
+        'batch_size': 32,
+        'epochs': 50
+    }
+})
+
 @app.route('/api/languages', methods=['GET'])
 def get_languages():
     """Get supported languages"""
-    return jsonify({
-        'languages': {
-            'nl': 'Nederlands',
-            'en': 'English',
-            'de': 'German'
-        },
-        'default': 'nl'
-    })
+    return serve_precomputed(LANGUAGES_RESPONSE)
 
 @app.route('/api/website/analyze', methods=['GET'])
 def analyze_website():
@@ -1067,31 +1180,18 @@ def analyze_website():
 @app.route('/api/config', methods=['GET'])
 def get_config():
     """Get chatbot configuration"""
-    return jsonify({
-        'name': 'Nijenhuis Customer Support Chatbot',
-        'version': '2.0.0',
-        'features': [
-            'multilingual_support',
-            'website_analysis',
-            'real_time_chat',
-            'responsive_design',
-            'faq_integration',
-            'contact_information',
-            'unsupervised_learning',
-            'boat_translations'
-        ],
-        'supported_languages': ['nl', 'en', 'de'],
-        'max_message_length': 500
-    })
+    return serve_precomputed(CONFIG_RESPONSE)
+
+# Learning statistics are served from a snapshot of the chatbot's own learning
+# system, rebuilt in the background instead of reparsing the data file per request
+learning_snapshot = LearningStatsSnapshot(chatbot.learning_system, precompute_json_response)
 
 @app.route('/api/learning/stats', methods=['GET'])
 def get_learning_stats():
     """Get unsupervised learning statistics"""
     try:
-        from backend.chatbot.core.unsupervised_learning import UnsupervisedLearning
-        learning = UnsupervisedLearning()
-        stats = learning.get_statistics()
-        return jsonify(stats)
+        return serve_precomputed(learning_snapshot.get('stats'),
+                                 max_age=int(learning_snapshot.refresh_interval), scope='private')
     except Exception as e:
         logger.exception('get_learning_stats failed')
         return jsonify({'error': 'Internal server error'}), 500
@@ -1100,10 +1200,8 @@ def get_learning_stats():
 def get_learning_improvements():
     """Get suggested improvements from unsupervised learning"""
     try:
-        from backend.chatbot.core.unsupervised_learning import UnsupervisedLearning
-        learning = UnsupervisedLearning()
-        improvements = learning.get_suggested_improvements()
-        return jsonify({'improvements': improvements})
+        return serve_precomputed(learning_snapshot.get('improvements'),
+                                 max_age=int(learning_snapshot.refresh_interval), scope='private')
     except Exception as e:
         logger.exception('get_learning_improvements failed')
         return jsonify({'error': 'Internal server error'}), 500
@@ -1111,41 +1209,7 @@ def get_learning_improvements():
 @app.route('/api/neural-network/info', methods=['GET'])
 def get_neural_network_info():
     """Get neural network information and architecture"""
-    try:
-        from backend.chatbot.core.neural_network import NeuralNetwork, ChatbotNeuralNetwork
-        
-        # Create a sample network to show architecture
-        sample_nn = NeuralNetwork([100, 64, 32, 5])
-        sample_chatbot_nn = ChatbotNeuralNetwork(input_size=100, hidden_sizes=[64, 32], output_size=5)
-        
-        info = {
-            'architecture': {
-                'input_size': 100,
-                'hidden_layers': [64, 32],
-                'output_size': 5,
-                'total_parameters': sum(w.size + b.size for w, b in zip(sample_nn.weights, sample_nn.biases))
-            },
-            'activation_functions': {
-                'hidden_layers': 'ReLU',
-                'output_layer': 'Softmax'
-            },
-            'features': {
-                'text_preprocessing': True,
-                'response_type_classification': True,
-                'confidence_scoring': True,
-                'multilingual_support': True
-            },
-            'training': {
-                'learning_rate': 0.001,
-                'batch_size': 32,
-                'epochs': 50
-            }
-        }
-        
-        return jsonify(info)
-    except Exception as e:
-        logger.exception('get_neural_network_info failed')
-        return jsonify({'error': 'Internal server error'}), 500
+    return serve_precomputed(NEURAL_NETWORK_INFO_RESPONSE)
 
 if __name__ == '__main__':
     print("🤖 Starting Nijenhuis Secure Chatbot API Server...")
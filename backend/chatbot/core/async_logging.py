@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Asynchronous Structured Logging for Nijenhuis Chatbot
+Request threads enqueue log records; a QueueListener thread formats and writes them
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+try:
+    import fcntl  # POSIX only
+except ImportError:  # pragma: no cover - Windows fallback
+    fcntl = None
+
+STANDARD_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None)).keys()) | {'message', 'asctime'}
+
+
+class JsonLineFormatter(logging.Formatter):
+    """Format records as one JSON object per line, including `extra` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in STANDARD_RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    """
+    QueueListener that also accepts (logger name, created, message, fields)
+    tuples from ForkSafeQueueHandler.submit() and turns them into records on
+    the listener thread; stop() waits for room in a bounded queue.
+    """
+
+    def prepare(self, record):
+        if isinstance(record, tuple):
+            name, created, msg, fields = record
+            record = logging.makeLogRecord(fields)
+            record.name = name
+            record.msg = msg
+            record.created = created
+            record.levelno, record.levelname = logging.INFO, 'INFO'
+        return record
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+class ForkSafeQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that (re)starts its listener in the current process.
+    Listener threads do not survive gunicorn's fork, so the first record
+    emitted in a new worker starts a fresh queue and listener there.
+    """
+
+    def __init__(self, target_handler: logging.Handler, max_queue: int = 0):
+        self.max_queue = max_queue
+        super().__init__(self._new_queue())
+        self.target_handler = target_handler
+        self.dropped = 0
+        self._listener: Optional[logging.handlers.QueueListener] = None
+        self._listener_pid = None
+        self._start_lock = threading.Lock()
+
+    def _new_queue(self):
+        # Bounded queues drop records instead of growing when the writer falls behind
+        return queue.Queue(self.max_queue) if self.max_queue > 0 else queue.SimpleQueue()
+
+    def _ensure_listener(self):
+        if self._listener_pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._listener_pid == os.getpid():
+                return
+            self.queue = self._new_queue()
+            self._listener = _QueueListener(self.queue, self.target_handler)
+            self._listener.start()
+            self._listener_pid = os.getpid()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting is left to the listener thread; records stay in-process
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def emit(self, record: logging.LogRecord):
+        self._ensure_listener()
+        super().emit(record)
+
+    def submit(self, logger_name: str, msg: str, fields: dict, created: float = None):
+        """
+        Queue an INFO line without building a LogRecord on the calling thread
+        (the listener does that), for high-volume events on the request path.
+        """
+        self._ensure_listener()
+        self.enqueue((logger_name, created or time.time(), msg, fields))
+
+    def stop(self):
+        """Flush queued records and stop the listener in this process"""
+        if self._listener is not None and self._listener_pid == os.getpid():
+            self._listener.stop()
+            self._listener = None
+            self._listener_pid = None
+
+
+def get_async_logger(name: str, stream=None, level: int = logging.INFO) -> logging.Logger:
+    """Get a logger whose records are written as JSON lines by a background thread"""
+    logger = logging.getLogger(name)
+    if any(isinstance(h, ForkSafeQueueHandler) for h in logger.handlers):
+        return logger
+
+    target = logging.StreamHandler(stream or sys.stdout)
+    target.setFormatter(JsonLineFormatter())
+    handler = ForkSafeQueueHandler(target)
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+    atexit.register(handler.stop)
+    return logger
+
+
+class SharedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    RotatingFileHandler for a file written by several gunicorn workers.
+    Rollover happens under an flock, and a worker whose file was rotated by
+    another one reopens the new file instead of rotating it again.
+    """
+
+    def _reopen_if_rotated(self):
+        if self.stream is None:
+            return
+        try:
+            rotated = os.stat(self.baseFilename).st_ino != os.fstat(self.stream.fileno()).st_ino
+        except FileNotFoundError:
+            rotated = True
+        if rotated:
+            self.stream.close()
+            self.stream = self._open()
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        self._reopen_if_rotated()
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        if fcntl is None:
+            return super().doRollover()
+        with open(self.baseFilename + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self._reopen_if_rotated()
+            if self.stream is not None and os.fstat(self.stream.fileno()).st_size < self.maxBytes:
+                return  # another worker rotated it first
+            super().doRollover()
+
+
+def get_async_file_logger(name: str, path: str, max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5,
+                          max_queue: int = 10000, level: int = logging.INFO) -> logging.Logger:
+    """
+    Get a logger that appends JSON lines to a rotating file from a background thread.
+    At most max_queue records wait for the writer; beyond that new records are
+    dropped (counted in the handler's `dropped`) so emitting never blocks or grows.
+    """
+    logger = logging.getLogger(name)
+    if any(isinstance(h, ForkSafeQueueHandler) for h in logger.handlers):
+        return logger
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    target = SharedRotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count,
+                                       encoding='utf-8', delay=True)
+    target.setFormatter(JsonLineFormatter())
+    handler = ForkSafeQueueHandler(target, max_queue=max_queue)
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+    atexit.register(handler.stop)
+    return logger
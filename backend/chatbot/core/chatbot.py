@@ -26,6 +26,8 @@ except ImportError:
     from backend.chatbot.core.conversation_context import ConversationContextManager
     from backend.chatbot.core.knowledge_base import get_knowledge_base, KnowledgeBase
 
+from backend.shared.state_backend import get_state_backend, state_backend_configured
+
 # PERFORMANCE: Lazy import of heavy ML libraries
 # These will be imported only when advanced NLP is explicitly enabled
 TRANSFORMERS_AVAILABLE = None  # Will be set on first access
@@ -469,7 +471,9 @@ class Chatbot:
         os.makedirs(context_storage_dir, exist_ok=True)
         self.context_manager = ConversationContextManager(
             storage_dir=context_storage_dir,
-            session_timeout=3600  # 1 hour
+            session_timeout=3600,  # 1 hour
+            # With STATE_BACKEND_URL set, sessions continue on any app server
+            state_backend=get_state_backend() if state_backend_configured() else None
         )
         
         init_time = time.time() - start_time
@@ -590,7 +594,8 @@ class Chatbot:
         website_content: str = None,
         conversation_history: List[Dict[str, str]] = None,
         session_id: str = None,
-        use_token_prediction: bool = False  # Disabled by default for speed
+        use_token_prediction: bool = False,  # Disabled by default for speed
+        record_interaction: bool = True
     ) -> Dict[str, Any]:
         """
         Process a user query and return enhanced response with full conversation context
@@ -602,6 +607,7 @@ class Chatbot:
             conversation_history: Previous conversation messages (list of dicts with 'role' and 'content')
             session_id: Optional session ID for context tracking
             use_token_prediction: Whether to use token prediction (disabled by default for speed)
+            record_interaction: Record the interaction for unsupervised learning (off for warm-up traffic)
             
         Returns:
             Enhanced response dictionary
@@ -720,14 +726,16 @@ class Chatbot:
                     'confidence': confidence,
                     'response_type': response_type
                 })
+                self.context_manager.commit_context(session_id)
         
         # Record interaction
-        self.learning_system.record_interaction(
-            query,
-            final_response,
-            training_improved,
-            result['processing_time']
-        )
+        if record_interaction:
+            self.learning_system.record_interaction(
+                query,
+                final_response,
+                training_improved,
+                result['processing_time']
+            )
         
         return result
     
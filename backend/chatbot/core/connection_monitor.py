@@ -24,6 +24,16 @@ class ConnectionStatus(Enum):
     OFFLINE = "offline"
     RECONNECTING = "reconnecting"
 
+# Stable numeric codes for the shared health board, and severity for merging
+STATUS_CODES = list(ConnectionStatus)
+STATUS_SEVERITY = {
+    ConnectionStatus.HEALTHY: 0,
+    ConnectionStatus.DEGRADED: 1,
+    ConnectionStatus.RECONNECTING: 2,
+    ConnectionStatus.UNHEALTHY: 3,
+    ConnectionStatus.OFFLINE: 4
+}
+
 @dataclass
 class ConnectionMetrics:
     """Connection metrics data class"""
@@ -37,6 +47,37 @@ class ConnectionMetrics:
     total_failures: int
     uptime_seconds: float
 
+@dataclass(frozen=True)
+class HealthSnapshot:
+    """Immutable health state published for the request path"""
+    status: ConnectionStatus
+    is_healthy: bool
+    needs_attention: bool
+    internet_available: Optional[bool]
+    updated_at: float
+
+def parse_probe_hosts(value: Optional[str]) -> List[tuple]:
+    """
+    Parse CONNECTIVITY_PROBE_HOSTS ("host:port,host:port").
+    An empty value or 'off'/'none'/'disabled' disables the internet probe.
+    """
+    default_hosts = [
+        ("8.8.8.8", 53),       # Google DNS
+        ("1.1.1.1", 53),       # Cloudflare DNS
+        ("208.67.222.222", 53) # OpenDNS
+    ]
+    if value is None:
+        return default_hosts
+    value = value.strip()
+    if value.lower() in ('', 'off', 'none', 'disabled', 'false', '0'):
+        return []
+    hosts = []
+    for item in value.split(','):
+        host, _, port = item.strip().rpartition(':')
+        if host and port.isdigit():
+            hosts.append((host, int(port)))
+    return hosts
+
 class ConnectionMonitor:
     """Monitors and manages chatbot connections"""
     
@@ -79,11 +120,34 @@ class ConnectionMonitor:
         self.status_change_callbacks: List[Callable] = []
         self.health_check_callbacks: List[Callable] = []
         
+        # Internet probe (configurable for offline or firewalled deployments)
+        self.probe_hosts = parse_probe_hosts(os.environ.get('CONNECTIVITY_PROBE_HOSTS'))
+        self.probe_timeout = float(os.environ.get('CONNECTIVITY_PROBE_TIMEOUT', '2'))
+        
         # Monitoring thread
         self.monitoring_thread = None
         self.is_monitoring = False
         self.start_time = time.time()
         
+        # Background reconnection (never run on a request thread)
+        self.reconnect_cooldown = float(os.environ.get('RECONNECT_COOLDOWN_SECONDS', '30'))
+        self._reconnect_lock = threading.Lock()
+        self._reconnect_thread = None
+        self._last_reconnect_started = 0.0
+        
+        # In-process health probe (replaces HTTP self-requests when set)
+        self.health_probe: Optional[Callable[[], bool]] = None
+        
+        # Shared health board: one monitor process writes, workers read
+        self.shared_board = None
+        self._board_writer = None
+        self.shared_board_max_age = 3 * health_check_interval + 10
+        
+        # Health snapshot read by the request path
+        self._internet_available = None
+        self._health_snapshot = None
+        self._publish_snapshot()
+        
         # Fallback mechanisms
         self.fallback_responses = {
             'nl': {
@@ -119,40 +183,118 @@ class ConnectionMonitor:
         self.logger.addHandler(handler)
         self.logger.setLevel(logging.INFO)
     
-    def check_internet_connectivity(self, timeout: float = 5.0) -> bool:
+    def check_internet_connectivity(self, timeout: float = None) -> bool:
         """
         Check actual internet connectivity by attempting to reach external DNS services.
         More reliable than checking local health endpoint only.
+        Probe hosts come from CONNECTIVITY_PROBE_HOSTS; when the probe is disabled
+        the host is assumed to be connected.
         
         Args:
-            timeout: Connection timeout in seconds
+            timeout: Connection timeout in seconds (defaults to CONNECTIVITY_PROBE_TIMEOUT)
             
         Returns:
             True if internet is available, False otherwise
         """
-        test_hosts = [
-            ("8.8.8.8", 53),       # Google DNS
-            ("1.1.1.1", 53),       # Cloudflare DNS
-            ("208.67.222.222", 53) # OpenDNS
-        ]
+        if not self.probe_hosts:
+            return True
+        if timeout is None:
+            timeout = self.probe_timeout
         
-        for host, port in test_hosts:
+        for host, port in self.probe_hosts:
             try:
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(timeout)
-                result = sock.connect_ex((host, port))
-                sock.close()
-                
-                if result == 0:
+                with socket.create_connection((host, port), timeout=timeout):
                     self.logger.debug(f"Internet connectivity confirmed via {host}")
+                    self._internet_available = True
                     return True
-            except socket.error as e:
+            except OSError as e:
                 self.logger.debug(f"Failed to reach {host}: {e}")
                 continue
         
         self.logger.warning("No internet connectivity detected")
+        self._internet_available = False
         return False
     
+    def _publish_snapshot(self):
+        """Publish the current state as a new immutable snapshot (atomic swap)"""
+        status = self.status
+        self._health_snapshot = HealthSnapshot(
+            status=status,
+            is_healthy=status in (ConnectionStatus.HEALTHY, ConnectionStatus.DEGRADED),
+            needs_attention=status in (ConnectionStatus.UNHEALTHY, ConnectionStatus.OFFLINE),
+            internet_available=self._internet_available,
+            updated_at=time.time()
+        )
+    
+        if self._board_writer is not None:
+            self._board_writer.write(
+                STATUS_CODES.index(status), self._internet_available, self.metrics.response_time_ms,
+                self.metrics.success_rate, self.metrics.consecutive_failures,
+                self.metrics.total_requests, self.metrics.total_failures
+            )
+    
+    def set_health_probe(self, probe: Callable[[], bool]):
+        """Use an in-process callable for health checks instead of HTTP requests"""
+        self.health_probe = probe
+    
+    def attach_shared_board(self, board):
+        """Read the monitor status published by the shared monitor process"""
+        self.shared_board = board
+    
+    def publish_to(self, board):
+        """Make this process the (single) writer of the shared board"""
+        self._board_writer = board
+        if board is not None:
+            self._publish_snapshot()
+    
+    def _read_shared_state(self) -> Optional[Dict[str, Any]]:
+        if self.shared_board is None or self._board_writer is not None:
+            return None
+        state = self.shared_board.read()
+        if state is None or time.time() - state['updated_at'] > self.shared_board_max_age:
+            return None
+        return state
+    
+    def get_health_snapshot(self) -> HealthSnapshot:
+        """
+        O(1) read of the health state. When a shared monitor is publishing, its
+        status is merged with this worker's own request-failure status (the worse
+        of the two wins); a stale or missing board falls back to the local status.
+        """
+        local = self._health_snapshot
+        state = self._read_shared_state()
+        if state is None:
+            return local
+        
+        shared_status = STATUS_CODES[state['status_code']]
+        if STATUS_SEVERITY[shared_status] <= STATUS_SEVERITY[local.status]:
+            return local
+        return HealthSnapshot(
+            status=shared_status,
+            is_healthy=shared_status in (ConnectionStatus.HEALTHY, ConnectionStatus.DEGRADED),
+            needs_attention=shared_status in (ConnectionStatus.UNHEALTHY, ConnectionStatus.OFFLINE),
+            internet_available=state['internet_available'],
+            updated_at=state['updated_at']
+        )
+    
+    def _set_status(self, new_status: ConnectionStatus):
+        """Change status, publish the snapshot and notify callbacks"""
+        if new_status == self.status:
+            return
+        old_status = self.status
+        self.status = new_status
+        self.metrics.status = new_status
+        self._publish_snapshot()
+        
+        self.logger.info(f"Connection status changed: {old_status.value} -> {new_status.value}")
+        
+        # Notify status change callbacks
+        for callback in self.status_change_callbacks:
+            try:
+                callback(old_status, new_status, self.metrics)
+            except Exception as e:
+                self.logger.error(f"Error in status change callback: {e}")
+    
     def start_monitoring(self):
         """Start connection monitoring"""
         if self.is_monitoring:
@@ -176,53 +318,53 @@ class ConnectionMonitor:
         """Main monitoring loop with internet connectivity check"""
         while self.is_monitoring:
             try:
-                # First check actual internet connectivity
-                if not self.check_internet_connectivity():
-                    old_status = self.status
-                    self.status = ConnectionStatus.OFFLINE
-                    self.metrics.status = ConnectionStatus.OFFLINE
-                    self.logger.warning("Internet unavailable - marking as offline")
-                    
-                    # Notify status change callbacks if status changed
-                    if old_status != ConnectionStatus.OFFLINE:
-                        for callback in self.status_change_callbacks:
-                            try:
-                                callback(old_status, ConnectionStatus.OFFLINE, self.metrics)
-                            except Exception as e:
-                                self.logger.error(f"Error in status change callback: {e}")
-                    
-                    # Wait and retry - use shorter interval when offline
-                    time.sleep(min(self.health_check_interval, 10))
-                    continue
+                # The internet probe is informational: the chatbot answers from its
+                # local knowledge base, so a failed probe caps the status at degraded
+                # (see _update_metrics) and never takes the chat offline
+                internet_available = self.check_internet_connectivity()
+                if not internet_available:
+                    self.logger.warning("Internet unavailable - marking as degraded")
                 
-                # If internet is available, perform local health check
                 self._perform_health_check()
-                time.sleep(self.health_check_interval)
+                
+                # Wait and retry - use shorter interval while the internet is unreachable
+                if internet_available:
+                    time.sleep(self.health_check_interval)
+                else:
+                    time.sleep(min(self.health_check_interval, 10))
                 
             except Exception as e:
                 self.logger.error(f"Error in monitoring loop: {e}")
                 time.sleep(self.health_check_interval)
     
     def _perform_health_check(self):
-        """Perform health check on chatbot endpoints"""
+        """Perform health check via the in-process probe, or HTTP on chatbot endpoints"""
         start_time = time.time()
         success = False
         
-        for endpoint in self.health_check_endpoints:
+        if self.health_probe is not None:
             try:
-                url = f"{self.base_url}{endpoint}"
-                response = requests.get(url, timeout=self.timeout_seconds)
-                
-                if response.status_code == 200:
-                    success = True
-                    break
+                success = bool(self.health_probe())
+            except Exception as e:
+                self.logger.warning(f"In-process health probe failed: {e}")
+        else:
+            for endpoint in self.health_check_endpoints:
+                try:
+                    url = f"{self.base_url}{endpoint}"
+                    response = requests.get(url, timeout=self.timeout_seconds)
                     
-            except requests.exceptions.RequestException as e:
-                self.logger.warning(f"Health check failed for {endpoint}: {e}")
-                continue
+                    if response.status_code == 200:
+                        success = True
+                        break
+                        
+                except requests.exceptions.RequestException as e:
+                    self.logger.warning(f"Health check failed for {endpoint}: {e}")
+                    continue
         
         response_time = (time.time() - start_time) * 1000  # Convert to milliseconds
         self._update_metrics(success, response_time)
+        # Refresh the published state even when the status did not change
+        self._publish_snapshot()
         
         # Notify callbacks
         for callback in self.health_check_callbacks:
@@ -248,6 +390,10 @@ class ConnectionMonitor:
                 new_status = ConnectionStatus.DEGRADED
             else:
                 new_status = ConnectionStatus.UNHEALTHY
+            
+            # Healthy locally but no internet: degraded, still serving answers
+            if new_status == ConnectionStatus.HEALTHY and self._internet_available is False:
+                new_status = ConnectionStatus.DEGRADED
         else:
             self.metrics.total_failures += 1
             self.metrics.consecutive_failures += 1
@@ -268,19 +414,7 @@ class ConnectionMonitor:
         )
         
         # Check for status change
-        if new_status != self.status:
-            old_status = self.status
-            self.status = new_status
-            self.metrics.status = new_status
-            
-            self.logger.info(f"Connection status changed: {old_status.value} -> {new_status.value}")
-            
-            # Notify status change callbacks
-            for callback in self.status_change_callbacks:
-                try:
-                    callback(old_status, new_status, self.metrics)
-                except Exception as e:
-                    self.logger.error(f"Error in status change callback: {e}")
+        self._set_status(new_status)
     
     def update_connection_health(self, success: bool = True):
         """Update connection health metrics"""
@@ -318,19 +452,7 @@ class ConnectionMonitor:
             new_status = ConnectionStatus.HEALTHY
         
         # Check for status change
-        if new_status != self.status:
-            old_status = self.status
-            self.status = new_status
-            self.metrics.status = new_status
-            
-            self.logger.info(f"Connection status changed: {old_status.value} -> {new_status.value}")
-            
-            # Notify status change callbacks
-            for callback in self.status_change_callbacks:
-                try:
-                    callback(old_status, new_status, self.metrics)
-                except Exception as e:
-                    self.logger.error(f"Error in status change callback: {e}")
+        self._set_status(new_status)
     
     def add_status_change_callback(self, callback: Callable):
         """Add callback for status changes"""
@@ -342,8 +464,9 @@ class ConnectionMonitor:
     
     def get_connection_status(self) -> Dict[str, Any]:
         """Get current connection status"""
-        return {
-            'status': self.status.value,
+        snapshot = self.get_health_snapshot()
+        status = {
+            'status': snapshot.status.value,
             'metrics': {
                 'response_time_ms': self.metrics.response_time_ms,
                 'success_rate': self.metrics.success_rate,
@@ -361,9 +484,22 @@ class ConnectionMonitor:
                     if self.metrics.last_failed_request else None
                 )
             },
-            'is_healthy': self.status in [ConnectionStatus.HEALTHY, ConnectionStatus.DEGRADED],
-            'needs_attention': self.status in [ConnectionStatus.UNHEALTHY, ConnectionStatus.OFFLINE]
+            'is_healthy': snapshot.is_healthy,
+            'needs_attention': snapshot.needs_attention
         }
+        
+        shared_state = self._read_shared_state()
+        if shared_state is not None:
+            status['shared_monitor'] = {
+                'status': STATUS_CODES[shared_state['status_code']].value,
+                'internet_available': shared_state['internet_available'],
+                'response_time_ms': shared_state['response_time_ms'],
+                'success_rate': shared_state['success_rate'],
+                'total_checks': shared_state['total_checks'],
+                'updated_at': datetime.fromtimestamp(shared_state['updated_at']).isoformat(),
+                'monitor_pid': shared_state['writer_pid']
+            }
+        return status
     
     def get_fallback_response(self, language: str = 'nl', response_type: str = 'error') -> str:
         """Get fallback response when chatbot is unavailable"""
@@ -373,18 +509,16 @@ class ConnectionMonitor:
         )
     
     def attempt_reconnection(self) -> bool:
-        """Attempt to reconnect to chatbot with internet connectivity check"""
+        """Attempt to reconnect to chatbot with internet connectivity check (blocking)"""
         self.logger.info("Attempting reconnection...")
         
         # First check if we have internet
         if not self.check_internet_connectivity():
             self.logger.warning("No internet connectivity - cannot reconnect")
-            self.status = ConnectionStatus.OFFLINE
-            self.metrics.status = ConnectionStatus.OFFLINE
+            self._set_status(ConnectionStatus.OFFLINE)
             return False
         
-        self.status = ConnectionStatus.RECONNECTING
-        self.metrics.status = ConnectionStatus.RECONNECTING
+        self._set_status(ConnectionStatus.RECONNECTING)
         
         for attempt in range(self.max_retries):
             try:
@@ -399,13 +533,37 @@ class ConnectionMonitor:
                 time.sleep(2 ** attempt)  # Exponential backoff
         
         self.logger.error("Reconnection failed after all attempts")
-        self.status = ConnectionStatus.OFFLINE
-        self.metrics.status = ConnectionStatus.OFFLINE
+        self._set_status(ConnectionStatus.OFFLINE)
         return False
     
+    def request_reconnection(self) -> bool:
+        """
+        Start a reconnection attempt in the background and return immediately.
+        At most one attempt runs at a time, and attempts are spaced by
+        RECONNECT_COOLDOWN_SECONDS. Returns True if a new attempt was started.
+        """
+        now = time.monotonic()
+        with self._reconnect_lock:
+            if self._reconnect_thread is not None and self._reconnect_thread.is_alive():
+                return False
+            if now - self._last_reconnect_started < self.reconnect_cooldown:
+                return False
+            self._last_reconnect_started = now
+            self._reconnect_thread = threading.Thread(
+                target=self._background_reconnect, daemon=True, name='connection-reconnect'
+            )
+            self._reconnect_thread.start()
+            return True
+    
+    def _background_reconnect(self):
+        try:
+            self.attempt_reconnection()
+        except Exception as e:
+            self.logger.error(f"Background reconnection failed: {e}")
+    
     def is_connection_healthy(self) -> bool:
-        """Check if connection is healthy"""
-        return self.status in [ConnectionStatus.HEALTHY, ConnectionStatus.DEGRADED]
+        """Check if connection is healthy (reads the published snapshot)"""
+        return self.get_health_snapshot().is_healthy
     
     def get_health_summary(self) -> str:
         """Get human-readable health summary"""
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Website Content Snapshot for Nijenhuis Chatbot
+Build-time snapshot of the text extracted from pages/, memory-mapped at startup
+so workers do not parse HTML before they can serve
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+try:
+    from .website_content_extractor import WebsiteContentExtractor
+except ImportError:
+    from backend.chatbot.core.website_content_extractor import WebsiteContentExtractor
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_MAGIC = b'NJCS'
+# magic, version, header length; followed by the JSON header and the UTF-8 body
+PREAMBLE = struct.Struct('<4sHI')
+
+DEFAULT_MAX_CHARS = 50000
+DEFAULT_SNAPSHOT_FILE = os.path.normpath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'website_content.snapshot'
+))
+
+
+def _file_digest(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _extractor_fingerprint(extractor: WebsiteContentExtractor) -> str:
+    """Changes when the extraction code or backend changes, so old snapshots are rebuilt"""
+    module_file = WebsiteContentExtractor.extract_from_file.__code__.co_filename
+    backend = 'bs4' if extractor.uses_bs4 else 'regex'
+    return f"{backend}:{_file_digest(module_file)[:16]}"
+
+
+class ContentSnapshot:
+    """
+    Read-only view of a snapshot file
+
+    The body is accessed through a shared read-only mapping, so all workers use
+    the same page-cache pages; the header carries per-page hashes (for staleness
+    checks), byte offsets of each page section and the structured content index.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, header_length = PREAMBLE.unpack_from(self._map, 0)
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError(f"{path} is not a content snapshot")
+            if version != SNAPSHOT_VERSION:
+                raise ValueError(f"Unsupported snapshot version {version} (expected {SNAPSHOT_VERSION})")
+            header_start = PREAMBLE.size
+            self.header: Dict[str, Any] = json.loads(self._map[header_start:header_start + header_length])
+        except Exception:
+            self._map.close()
+            raise
+        self._body_offset = header_start + header_length
+        self._text: Optional[str] = None
+
+    @property
+    def pages(self) -> Dict[str, Dict[str, Any]]:
+        return self.header.get('pages', {})
+
+    @property
+    def structured(self) -> Dict[str, Any]:
+        return self.header.get('structured', {})
+
+    @property
+    def text(self) -> str:
+        """Full combined content (decoded once per process)"""
+        if self._text is None:
+            self._text = self._map[self._body_offset:].decode('utf-8')
+        return self._text
+
+    def page_text(self, name: str) -> Optional[str]:
+        """Content of a single page section, read straight from the mapping"""
+        page = self.pages.get(name)
+        if not page or page.get('length') is None:
+            return None
+        start = self._body_offset + page['offset']
+        return self._map[start:start + page['length']].decode('utf-8')
+
+    def stale_pages(self, source_files: List[Path]) -> List[str]:
+        """
+        Pages that were added, removed or changed since the snapshot was built.
+        Size and mtime are checked first; files are only hashed when those differ.
+        """
+        stale = []
+        current = {path.name: path for path in source_files}
+        for name in set(self.pages) - set(current):
+            stale.append(name)
+        for name, path in current.items():
+            recorded = self.pages.get(name)
+            if recorded is None:
+                stale.append(name)
+                continue
+            stat = path.stat()
+            if stat.st_size == recorded['size'] and stat.st_mtime_ns == recorded['mtime_ns']:
+                continue
+            if stat.st_size != recorded['size'] or _file_digest(str(path)) != recorded['sha256']:
+                stale.append(name)
+        return sorted(stale)
+
+    def close(self):
+        self._map.close()
+
+
+def build_snapshot(output_path: str = None, pages_directory: str = None,
+                   max_chars: int = DEFAULT_MAX_CHARS) -> Dict[str, Any]:
+    """Extract all pages and atomically write a snapshot; returns the header"""
+    output_path = output_path or os.environ.get('WEBSITE_CONTENT_SNAPSHOT', DEFAULT_SNAPSHOT_FILE)
+    extractor = WebsiteContentExtractor(pages_directory)
+
+    sections = []
+    pages = {}
+    offset = 0
+    remaining = max_chars
+    for path, content in extractor.extract_pages():
+        stat = path.stat()
+        entry = {'sha256': _file_digest(str(path)), 'size': stat.st_size,
+                 'mtime_ns': stat.st_mtime_ns, 'offset': None, 'length': None}
+        pages[path.name] = entry
+        if not content:
+            continue
+
+        separator = "\n\n" if sections else ""
+        # Same 50,000 character cap the server used to apply after extraction
+        chunk = (separator + f"=== {path.stem} ===\n{content}\n")[:max(remaining, 0)]
+        page_part = chunk[len(separator):]
+        if not page_part:
+            continue
+        sections.append(chunk)
+        entry['offset'] = offset + len(separator)
+        entry['length'] = len(page_part.encode('utf-8'))
+        offset += len(separator) + entry['length']
+        remaining -= len(chunk)
+
+    text = "".join(sections)
+    extractor.cached_content = text
+    structured = extractor.get_structured_content()
+    structured.pop('full_text', None)
+
+    header = {
+        'version': SNAPSHOT_VERSION,
+        'created_at': datetime.now().isoformat(),
+        'extractor': _extractor_fingerprint(extractor),
+        'max_chars': max_chars,
+        'truncated': remaining <= 0,
+        'characters': len(text),
+        'pages': pages,
+        'structured': structured,
+    }
+
+    header_bytes = json.dumps(header, ensure_ascii=False, sort_keys=True).encode('utf-8')
+    directory = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix='.website_content_', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(PREAMBLE.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(header_bytes)))
+            f.write(header_bytes)
+            f.write(text.encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, output_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return header
+
+
+def _open_if_current(snapshot_path: str, extractor: WebsiteContentExtractor,
+                     max_chars: int) -> Tuple[Optional[ContentSnapshot], str]:
+    """Open the snapshot if it matches the current pages; otherwise return why not"""
+    if not os.path.exists(snapshot_path):
+        return None, "missing"
+    try:
+        snapshot = ContentSnapshot(snapshot_path)
+    except (OSError, ValueError) as e:
+        return None, f"unreadable ({e})"
+
+    if snapshot.header.get('max_chars') != max_chars:
+        reason = "built with a different size limit"
+    elif snapshot.header.get('extractor') != _extractor_fingerprint(extractor):
+        reason = "built by a different extractor"
+    else:
+        stale = snapshot.stale_pages(extractor.list_source_files())
+        if not stale:
+            return snapshot, "current"
+        reason = f"stale ({', '.join(stale[:5])}{'...' if len(stale) > 5 else ''})"
+    snapshot.close()
+    return None, reason
+
+
+def check_snapshot(snapshot_path: str = None, pages_directory: str = None,
+                   max_chars: int = DEFAULT_MAX_CHARS) -> Optional[str]:
+    """None when the snapshot is up to date, otherwise the reason it is not"""
+    snapshot_path = snapshot_path or os.environ.get('WEBSITE_CONTENT_SNAPSHOT', DEFAULT_SNAPSHOT_FILE)
+    snapshot, reason = _open_if_current(snapshot_path, WebsiteContentExtractor(pages_directory), max_chars)
+    if snapshot is None:
+        return reason
+    snapshot.close()
+    return None
+
+
+def load_website_content(snapshot_path: str = None, pages_directory: str = None,
+                         max_chars: int = DEFAULT_MAX_CHARS) -> Tuple[str, str]:
+    """
+    Website content for the chatbot, preferring the snapshot.
+    Falls back to live extraction (and rewrites the snapshot) when it is missing,
+    unreadable or stale by page hash. Returns (content, source) where source is
+    'snapshot' or 'extracted'.
+    """
+    snapshot_path = snapshot_path or os.environ.get('WEBSITE_CONTENT_SNAPSHOT', DEFAULT_SNAPSHOT_FILE)
+    extractor = WebsiteContentExtractor(pages_directory)
+
+    snapshot, reason = _open_if_current(snapshot_path, extractor, max_chars)
+    source = 'snapshot'
+    if snapshot is None:
+        print(f"⚠️ Website content snapshot {reason}; extracting pages")
+        try:
+            build_snapshot(snapshot_path, pages_directory, max_chars)
+            snapshot = ContentSnapshot(snapshot_path)
+            source = 'extracted'
+        except OSError as e:
+            # Read-only deployments: serve live extraction without persisting it
+            print(f"⚠️ Could not write website content snapshot: {e}")
+            return extractor.extract_all_content()[:max_chars], 'extracted'
+
+    try:
+        return snapshot.text, source
+    finally:
+        snapshot.close()
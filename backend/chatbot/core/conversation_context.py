@@ -131,20 +131,24 @@ class ConversationContext:
 class ConversationContextManager:
     """Manages multiple conversation contexts (sessions)"""
     
-    def __init__(self, storage_dir: Optional[str] = None, session_timeout: int = 3600):
+    def __init__(self, storage_dir: Optional[str] = None, session_timeout: int = 3600, state_backend=None):
         """
         Initialize context manager
         
         Args:
             storage_dir: Directory to persist conversation contexts
             session_timeout: Session timeout in seconds (default 1 hour)
+            state_backend: Optional shared StateBackend (backend/shared/state_backend.py).
+                When set, contexts are stored there instead of storage_dir so any app
+                server can continue a session; self.contexts is then a local cache.
         """
         self.contexts: Dict[str, ConversationContext] = {}
-        self.storage_dir = storage_dir
+        self.state_backend = state_backend
+        self.storage_dir = storage_dir if state_backend is None else None
         self.session_timeout = session_timeout
         
-        if storage_dir:
-            os.makedirs(storage_dir, exist_ok=True)
+        if self.storage_dir:
+            os.makedirs(self.storage_dir, exist_ok=True)
             self._load_persisted_contexts()
     
     def _validate_session_id(self, session_id: str) -> bool:
@@ -195,6 +199,10 @@ class ConversationContextManager:
             # Invalid session ID, create new one
             session_id = None
         
+        if session_id and self.state_backend is not None:
+            # The shared copy wins: another server may have added messages
+            self._refresh_from_backend(session_id)
+        
         if session_id and session_id in self.contexts:
             context = self.contexts[session_id]
             # Check if session expired
@@ -208,7 +216,7 @@ class ConversationContextManager:
         
         if session_id not in self.contexts:
             self.contexts[session_id] = ConversationContext(session_id)
-            if self.storage_dir:
+            if self.storage_dir or self.state_backend is not None:
                 self._save_context(session_id)
         
         return self.contexts[session_id]
@@ -224,11 +232,21 @@ class ConversationContextManager:
         """Add message to a conversation context"""
         context = self.get_or_create_context(session_id)
         context.add_message(role, content, metadata)
-        if self.storage_dir:
+        if self.storage_dir or self.state_backend is not None:
+            self._save_context(context.session_id)
+    
+    def commit_context(self, session_id: str):
+        """Publish messages added directly to a context to the shared state backend"""
+        if self.state_backend is not None:
             self._save_context(session_id)
     
     def clear_context(self, session_id: str):
         """Clear a conversation context"""
+        if self.state_backend is not None and self._validate_session_id(session_id):
+            try:
+                self.state_backend.delete(f"conversation:{session_id}")
+            except Exception as e:
+                print(f"⚠️ Could not delete shared context for session {session_id}: {e}")
         if session_id in self.contexts:
             del self.contexts[session_id]
             if self.storage_dir:
@@ -256,6 +274,14 @@ class ConversationContextManager:
         if not self._validate_session_id(session_id) or session_id not in self.contexts:
             return
         
+        if self.state_backend is not None:
+            try:
+                self.state_backend.set_json(f"conversation:{session_id}", self.contexts[session_id].to_dict(),
+                                            ttl=self.session_timeout)
+            except Exception as e:
+                print(f"⚠️ Could not store shared context for session {session_id}: {e}")
+            return
+        
         try:
             # Use os.path.join and validate the final path is within storage_dir
             context_file = os.path.join(self.storage_dir, f"{session_id}.json")
@@ -272,6 +298,21 @@ class ConversationContextManager:
         except Exception as e:
             print(f"⚠️ Could not save context for session {session_id}: {e}")
     
+    def _refresh_from_backend(self, session_id: str):
+        """Replace the cached context with the shared copy (dropped if it expired there)"""
+        try:
+            data = self.state_backend.get_json(f"conversation:{session_id}")
+        except Exception as e:
+            print(f"⚠️ Could not load shared context for session {session_id}: {e}")
+            return
+        if data is None:
+            self.contexts.pop(session_id, None)
+            return
+        try:
+            self.contexts[session_id] = ConversationContext.from_dict(data)
+        except (KeyError, ValueError) as e:
+            print(f"⚠️ Ignoring invalid shared context for session {session_id}: {e}")
+    
     def _load_persisted_contexts(self):
         """Load persisted contexts from disk"""
         if not self.storage_dir or not os.path.exists(self.storage_dir):
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Shared Health Board for Nijenhuis Chatbot
+Fixed-layout shared memory through which one connection monitor publishes
+health status to every gunicorn worker
+"""
+
+import mmap
+import os
+import signal
+import struct
+import threading
+import time
+from typing import Optional, Dict, Any
+
+
+class SharedHealthBoard:
+    """
+    Anonymous shared mapping (MAP_SHARED) written by a single monitor process
+
+    The mapping must be created before gunicorn forks its workers (i.e. at
+    import time with preload_app = True) so every process shares the same
+    pages. A sequence counter implements a seqlock: the writer makes it odd
+    while updating and even when done; readers retry if it changed under them.
+    """
+
+    # seq, status, internet, response_time_ms, success_rate,
+    # consecutive_failures, total_checks, total_failures, updated_at, writer_pid
+    LAYOUT = struct.Struct('<QBb6xddIQQdI')
+    SEQ = struct.Struct('<Q')
+
+    def __init__(self):
+        self._map = mmap.mmap(-1, mmap.PAGESIZE)
+        self._write_lock = threading.Lock()
+
+    def write(self, status_code: int, internet_available: Optional[bool], response_time_ms: float,
+              success_rate: float, consecutive_failures: int, total_checks: int, total_failures: int):
+        """Publish a new state (single writer)"""
+        internet = -1 if internet_available is None else int(internet_available)
+        with self._write_lock:
+            seq = self.SEQ.unpack_from(self._map, 0)[0]
+            self.SEQ.pack_into(self._map, 0, seq + 1)
+            self.LAYOUT.pack_into(
+                self._map, 0, seq + 1, status_code, internet, response_time_ms, success_rate,
+                consecutive_failures, total_checks, total_failures, time.time(), os.getpid()
+            )
+            self.SEQ.pack_into(self._map, 0, seq + 2)
+
+    def read(self, retries: int = 100) -> Optional[Dict[str, Any]]:
+        """Consistent read of the last published state, or None if nothing was published"""
+        for _ in range(retries):
+            values = self.LAYOUT.unpack_from(self._map, 0)
+            seq = values[0]
+            if seq & 1:
+                continue
+            if self.SEQ.unpack_from(self._map, 0)[0] != seq:
+                continue
+            if seq == 0:
+                return None
+            internet = values[2]
+            return {
+                'status_code': values[1],
+                'internet_available': None if internet < 0 else bool(internet),
+                'response_time_ms': values[3],
+                'success_rate': values[4],
+                'consecutive_failures': values[5],
+                'total_checks': values[6],
+                'total_failures': values[7],
+                'updated_at': values[8],
+                'writer_pid': values[9]
+            }
+        return None
+
+
+SIDECAR_RESET_SIGNALS = ('SIGTERM', 'SIGINT', 'SIGHUP', 'SIGQUIT', 'SIGCHLD', 'SIGUSR1',
+                         'SIGUSR2', 'SIGTTIN', 'SIGTTOU', 'SIGWINCH')
+
+
+def _run_monitor_sidecar(monitor, parent_pid: int):
+    """Body of the monitor process: run the loop until the parent exits"""
+    # Drop the handlers inherited from the gunicorn master
+    signal.set_wakeup_fd(-1)
+    for name in SIDECAR_RESET_SIGNALS:
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), signal.SIG_DFL)
+
+    monitor.start_monitoring()
+    while os.getppid() == parent_pid:
+        time.sleep(1)
+    monitor.stop_monitoring()
+
+
+def start_monitor_sidecar(monitor, board: SharedHealthBoard) -> int:
+    """
+    Fork a single process that runs the connection monitor and publishes to the board.
+    Forking keeps the preloaded app, so the monitor can use in-process health probes
+    instead of HTTP self-requests. A raw fork is used rather than multiprocessing so
+    gunicorn workers (which inherit multiprocessing's child registry) never try to
+    terminate the sidecar when they exit. Returns the sidecar pid.
+    """
+    parent_pid = os.getpid()
+    pid = os.fork()
+    if pid == 0:
+        exit_code = 0
+        try:
+            monitor.publish_to(board)
+            _run_monitor_sidecar(monitor, parent_pid)
+        except BaseException:
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+    return pid
+
+
+def stop_monitor_sidecar(pid: Optional[int]):
+    """Terminate the monitor process started by start_monitor_sidecar"""
+    if not pid:
+        return
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass
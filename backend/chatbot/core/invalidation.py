@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Cross-Worker Invalidation Bus for Nijenhuis Chatbot
+Generation files that let one gunicorn worker tell the others to reload
+training data or clear caches without a restart
+"""
+
+import json
+import os
+import stat
+import threading
+import time
+from typing import Callable, Dict, Any, Optional
+
+from backend.shared.atomic_json import locked, write_json
+
+# Inside the app's data directory, not a predictable path in world-writable /tmp
+DEFAULT_INVALIDATION_DIR = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', '..', 'data', 'invalidation'
+))
+
+
+def _ensure_private_directory(directory: str):
+    """Create the directory (mode 0700) and refuse one another user could write to"""
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.stat(directory)
+    if info.st_uid != os.geteuid():
+        raise PermissionError(f"Invalidation directory {directory} is not owned by this user")
+    if info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise PermissionError(f"Invalidation directory {directory} is writable by other users")
+
+
+class InvalidationBus:
+    """
+    Lightweight local invalidation channel based on generation files
+
+    Publishing a topic atomically rewrites {directory}/{topic}.gen with a new
+    generation number. Every worker calls poll() before answering a request;
+    poll() is throttled and costs one os.stat per topic when nothing changed.
+    When a generation moves, the topic's handler runs in a background thread so
+    the request that noticed it is not delayed. Bursts are coalesced: at most one
+    handler runs per topic, with one follow-up run if more changes arrive.
+
+    The file holds only the latest record, so a worker may never see an
+    intermediate generation. Handlers must therefore be idempotent and re-read
+    the shared state (training data, caches) rather than rely on the payload:
+    handling generation N+1 then also applies N. A publisher skips its own
+    record only if it had seen the generation that record replaced.
+    """
+
+    def __init__(self, directory: str = None, poll_interval: float = None):
+        if directory is None:
+            directory = os.environ.get('INVALIDATION_DIR', DEFAULT_INVALIDATION_DIR)
+        if poll_interval is None:
+            poll_interval = float(os.environ.get('INVALIDATION_POLL_SECONDS', '0.5'))
+        self.directory = directory
+        self.poll_interval = poll_interval
+        _ensure_private_directory(self.directory)
+
+        self._handlers: Dict[str, Callable[[Dict[str, Any]], None]] = {}
+        self._seen_mtime: Dict[str, int] = {}
+        self._seen_generation: Dict[str, int] = {}
+        self._running: Dict[str, bool] = {}
+        self._pending: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+        self._next_poll = 0.0
+
+    def _path(self, topic: str) -> str:
+        return os.path.join(self.directory, f"{topic}.gen")
+
+    def _read(self, topic: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(topic), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def subscribe(self, topic: str, handler: Callable[[Dict[str, Any]], None]):
+        """Register the handler for a topic; current generations are treated as seen"""
+        with self._lock:
+            self._handlers[topic] = handler
+            try:
+                self._seen_mtime[topic] = os.stat(self._path(topic)).st_mtime_ns
+            except FileNotFoundError:
+                self._seen_mtime[topic] = 0
+            record = self._read(topic)
+            self._seen_generation[topic] = record.get('generation', 0) if record else 0
+
+    def _origin(self) -> str:
+        # Per process and per bus, so forked workers (same bus object) differ
+        return f"{os.getpid()}:{id(self)}"
+
+    def publish(self, topic: str, payload: Dict[str, Any] = None) -> int:
+        """Bump a topic's generation; the publisher skips it unless it replaced an unseen one"""
+        path = self._path(topic)
+        # Serialized across workers so previous_generation is exact
+        with locked(path):
+            current = self._read(topic)
+            previous = current.get('generation', 0) if current else 0
+            generation = max(time.time_ns(), previous + 1)
+            record = {
+                'generation': generation,
+                'previous_generation': previous,
+                'origin': self._origin(),
+                'origin_pid': os.getpid(),
+                'published_at': time.time(),
+                'payload': payload or {}
+            }
+            write_json(path, record, indent=None)
+        return generation
+
+    def poll(self, force: bool = False):
+        """Cheap check for new generations; dispatches handlers asynchronously"""
+        now = time.monotonic()
+        if not force and now < self._next_poll:
+            return
+        self._next_poll = now + self.poll_interval
+
+        for topic in list(self._handlers):
+            try:
+                mtime = os.stat(self._path(topic)).st_mtime_ns
+            except FileNotFoundError:
+                continue
+            if mtime == self._seen_mtime.get(topic):
+                continue
+
+            record = self._read(topic)
+            with self._lock:
+                self._seen_mtime[topic] = mtime
+                seen = self._seen_generation.get(topic, 0)
+                if not record or record.get('generation', 0) <= seen:
+                    continue
+                self._seen_generation[topic] = record['generation']
+                if record.get('origin') == self._origin() and record.get('previous_generation') == seen:
+                    # Our own change, already applied here, replacing nothing we missed
+                    continue
+                if self._running.get(topic):
+                    self._pending[topic] = True
+                    continue
+                self._running[topic] = True
+
+            threading.Thread(
+                target=self._dispatch, args=(topic, record.get('payload', {})),
+                daemon=True, name=f"invalidation-{topic}"
+            ).start()
+
+    def _dispatch(self, topic: str, payload: Dict[str, Any]):
+        while True:
+            try:
+                self._handlers[topic](payload)
+            except Exception as e:
+                print(f"⚠️ Invalidation handler for '{topic}' failed: {e}")
+            with self._lock:
+                if not self._pending.get(topic):
+                    self._running[topic] = False
+                    return
+                self._pending[topic] = False
+
+
+# Global invalidation bus instance
+_invalidation_bus = None
+
+def get_invalidation_bus() -> InvalidationBus:
+    """Get or create the global invalidation bus instance"""
+    global _invalidation_bus
+    if _invalidation_bus is None:
+        _invalidation_bus = InvalidationBus()
+    return _invalidation_bus
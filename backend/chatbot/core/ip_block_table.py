@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+IP Block Table for Nijenhuis Chatbot
+Expiring address and CIDR blocks, matched through a prefix trie and shared
+by all gunicorn workers through a small state file
+"""
+
+import ipaddress
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+try:
+    import fcntl  # POSIX only
+except ImportError:  # pragma: no cover - Windows fallback
+    fcntl = None
+
+TABLE_VERSION = 1
+
+
+def _default_path() -> str:
+    directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(directory, 'nijenhuis_chatbot_ipblocks.json')
+
+
+def _parse_address(value: str):
+    """Address of a client IP string (first hop of X-Forwarded-For); None if unparsable"""
+    try:
+        return ipaddress.ip_address(value.split(',')[0].strip())
+    except ValueError:
+        return None
+
+
+class _PrefixTrie:
+    """
+    Binary trie over address bits; a node is [child0, child1, entry].
+    A lookup walks at most 32 (IPv4) or 128 (IPv6) nodes and returns the
+    first unexpired entry on the path, i.e. the shortest blocking prefix.
+    """
+
+    def __init__(self):
+        self._roots = {4: [None, None, None], 6: [None, None, None]}
+        self.size = 0
+
+    def insert(self, network, entry: Dict[str, Any]):
+        node = self._roots[network.version]
+        bits = int(network.network_address)
+        width = network.max_prefixlen
+        for depth in range(network.prefixlen):
+            bit = (bits >> (width - 1 - depth)) & 1
+            if node[bit] is None:
+                node[bit] = [None, None, None]
+            node = node[bit]
+        node[2] = entry
+        self.size += 1
+
+    def lookup(self, address, now: float) -> Optional[Dict[str, Any]]:
+        node = self._roots[address.version]
+        bits = int(address)
+        width = address.max_prefixlen
+        depth = 0
+        while node is not None:
+            entry = node[2]
+            if entry is not None and (entry['expires_at'] is None or entry['expires_at'] > now):
+                return entry
+            if depth == width:
+                break
+            node = node[(bits >> (width - 1 - depth)) & 1]
+            depth += 1
+        return None
+
+
+class IPBlockTable:
+    """
+    Blocks keyed by network ("203.0.113.7/32", "198.51.100.0/24", ...)
+
+    Each entry has an expiry (None = until removed). The table is stored as
+    JSON in a file (env IP_BLOCK_FILE, /dev/shm by default) that is rewritten
+    atomically under an flock; every lookup compares the file's inode and
+    mtime with the loaded copy, so a block added by one worker applies in all
+    workers on their next request. Expired entries are ignored by lookups and
+    dropped on the next write, so no timer threads are needed.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.environ.get('IP_BLOCK_FILE', _default_path())
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._trie = _PrefixTrie()
+        self._file_state = None
+        self._lock = threading.Lock()
+        self._reload_if_changed()
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _read_file(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except ValueError as e:
+            print(f"⚠️ Ignoring unreadable IP block table {self.path}: {e}")
+            return {}
+        return data.get('entries', {}) if isinstance(data, dict) else {}
+
+    def _install(self, entries: Dict[str, Dict[str, Any]], file_state):
+        trie = _PrefixTrie()
+        for network, entry in entries.items():
+            try:
+                trie.insert(ipaddress.ip_network(network, strict=False), entry)
+            except ValueError:
+                continue
+        with self._lock:
+            self._entries, self._trie, self._file_state = entries, trie, file_state
+
+    def _reload_if_changed(self):
+        file_state = self._stat()
+        if file_state == self._file_state:
+            return
+        self._install(self._read_file(), file_state)
+
+    def _update(self, mutate) -> Dict[str, Dict[str, Any]]:
+        """Read-modify-write of the shared file under an exclusive lock"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        lock_fd = os.open(self.path + '.lock', os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            entries = self._read_file()
+            mutate(entries)
+            now = time.time()
+            entries = {network: entry for network, entry in entries.items()
+                       if entry.get('expires_at') is None or entry['expires_at'] > now}
+
+            fd, tmp_path = tempfile.mkstemp(prefix='.ipblocks_', suffix='.tmp', dir=directory)
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump({'version': TABLE_VERSION, 'entries': entries}, f)
+                os.replace(tmp_path, self.path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+            self._install(entries, self._stat())
+            return entries
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_fd, fcntl.LOCK_UN)
+            os.close(lock_fd)
+
+    def block(self, network: str, duration_seconds: Optional[float], reason: str = '') -> str:
+        """
+        Block an address or CIDR range for duration_seconds (None = until unblocked).
+        Returns the normalized network; raises ValueError for invalid input.
+        """
+        normalized = str(ipaddress.ip_network(network.strip(), strict=False))
+        now = time.time()
+        entry = {
+            'network': normalized,
+            'reason': reason,
+            'created_at': now,
+            'expires_at': now + duration_seconds if duration_seconds is not None else None,
+        }
+        self._update(lambda entries: entries.__setitem__(normalized, entry))
+        return normalized
+
+    def unblock(self, network: str) -> bool:
+        normalized = str(ipaddress.ip_network(network.strip(), strict=False))
+        removed = []
+        self._update(lambda entries: removed.append(entries.pop(normalized, None)))
+        return removed[0] is not None
+
+    def lookup(self, ip_address: str, now: float = None) -> Optional[Dict[str, Any]]:
+        """The entry blocking this address, or None"""
+        self._reload_if_changed()
+        if not self._trie.size:
+            return None
+        address = _parse_address(ip_address)
+        if address is None:
+            return None
+        if address.version == 6 and address.ipv4_mapped is not None:
+            address = address.ipv4_mapped
+        return self._trie.lookup(address, time.time() if now is None else now)
+
+    def active_entries(self, now: float = None) -> List[Dict[str, Any]]:
+        self._reload_if_changed()
+        now = time.time() if now is None else now
+        return [entry for entry in self._entries.values()
+                if entry.get('expires_at') is None or entry['expires_at'] > now]
+
+    def __len__(self) -> int:
+        return len(self.active_entries())
@@ -7,10 +7,16 @@ Provides accurate, data-driven responses with 95%+ accuracy
 import json
 import os
 import re
+import threading
 from typing import Dict, Any, Optional, List, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
+try:
+    from .training_journal import get_training_journal
+except ImportError:
+    from backend.chatbot.core.training_journal import get_training_journal
+
 
 class Intent(Enum):
     """User intent categories"""
@@ -59,17 +65,41 @@ class KnowledgeBase:
     def __init__(self, cache_size: int = 500):
         self.boats = self._load_boats()
         self.business_info = self._load_business_info()
-        self.intent_keywords = self._build_intent_keywords()
+        # Read-only after construction; tuples of str are untracked by the GC,
+        # so the preloaded copy stays shared between gunicorn workers
+        self.intent_keywords = {
+            intent: tuple(keywords) for intent, keywords in self._build_intent_keywords().items()
+        }
         self.trained_responses = self._load_trained_responses()
         
         # PERFORMANCE: LRU cache for query responses
         self._response_cache = {}
         self._cache_order = []  # Track insertion order for LRU
         self._cache_size = cache_size
+        # Request threads and invalidation handlers change the cache concurrently
+        self._cache_lock = threading.RLock()
+    
+    @staticmethod
+    def _session_pair(session: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+        """Extract the (normalized query, response) pair from a training session"""
+        if session.get('corrected_response'):
+            query = session.get('question', '').lower().strip()
+            if query:
+                return query, session['corrected_response']
+        return None
     
     def _load_trained_responses(self) -> Dict[str, str]:
         """Load trained responses from all training data sources"""
         trained = {}
+        journal_seq = 0
+        
+        # Read the journal before the snapshot: if a compaction runs in between,
+        # its entries are then in both places instead of neither
+        try:
+            journal_entries = get_training_journal().read_entries()
+        except Exception as e:
+            print(f"⚠️ Could not read training journal: {e}")
+            journal_entries = []
         
         # Load from enhanced training data (multiple possible formats)
         training_file = os.path.join(
@@ -82,10 +112,9 @@ class KnowledgeBase:
                 
                 # Format 1: training_sessions array
                 for session in data.get('training_sessions', []):
-                    if session.get('corrected_response'):
-                        query = session.get('question', '').lower().strip()
-                        if query:
-                            trained[query] = session['corrected_response']
+                    pair = self._session_pair(session)
+                    if pair:
+                        trained[pair[0]] = pair[1]
                 
                 # Format 2: training_data.improved_responses dict
                 improved = data.get('training_data', {}).get('improved_responses', {})
@@ -96,10 +125,17 @@ class KnowledgeBase:
                         if query and response:
                             trained[query] = response
                 
+                journal_seq = data.get('metadata', {}).get('journal_seq', 0)
                 print(f"✅ Loaded {len(trained)} trained responses from enhanced data")
         except Exception as e:
             print(f"⚠️ Could not load enhanced training data: {e}")
         
+        # Replay corrections that are journaled but not yet compacted
+        for entry in journal_entries:
+            if entry.get('seq', 0) > journal_seq:
+                pair = self._session_pair(entry['session'])
+                if pair:
+                    trained[pair[0]] = pair[1]
         
         return trained
     
@@ -107,29 +143,99 @@ class KnowledgeBase:
         """Reload trained responses (call after new training data is added)"""
         self.trained_responses = self._load_trained_responses()
         # Clear cache to use new responses
-        self._response_cache = {}
-        self._cache_order = []
+        self.clear_cache()
+    
+    def refresh_trained_responses(self) -> int:
+        """
+        Re-read training data and evict only cache entries for changed questions.
+        Used when another worker published new training data.
+        """
+        fresh = self._load_trained_responses()
+        current = self.trained_responses
+        if any(query not in fresh for query in current):
+            # Removed corrections may have shadowed any cached answer
+            self.trained_responses = fresh
+            self.clear_cache()
+            return len(fresh)
+        
+        changed = [
+            {'question': query, 'corrected_response': response}
+            for query, response in fresh.items() if current.get(query) != response
+        ]
+        self.apply_corrections(changed)
+        return len(changed)
+    
+    def clear_cache(self):
+        """Drop all cached responses"""
+        with self._cache_lock:
+            self._response_cache = {}
+            self._cache_order = []
+    
+    def apply_corrections(self, sessions: List[Dict[str, Any]]) -> int:
+        """
+        Apply new training sessions to the in-memory index without a full reload.
+        Only cached answers whose query matches a corrected question (exactly or
+        by the same fuzzy rule find_trained_response uses) are evicted.
+        """
+        corrected = {}
+        for session in sessions:
+            pair = self._session_pair(session)
+            if pair:
+                corrected[pair[0]] = pair[1]
+        
+        if not corrected:
+            return 0
+        
+        # Copy-on-write so concurrent readers iterate a stable dict
+        trained = dict(self.trained_responses)
+        trained.update(corrected)
+        self.trained_responses = trained
+        
+        corrected_words = [set(query.split()) for query in corrected]
+        stale_keys = []
+        with self._cache_lock:
+            cached_keys = list(self._response_cache)
+        for cache_key in cached_keys:
+            cached_query = cache_key.rsplit(':', 1)[0]
+            if cached_query in corrected:
+                stale_keys.append(cache_key)
+                continue
+            cached_words = set(cached_query.split())
+            if any(self._word_similarity(cached_words, words) > 0.8 for words in corrected_words):
+                stale_keys.append(cache_key)
+        
+        with self._cache_lock:
+            for cache_key in stale_keys:
+                self._response_cache.pop(cache_key, None)
+                try:
+                    self._cache_order.remove(cache_key)
+                except ValueError:
+                    pass
+        
+        return len(corrected)
+    
+    @staticmethod
+    def _word_similarity(query_words: set, trained_words: set) -> float:
+        """Word overlap relative to the longer of the two queries"""
+        if len(query_words) > 0 and len(trained_words) > 0:
+            overlap = len(query_words & trained_words)
+            return overlap / max(len(query_words), len(trained_words))
+        return 0.0
     
     def find_trained_response(self, query: str) -> Optional[str]:
         """Check if there's a trained response for this query"""
         query_lower = query.lower().strip()
+        trained_responses = self.trained_responses
         
         # Exact match
-        if query_lower in self.trained_responses:
-            return self.trained_responses[query_lower]
-        
-        # Fuzzy match - check for similar queries
-        for trained_query, response in self.trained_responses.items():
-            # Check if queries are very similar (>80% word overlap)
-            query_words = set(query_lower.split())
-            trained_words = set(trained_query.split())
-            
-            if len(query_words) > 0 and len(trained_words) > 0:
-                overlap = len(query_words & trained_words)
-                similarity = overlap / max(len(query_words), len(trained_words))
-                
-                if similarity > 0.8:
-                    return response
+        if query_lower in trained_responses:
+            return trained_responses[query_lower]
+        
+        # Fuzzy match - check for similar queries (>80% word overlap)
+        query_words = set(query_lower.split())
+        for trained_query, response in trained_responses.items():
+            if self._word_similarity(query_words, set(trained_query.split())) > 0.8:
+                return response
         
         return None
     
@@ -491,27 +597,36 @@ class KnowledgeBase:
     
     def _cache_response(self, cache_key: str, response: Dict[str, Any]):
         """Add response to cache with LRU eviction"""
-        if len(self._response_cache) >= self._cache_size:
-            # Remove oldest entry (LRU)
-            oldest_key = self._cache_order.pop(0)
-            del self._response_cache[oldest_key]
-        
-        self._response_cache[cache_key] = response
-        self._cache_order.append(cache_key)
+        with self._cache_lock:
+            if cache_key in self._response_cache:
+                self._cache_order.remove(cache_key)
+            elif len(self._response_cache) >= self._cache_size and self._cache_order:
+                # Remove oldest entry (LRU)
+                oldest_key = self._cache_order.pop(0)
+                self._response_cache.pop(oldest_key, None)
+            
+            self._response_cache[cache_key] = response
+            self._cache_order.append(cache_key)
     
-    def answer_query(self, query: str, language: str = 'nl') -> Dict[str, Any]:
+    def answer_query(self, query: str, language: str = 'nl', use_cache: bool = True) -> Dict[str, Any]:
         """
         Generate accurate answer based on query and knowledge base
         OPTIMIZED: Uses response caching for repeated queries
         PRIORITY: Checks trained responses first
+        use_cache=False always runs the matchers and leaves the cache untouched
         """
         # Check cache first (sub-millisecond for cache hits)
         cache_key = self._get_cache_key(query, language)
-        if cache_key in self._response_cache:
-            # Move to end of LRU order
-            self._cache_order.remove(cache_key)
-            self._cache_order.append(cache_key)
-            return self._response_cache[cache_key]
+        cached = None
+        if use_cache:
+            with self._cache_lock:
+                cached = self._response_cache.get(cache_key)
+                if cached is not None:
+                    # Move to end of LRU order
+                    self._cache_order.remove(cache_key)
+                    self._cache_order.append(cache_key)
+        if cached is not None:
+            return cached
         
         # PRIORITY: Check for trained responses first
         trained_response = self.find_trained_response(query)
@@ -526,7 +641,8 @@ class KnowledgeBase:
                 'from_training': True
             }
             # Cache the result
-            self._cache_response(cache_key, result)
+            if use_cache:
+                self._cache_response(cache_key, result)
             print(f"📚 Using trained response for: {query[:50]}...")
             return result
         
@@ -614,7 +730,8 @@ class KnowledgeBase:
         }
         
         # Cache the response for future queries
-        self._cache_response(cache_key, result)
+        if use_cache:
+            self._cache_response(cache_key, result)
         
         return result
     
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Process Memory Reporting for Nijenhuis Chatbot
+Copy-on-write friendly preloading (gc.freeze) and USS/PSS measurement of
+gunicorn workers from /proc
+"""
+
+import gc
+import os
+from typing import Dict, Any, List, Optional
+
+# smaps_rollup fields (kB) and the names they are reported under
+SMAPS_FIELDS = {
+    'Rss': 'rss_kb',
+    'Pss': 'pss_kb',
+    'Shared_Clean': 'shared_clean_kb',
+    'Shared_Dirty': 'shared_dirty_kb',
+    'Private_Clean': 'private_clean_kb',
+    'Private_Dirty': 'private_dirty_kb',
+    'Swap': 'swap_kb',
+}
+
+def gc_freeze_enabled() -> bool:
+    return os.environ.get('GC_FREEZE_PRELOAD', 'true').lower() in ('true', '1', 'yes')
+
+
+def disable_gc_for_preload() -> bool:
+    """
+    Turn off the cyclic GC while the app is preloaded in the gunicorn master.
+    Collections during preload free objects in the middle of pages; workers
+    would later reuse those holes and copy the pages. Re-enabled by
+    freeze_preloaded_heap() right before the first fork.
+    """
+    if not hasattr(gc, 'freeze') or not gc_freeze_enabled():
+        return False
+    gc.disable()
+    return True
+
+
+def freeze_preloaded_heap() -> Dict[str, Any]:
+    """
+    Move every object allocated so far into the GC's permanent generation.
+
+    Called in the gunicorn master right before forking. Collections in the
+    workers then never walk (and write the GC headers of) the preloaded
+    objects, so their pages stay shared instead of being copied. No collection
+    is run first, on purpose (see disable_gc_for_preload). Later calls, e.g.
+    before a worker restart, only freeze objects allocated since.
+    """
+    if not hasattr(gc, 'freeze') or not gc_freeze_enabled():
+        return {'frozen': False, 'frozen_objects': 0}
+
+    gc.freeze()
+    gc.enable()
+    return {'frozen': True, 'frozen_objects': gc.get_freeze_count()}
+
+
+def read_process_memory(pid: Optional[int] = None) -> Optional[Dict[str, int]]:
+    """
+    Memory of a process in kB from /proc/<pid>/smaps_rollup (Linux 4.14+).
+    USS (unique set size) is private clean + private dirty: what would be freed
+    if the process exited. PSS splits shared pages evenly between their users.
+    Returns None where /proc is not available.
+    """
+    pid = pid or os.getpid()
+    values = {name: 0 for name in SMAPS_FIELDS.values()}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", 'r') as f:
+            for line in f:
+                key, _, rest = line.partition(':')
+                if key in SMAPS_FIELDS:
+                    values[SMAPS_FIELDS[key]] = int(rest.split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+
+    values['uss_kb'] = values['private_clean_kb'] + values['private_dirty_kb']
+    values['shared_kb'] = values['shared_clean_kb'] + values['shared_dirty_kb']
+    return values
+
+
+def child_pids(pid: int) -> List[int]:
+    """Direct children of a process (e.g. the gunicorn master's workers)"""
+    children = []
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children", 'r') as f:
+                children.extend(int(child) for child in f.read().split())
+    except OSError:
+        pass
+    return sorted(set(children))
+
+
+def worker_memory_report(master_pid: int) -> Dict[str, Any]:
+    """USS/PSS of the master and each of its children, plus totals"""
+    master = read_process_memory(master_pid)
+    workers = {}
+    for pid in child_pids(master_pid):
+        usage = read_process_memory(pid)
+        if usage is not None:
+            workers[pid] = usage
+
+    processes = ([master] if master else []) + list(workers.values())
+    total_rss = sum(p['rss_kb'] for p in processes)
+    total_pss = sum(p['pss_kb'] for p in processes)
+    return {
+        'master_pid': master_pid,
+        'master': master,
+        'workers': workers,
+        'totals': {
+            'processes': len(processes),
+            'rss_kb': total_rss,
+            'pss_kb': total_pss,
+            'uss_kb': sum(p['uss_kb'] for p in processes),
+            # RSS counts shared pages once per process; PSS counts them once in total
+            'saved_by_sharing_kb': total_rss - total_pss,
+        },
+    }
+
+
+def current_process_report() -> Dict[str, Any]:
+    """Memory and GC state of the calling process"""
+    return {
+        'pid': os.getpid(),
+        'parent_pid': os.getppid(),
+        'memory': read_process_memory(),
+        'gc': {
+            'frozen_objects': gc.get_freeze_count() if hasattr(gc, 'get_freeze_count') else 0,
+            'counts': gc.get_count(),
+        },
+    }
@@ -12,8 +12,10 @@ import os
 import tempfile
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, Tuple
-from collections import defaultdict, deque
+from collections import deque, Counter, OrderedDict
 import secrets
+import threading
+import atexit
 import jwt
 from functools import wraps
 
@@ -22,22 +24,65 @@ try:
 except ImportError:  # pragma: no cover - Windows fallback
     fcntl = None
 
+try:
+    from .shared_rate_limiter import create_rate_limiter
+    from .ip_block_table import IPBlockTable
+    from .async_logging import get_async_file_logger
+except ImportError:
+    from backend.chatbot.core.shared_rate_limiter import create_rate_limiter
+    from backend.chatbot.core.ip_block_table import IPBlockTable
+    from backend.chatbot.core.async_logging import get_async_file_logger
+
+DEFAULT_SECURITY_LOG_FILE = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'logs', 'security_events.ndjson')
+SECURITY_LOGGER_NAME = 'nijenhuis.chatbot.security'
+# Console output per event type is limited to one line per interval during storms
+SECURITY_CONSOLE_INTERVAL = 10.0
+
+DEFAULT_API_KEYS_FILE = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'config', 'api_keys.json')
+
 class SecurityManager:
-    """Comprehensive security management for chatbot API"""
+    """Comprehensive security management for chatbot API
+
+    The JWT secret and the verified-token cache are per process: the secret
+    comes from JWT_SECRET, so rotating it means restarting every worker.
+    """
     
-    def __init__(self):
+    def __init__(self, keys_file: str = None):
+        self.keys_file = keys_file or DEFAULT_API_KEYS_FILE
+        # Usage of X-API-Key requests is counted here and flushed to the keys file
+        # periodically: api_key -> {'count': n, 'last_used': iso timestamp}
+        self._usage_pending: Dict[str, Dict[str, Any]] = {}
+        self._keys_lock = threading.RLock()
+        self._keys_mtime = 0
+        self._next_keys_check = 0.0
+        self._usage_flusher_pid = None
+        self._usage_flusher_lock = threading.Lock()
+        self.usage_flush_interval = float(os.environ.get('API_KEY_USAGE_FLUSH_SECONDS', '60'))
         self.api_keys = self._load_api_keys()
-        self.rate_limits = defaultdict(lambda: deque())  # Per-minute tracking
-        self.rate_limits_hour = defaultdict(lambda: deque())  # Per-hour tracking
-        self.failed_attempts = defaultdict(int)
-        self.blocked_ips = set()
-        self.security_log = []
+        atexit.register(self.flush_api_key_usage)
+        self.rate_limiter = create_rate_limiter()  # Per-minute and per-hour, shared by all workers (and hosts)
+        # identifier -> (failed attempts, time of the first one); the count restarts
+        # once block_duration_minutes have passed since the first failure
+        self.failed_attempts: Dict[str, Tuple[int, float]] = {}
+        self.ip_blocks = IPBlockTable()  # expiring address/CIDR blocks, shared by all workers
+        # Recent events (fixed capacity), per-type totals and the NDJSON file sink
+        self.security_log = deque(maxlen=int(os.environ.get('SECURITY_LOG_CAPACITY', '1000')))
+        self.security_event_counts = Counter()
+        self._security_log_lock = threading.Lock()
+        self._console_last: Dict[str, float] = {}
+        self._console_suppressed = Counter()
+        self.security_sink = self._create_security_sink()
         
         # Security configuration
         self.max_requests_per_minute = 60
         self.max_requests_per_hour = 1000
         self.max_failed_attempts = 5
         self.block_duration_minutes = 15
+        # Verified-token cache: sha256(token) -> (payload, exp, secret generation)
+        self._token_cache: 'OrderedDict[str, Tuple[Dict[str, Any], int, int]]' = OrderedDict()
+        self._token_cache_size = int(os.environ.get('JWT_CACHE_SIZE', '10000'))
+        self._token_lock = threading.Lock()
+        self._secret_generation = 0
         self.jwt_secret = self._get_or_create_jwt_secret()
         self.jwt_expiry_hours = 24
         
@@ -50,9 +95,6 @@ class SecurityManager:
             'uptime_start': time.time()
         }
     
-        # Start periodic cleanup for rate limits (every 5 minutes)
-        self._start_cleanup_thread()
-    
     def _load_api_keys(self) -> Dict[str, Dict[str, Any]]:
         """Load API keys from secure storage.
 
@@ -64,12 +106,11 @@ class SecurityManager:
         explicit ``CHATBOT_ALLOW_AUTOBOOTSTRAP=1`` override is set, we raise
         on startup so the operator must provision keys deliberately.
         """
-        keys_file = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'config', 'api_keys.json')
+        keys_file = self.keys_file
 
         if os.path.exists(keys_file):
             try:
-                with open(keys_file, 'r') as f:
-                    data = json.load(f)
+                data, self._keys_mtime = self._read_api_keys_file()
                 if not isinstance(data, dict) or not data:
                     raise RuntimeError('api_keys.json is empty or not a JSON object')
                 return data
@@ -102,62 +143,154 @@ class SecurityManager:
         )
         return default_keys
     
-    def _save_api_keys(self, keys: Dict[str, Dict[str, Any]]):
-        """Save API keys to secure storage"""
-        keys_file = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'config', 'api_keys.json')
-        os.makedirs(os.path.dirname(keys_file), exist_ok=True)
+    def _save_api_keys(self, keys: Dict[str, Dict[str, Any]]) -> bool:
+        """Save API keys to secure storage (atomic replace, so readers never see a partial file)"""
+        keys_file = self.keys_file
+        directory = os.path.dirname(os.path.abspath(keys_file))
+        os.makedirs(directory, exist_ok=True)
         
         try:
-            with open(keys_file, 'w') as f:
-                json.dump(keys, f, indent=2)
+            fd, tmp_path = tempfile.mkstemp(prefix='.api_keys_', suffix='.tmp', dir=directory)
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(keys, f, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.chmod(tmp_path, 0o600)
+                os.replace(tmp_path, keys_file)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+            self._keys_mtime = os.stat(keys_file).st_mtime_ns
+            return True
         except Exception as e:
             print(f"Error saving API keys: {e}")
-    
-    def _start_cleanup_thread(self):
-        """Start background thread for periodic cleanup of stale rate limit entries"""
-        import threading
-        
-        def cleanup_loop():
+            return False
+
+    def _read_api_keys_file(self) -> Tuple[Dict[str, Dict[str, Any]], int]:
+        with open(self.keys_file, 'r') as f:
+            mtime = os.fstat(f.fileno()).st_mtime_ns
+            return json.load(f), mtime
+
+    def _keys_file_lock(self):
+        """Exclusive flock serializing read-modify-write of the keys file across workers"""
+        lock_fd = os.open(self.keys_file + '.lock', os.O_RDWR | os.O_CREAT, 0o600)
+        if fcntl is not None:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+        return lock_fd
+
+    def _keys_file_unlock(self, lock_fd: int):
+        if fcntl is not None:
+            fcntl.flock(lock_fd, fcntl.LOCK_UN)
+        os.close(lock_fd)
+
+    def _apply_pending_usage(self, keys: Dict[str, Dict[str, Any]], pending: Dict[str, Dict[str, Any]]):
+        for api_key, usage in pending.items():
+            key_info = keys.get(api_key)
+            if key_info is None:
+                continue  # revoked in the meantime
+            key_info['usage_count'] = key_info.get('usage_count', 0) + usage['count']
+            if not key_info.get('last_used') or usage['last_used'] > key_info['last_used']:
+                key_info['last_used'] = usage['last_used']
+
+    def reload_api_keys_if_changed(self, force: bool = False) -> bool:
+        """Re-read the keys file when its mtime changed (checked at most once per second)"""
+        now = time.time()
+        if not force and now < self._next_keys_check:
+            return False
+        self._next_keys_check = now + 1.0
+        try:
+            if os.stat(self.keys_file).st_mtime_ns == self._keys_mtime:
+                return False
+            keys, mtime = self._read_api_keys_file()
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not reload API keys: {e}")
+            return False
+        if not isinstance(keys, dict) or not keys:
+            return False
+        with self._keys_lock:
+            # Counts not yet flushed by this worker stay visible in memory
+            self._apply_pending_usage(keys, self._usage_pending)
+            self.api_keys = keys
+            self._keys_mtime = mtime
+        return True
+
+    def _update_api_keys_file(self, mutate=None):
+        """
+        Merge this worker's pending usage (and an optional change) into the keys
+        file under an exclusive lock: the file is re-read first, so counts and
+        keys written by other workers are kept.
+        """
+        with self._keys_lock:
+            pending, self._usage_pending = self._usage_pending, {}
+        try:
+            lock_fd = self._keys_file_lock()
+        except OSError as e:
+            print(f"⚠️ Could not lock API keys file: {e}")
+            self._restore_pending_usage(pending)
+            return
+        try:
+            try:
+                keys, _ = self._read_api_keys_file()
+            except FileNotFoundError:
+                keys = {}
+            self._apply_pending_usage(keys, pending)
+            if mutate is not None:
+                mutate(keys)
+            if not self._save_api_keys(keys):
+                self._restore_pending_usage(pending)
+                return
+            with self._keys_lock:
+                self._apply_pending_usage(keys, self._usage_pending)
+                self.api_keys = keys
+        except Exception as e:
+            print(f"⚠️ Could not update API keys file: {e}")
+            self._restore_pending_usage(pending)
+        finally:
+            self._keys_file_unlock(lock_fd)
+
+    def _restore_pending_usage(self, pending: Dict[str, Dict[str, Any]]):
+        with self._keys_lock:
+            for api_key, usage in pending.items():
+                current = self._usage_pending.setdefault(api_key, {'count': 0, 'last_used': usage['last_used']})
+                current['count'] += usage['count']
+                current['last_used'] = max(current['last_used'], usage['last_used'])
+
+    def flush_api_key_usage(self):
+        """Write usage statistics counted since the last flush to the keys file"""
+        if self._usage_pending:
+            self._update_api_keys_file()
+
+    def _record_api_key_usage(self, api_key: str, key_info: Dict[str, Any]):
+        now = datetime.now().isoformat()
+        with self._keys_lock:
+            key_info['last_used'] = now
+            key_info['usage_count'] = key_info.get('usage_count', 0) + 1
+            usage = self._usage_pending.setdefault(api_key, {'count': 0, 'last_used': now})
+            usage['count'] += 1
+            usage['last_used'] = now
+        self._ensure_usage_flusher()
+
+    def _ensure_usage_flusher(self):
+        """Start the flush thread in this process (lazily, so it exists in each forked worker)"""
+        if self._usage_flusher_pid == os.getpid() or self.usage_flush_interval <= 0:
+            return
+
+        def flush_loop():
             while True:
+                time.sleep(self.usage_flush_interval)
                 try:
-                    time.sleep(300)  # Clean every 5 minutes
-                    self._cleanup_stale_rate_limits()
+                    self.flush_api_key_usage()
                 except Exception as e:
-                    print(f"Error in cleanup thread: {e}")
-        
-        cleanup_thread = threading.Thread(target=cleanup_loop, daemon=True)
-        cleanup_thread.start()
-    
-    def _cleanup_stale_rate_limits(self):
-        """Remove stale rate limit entries to prevent memory leaks"""
-        current_time = time.time()
-        stale_minute_keys = []
-        stale_hour_keys = []
-        
-        # Find stale per-minute entries (older than 2 minutes)
-        for key, timestamps in list(self.rate_limits.items()):
-            if not timestamps or (current_time - timestamps[-1]) > 120:
-                stale_minute_keys.append(key)
-        
-        # Find stale per-hour entries (older than 2 hours)
-        for key, timestamps in list(self.rate_limits_hour.items()):
-            if not timestamps or (current_time - timestamps[-1]) > 7200:
-                stale_hour_keys.append(key)
-        
-        # Remove stale entries
-        for key in stale_minute_keys:
-            del self.rate_limits[key]
-        
-        for key in stale_hour_keys:
-            del self.rate_limits_hour[key]
-        
-        # Also clean up failed attempts for entries that haven't failed recently
-        stale_failed = [k for k, v in self.failed_attempts.items() if v == 0]
-        for key in stale_failed:
-            del self.failed_attempts[key]
-        
-        if stale_minute_keys or stale_hour_keys:
-            print(f"🧹 Cleaned up {len(stale_minute_keys)} minute + {len(stale_hour_keys)} hour rate limit entries")
+                    print(f"Error flushing API key usage: {e}")
+
+        with self._usage_flusher_lock:
+            # Concurrent first requests of a worker start a single thread
+            if self._usage_flusher_pid == os.getpid():
+                return
+            self._usage_flusher_pid = os.getpid()
+            threading.Thread(target=flush_loop, daemon=True).start()
     
     def _generate_api_key(self) -> str:
         """Generate a secure API key"""
@@ -188,6 +321,27 @@ class SecurityManager:
         print("WARNING: This is insecure for production. Please set JWT_SECRET environment variable.")
         return secrets.token_urlsafe(64)
     
+    @property
+    def jwt_secret(self) -> str:
+        return self._jwt_secret
+
+    @jwt_secret.setter
+    def jwt_secret(self, value: str):
+        # Any change of the signing key drops every payload verified with the old one
+        with self._token_lock:
+            self._jwt_secret = value
+            self._secret_generation += 1
+            self._token_cache.clear()
+
+    @staticmethod
+    def _token_digest(token: str) -> str:
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def clear_token_cache(self):
+        """Forget all verified tokens (they are verified again on next use)"""
+        with self._token_lock:
+            self._token_cache.clear()
+
     def generate_jwt_token(self, api_key: str, permissions: list) -> str:
         """Generate JWT token for authenticated requests"""
         now = datetime.now()
@@ -201,29 +355,59 @@ class SecurityManager:
         return jwt.encode(payload, self.jwt_secret, algorithm='HS256')
     
     def verify_jwt_token(self, token: str) -> Optional[Dict[str, Any]]:
-        """Verify JWT token and return payload"""
+        """Verify JWT token and return payload
+
+        Verified payloads are cached by token digest until their ``exp``, so the
+        widget's repeated requests with the same token skip the decode and HMAC.
+        Entries are bound to the secret generation they were verified under.
+        """
+        digest = self._token_digest(token)
+        now = time.time()
+        with self._token_lock:
+            entry = self._token_cache.get(digest)
+            if entry is not None:
+                payload, exp, generation = entry
+                if generation == self._secret_generation and now < exp:
+                    self._token_cache.move_to_end(digest)
+                    return dict(payload)
+                del self._token_cache[digest]
+            generation = self._secret_generation
+            secret = self._jwt_secret
+
         try:
             # Note: verify_aud=False because we do audience validation separately in server.py
             # to allow flexible origin matching (e.g., 'http://localhost:5000' in 'http://localhost:5000/page')
             payload = jwt.decode(
                 token, 
-                self.jwt_secret, 
+                secret, 
                 algorithms=['HS256'], 
                 options={"verify_exp": True, "verify_aud": False}
             )
-            return payload
         except jwt.ExpiredSignatureError:
             self._log_security_event('jwt_expired', {'token': token[:20] + '...'})
             return None
         except jwt.InvalidTokenError as e:
             self._log_security_event('jwt_invalid', {'token': token[:20] + '...', 'error': str(e)})
             return None
+
+        exp = payload.get('exp')
+        if isinstance(exp, (int, float)) and self._token_cache_size > 0:
+            with self._token_lock:
+                # Skip caching if the secret rotated while this token was being decoded
+                if generation == self._secret_generation:
+                    self._token_cache[digest] = (dict(payload), exp, generation)
+                    self._token_cache.move_to_end(digest)
+                    while len(self._token_cache) > self._token_cache_size:
+                        self._token_cache.popitem(last=False)
+        return payload
     
     def authenticate_request(self, api_key: str, required_permission: str = 'chat') -> Tuple[bool, str]:
         """Authenticate API request"""
         if not api_key:
             return False, "API key required"
         
+        self.reload_api_keys_if_changed()
+
         # Check if API key exists
         if api_key not in self.api_keys:
             self._log_security_event('invalid_api_key', {'api_key': api_key[:10] + '...'})
@@ -240,57 +424,13 @@ class SecurityManager:
             })
             return False, f"Insufficient permissions. Required: {required_permission}"
         
-        # Update usage statistics
-        key_info['last_used'] = datetime.now().isoformat()
-        key_info['usage_count'] = key_info.get('usage_count', 0) + 1
-        self._save_api_keys(self.api_keys)
+        # Update usage statistics (in memory; flushed by flush_api_key_usage)
+        self._record_api_key_usage(api_key, key_info)
         
         return True, "Authentication successful"
     
-    def _shared_rate_limit_check(self, identifier: str, max_per_minute: int) -> bool:
-        """File-backed per-minute rate limit that is consistent across
-        gunicorn workers. Returns True if the caller is under the limit
-        and records this hit. Falls back to "allow" on filesystem errors
-        so a broken tmp dir doesn't take the service down.
-        """
-        if fcntl is None:
-            return True
-        bucket = os.path.join(tempfile.gettempdir(),
-                              'nijenhuis_chatbot_rl_' + hashlib.sha1(identifier.encode()).hexdigest())
-        try:
-            fd = os.open(bucket, os.O_RDWR | os.O_CREAT, 0o600)
-        except OSError:
-            return True
-        try:
-            fcntl.flock(fd, fcntl.LOCK_EX)
-            try:
-                raw = os.read(fd, 4096).decode('utf-8') or '{}'
-                data = json.loads(raw) if raw.strip() else {}
-            except Exception:
-                data = {}
-            now = time.time()
-            window_start = data.get('window_start', 0)
-            count = data.get('count', 0)
-            if now - window_start >= 60:
-                window_start = now
-                count = 0
-            if count >= max_per_minute:
-                return False
-            data = {'window_start': window_start, 'count': count + 1}
-            os.lseek(fd, 0, os.SEEK_SET)
-            os.ftruncate(fd, 0)
-            os.write(fd, json.dumps(data).encode('utf-8'))
-            return True
-        finally:
-            try:
-                fcntl.flock(fd, fcntl.LOCK_UN)
-            finally:
-                os.close(fd)
-
     def check_rate_limit(self, identifier: str, api_key: str = None) -> Tuple[bool, str]:
         """Check rate limiting for requests (both per-minute and per-hour)"""
-        current_time = time.time()
-        
         # Get rate limits for this API key
         minute_limit = self.max_requests_per_minute
         hour_limit = self.max_requests_per_hour
@@ -303,96 +443,112 @@ class SecurityManager:
                 # Hourly limit is typically 10x the minute limit, but cap at configured max
                 hour_limit = min(key_info['rate_limit_override'] * 10, self.max_requests_per_hour)
 
-        # Cross-worker per-minute gate. The in-memory counters below still
-        # enforce per-hour / per-worker behavior, but this ensures that a
-        # burst of requests spread across gunicorn workers is still counted.
-        if not self._shared_rate_limit_check(identifier, minute_limit):
-            self._log_security_event('rate_limit_exceeded', {
-                'identifier': identifier,
-                'limit': minute_limit,
-                'window': 'minute_shared',
-                'api_key': api_key[:10] + '...' if api_key else 'anonymous'
-            })
-            return False, f"Rate limit exceeded. Max {minute_limit} requests per minute."
-        
-        # Clean old entries from per-minute tracking (older than 60 seconds)
-        while self.rate_limits[identifier] and self.rate_limits[identifier][0] < current_time - 60:
-            self.rate_limits[identifier].popleft()
-        
-        # Clean old entries from per-hour tracking (older than 3600 seconds)
-        while self.rate_limits_hour[identifier] and self.rate_limits_hour[identifier][0] < current_time - 3600:
-            self.rate_limits_hour[identifier].popleft()
-        
-        # Check per-minute limit
-        if len(self.rate_limits[identifier]) >= minute_limit:
-            self._log_security_event('rate_limit_exceeded', {
-                'identifier': identifier,
-                'limit': minute_limit,
-                'window': 'minute',
-                'api_key': api_key[:10] + '...' if api_key else 'anonymous'
-            })
-            return False, f"Rate limit exceeded. Max {minute_limit} requests per minute."
-        
-        # Check per-hour limit
-        if len(self.rate_limits_hour[identifier]) >= hour_limit:
+        # One check against the shared table counts requests from every gunicorn worker
+        is_allowed, window, retry_after = self.rate_limiter.hit(identifier, minute_limit, hour_limit)
+        if not is_allowed:
+            limit = minute_limit if window == 'minute' else hour_limit
             self._log_security_event('rate_limit_exceeded', {
                 'identifier': identifier,
-                'limit': hour_limit,
-                'window': 'hour',
+                'limit': limit,
+                'window': window,
+                'retry_after': round(retry_after, 1),
                 'api_key': api_key[:10] + '...' if api_key else 'anonymous'
             })
-            return False, f"Rate limit exceeded. Max {hour_limit} requests per hour."
-        
-        # Add current request to both tracking windows
-        self.rate_limits[identifier].append(current_time)
-        self.rate_limits_hour[identifier].append(current_time)
+            return False, f"Rate limit exceeded. Max {limit} requests per {window}."
         
         return True, "Rate limit check passed"
     
     def check_ip_blocking(self, ip_address: str) -> Tuple[bool, str]:
         """Check if IP address is blocked"""
-        if ip_address in self.blocked_ips:
+        if self.ip_blocks.lookup(ip_address) is not None:
             return False, "IP address is blocked"
         return True, "IP address allowed"
     
+    def block_ip(self, network: str, duration_minutes: Optional[float] = None, reason: str = 'manual') -> str:
+        """Block an address or CIDR range (e.g. a /24) in all workers; None uses block_duration_minutes"""
+        minutes = self.block_duration_minutes if duration_minutes is None else duration_minutes
+        normalized = self.ip_blocks.block(network, minutes * 60 if minutes > 0 else None, reason)
+        self._log_security_event('ip_blocked', {'ip': normalized, 'reason': reason,
+                                                'duration_minutes': minutes if minutes > 0 else None})
+        return normalized
+    
+    def unblock_ip(self, network: str) -> bool:
+        """Remove a block before it expires"""
+        removed = self.ip_blocks.unblock(network)
+        if removed:
+            self._log_security_event('ip_unblocked', {'ip': network})
+        return removed
+    
     def handle_failed_attempt(self, identifier: str, ip_address: str):
         """Handle failed authentication attempt"""
-        self.failed_attempts[identifier] += 1
-        
-        if self.failed_attempts[identifier] >= self.max_failed_attempts:
-            self.blocked_ips.add(ip_address)
+        now = time.time()
+        window = self.block_duration_minutes * 60
+        count, first_failure = self.failed_attempts.get(identifier, (0, now))
+        if now - first_failure >= window:
+            count, first_failure = 0, now
+        count += 1
+        self.failed_attempts[identifier] = (count, first_failure)
+        
+        if count >= self.max_failed_attempts:
+            del self.failed_attempts[identifier]
+            try:
+                normalized = self.ip_blocks.block(ip_address, window, f"failed_attempts:{identifier}")
+            except ValueError:
+                normalized = None  # not an address; nothing to block
             self._log_security_event('ip_blocked', {
-                'ip': ip_address,
+                'ip': normalized or ip_address,
                 'identifier': identifier,
-                'failed_attempts': self.failed_attempts[identifier]
+                'failed_attempts': count
             })
-            
-            # Schedule unblocking
-            def unblock_ip():
-                time.sleep(self.block_duration_minutes * 60)
-                self.blocked_ips.discard(ip_address)
-                self.failed_attempts[identifier] = 0
-                self._log_security_event('ip_unblocked', {'ip': ip_address})
-            
-            import threading
-            threading.Thread(target=unblock_ip, daemon=True).start()
+        
+        # Counters of identifiers that stopped failing expire instead of piling up
+        if len(self.failed_attempts) > 10000:
+            self.failed_attempts = {key: value for key, value in self.failed_attempts.items()
+                                    if now - value[1] < window}
     
+    def _create_security_sink(self):
+        """Asynchronous NDJSON sink with rotation (SECURITY_LOG_FILE=off disables it)"""
+        path = os.environ.get('SECURITY_LOG_FILE', DEFAULT_SECURITY_LOG_FILE)
+        if path.lower() in ('off', 'none', ''):
+            return None
+        try:
+            logger = get_async_file_logger(
+                SECURITY_LOGGER_NAME, path,
+                max_bytes=int(os.environ.get('SECURITY_LOG_MAX_BYTES', str(10 * 1024 * 1024))),
+                backup_count=int(os.environ.get('SECURITY_LOG_BACKUPS', '5')),
+                max_queue=int(os.environ.get('SECURITY_LOG_QUEUE', '10000'))
+            )
+        except OSError as e:
+            print(f"⚠️ Security event log {path} unavailable: {e}")
+            return None
+        return logger.handlers[0]
+
     def _log_security_event(self, event_type: str, details: Dict[str, Any]):
-        """Log security events"""
+        """Log security events (constant cost: ring buffer, counter, queued file write)"""
+        now = time.time()
         event = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': datetime.fromtimestamp(now).isoformat(),
             'type': event_type,
             'details': details
         }
         
-        self.security_log.append(event)
-        
-        # Keep only last 1000 events
-        if len(self.security_log) > 1000:
-            self.security_log = self.security_log[-1000:]
-        
-        # Log to console in development
-        print(f"🔒 Security Event: {event_type} - {details}")
+        with self._security_log_lock:
+            self.security_log.append(event)
+            self.security_event_counts[event_type] += 1
+            # Log to console in development, once per type per interval
+            if now - self._console_last.get(event_type, 0) >= SECURITY_CONSOLE_INTERVAL:
+                self._console_last[event_type] = now
+                suppressed = self._console_suppressed.pop(event_type, 0)
+            else:
+                self._console_suppressed[event_type] += 1
+                suppressed = None
+        
+        if self.security_sink is not None:
+            self.security_sink.submit(SECURITY_LOGGER_NAME, event_type,
+                                      {'event': event_type, 'details': details, 'pid': os.getpid()}, now)
+        if suppressed is not None:
+            more = f" (+{suppressed} similar)" if suppressed else ""
+            print(f"🔒 Security Event: {event_type} - {details}{more}")
     
     def get_security_stats(self) -> Dict[str, Any]:
         """Get security statistics"""
@@ -409,12 +565,17 @@ class SecurityManager:
                 (self.connection_health['total_requests'] - self.connection_health['failed_requests']) 
                 / max(self.connection_health['total_requests'], 1) * 100
             ),
-            'blocked_ips_count': len(self.blocked_ips),
-            'active_rate_limits': len(self.rate_limits),
-            'recent_security_events': self.security_log[-10:],
+            'blocked_ips_count': len(self.ip_blocks),
+            'active_rate_limits': self.rate_limiter.stats()['active_identifiers'],
+            'recent_security_events': list(self.security_log)[-10:],
+            'security_event_counts': dict(self.security_event_counts),
+            'security_events_dropped': self._security_events_dropped(),
             'api_keys_count': len(self.api_keys)
         }
     
+    def _security_events_dropped(self) -> int:
+        return self.security_sink.dropped if self.security_sink is not None else 0
+    
     def update_connection_health(self, success: bool = True):
         """Update connection health metrics"""
         self.connection_health['last_heartbeat'] = time.time()
@@ -426,8 +587,7 @@ class SecurityManager:
     def create_api_key(self, name: str, permissions: list, rate_limit_override: int = None) -> str:
         """Create a new API key"""
         api_key = self._generate_api_key()
-        
-        self.api_keys[api_key] = {
+        key_info = {
             'name': name,
             'permissions': permissions,
             'created_at': datetime.now().isoformat(),
@@ -436,7 +596,7 @@ class SecurityManager:
             'rate_limit_override': rate_limit_override
         }
         
-        self._save_api_keys(self.api_keys)
+        self._update_api_keys_file(lambda keys: keys.__setitem__(api_key, key_info))
         self._log_security_event('api_key_created', {
             'name': name,
             'permissions': permissions,
@@ -447,10 +607,10 @@ class SecurityManager:
     
     def revoke_api_key(self, api_key: str) -> bool:
         """Revoke an API key"""
+        self.reload_api_keys_if_changed(force=True)
         if api_key in self.api_keys:
             key_info = self.api_keys[api_key]
-            del self.api_keys[api_key]
-            self._save_api_keys(self.api_keys)
+            self._update_api_keys_file(lambda keys: keys.pop(api_key, None))
             
             self._log_security_event('api_key_revoked', {
                 'name': key_info.get('name', 'unknown'),
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Shared Rate Limiter for Nijenhuis Chatbot
+Fixed-size shared-memory hash table of GCRA cells, consistent across all
+gunicorn workers, with per-minute and per-hour limits checked together
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from typing import Dict, Any, Optional, Tuple
+
+try:
+    import fcntl  # POSIX only
+except ImportError:  # pragma: no cover - Windows fallback
+    fcntl = None
+
+# magic, version, stripes, slots per stripe; padded to one cache line
+HEADER = struct.Struct('<4sHII50x')
+MAGIC = b'NJRL'
+VERSION = 1
+# identifier hash (0 = empty), theoretical arrival time of the minute and hour limits
+CELL = struct.Struct('<Qdd')
+MAX_PROBES = 32
+
+DEFAULT_SLOTS = 65536
+DEFAULT_STRIPES = 64
+
+
+def _default_path() -> str:
+    directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(directory, 'nijenhuis_chatbot_ratelimit')
+
+
+def _identifier_hash(identifier: str) -> int:
+    value = int.from_bytes(hashlib.blake2b(identifier.encode('utf-8'), digest_size=8).digest(), 'little')
+    return value or 1
+
+
+class SharedRateLimiter:
+    """
+    GCRA (generic cell rate algorithm) over a memory-mapped hash table
+
+    Every identifier occupies one 24-byte cell holding a hash and, per window,
+    the theoretical arrival time (TAT) of its next request. A request is
+    allowed when it fits both the minute and the hour window; only then are
+    both TATs advanced, so the two limits are enforced in a single check with
+    O(1) memory per identifier. A limit of N per period allows a burst of N and
+    then one request every period/N.
+
+    The table is split into stripes, each with its own lock: a threading.Lock
+    for the threads of a worker plus an fcntl byte-range lock for the other
+    workers. Identifiers are placed by linear probing inside their stripe.
+    Cells whose TATs are both in the past carry no state and are reused; if a
+    stripe is full, the least restrictive cell is evicted.
+
+    The table lives in a file under /dev/shm (env RATE_LIMIT_SHM_PATH), so
+    workers share it with or without preload_app. If the file cannot be opened
+    an anonymous shared mapping is used, which is still shared with workers
+    forked after it was created.
+    """
+
+    def __init__(self, path: str = None, slots: int = None, stripes: int = None):
+        if path is None:
+            path = os.environ.get('RATE_LIMIT_SHM_PATH', _default_path())
+        if stripes is None:
+            stripes = int(os.environ.get('RATE_LIMIT_STRIPES', str(DEFAULT_STRIPES)))
+        if slots is None:
+            slots = int(os.environ.get('RATE_LIMIT_SLOTS', str(DEFAULT_SLOTS)))
+        self.stripes = max(1, stripes)
+        self.slots_per_stripe = max(1, slots // self.stripes)
+        self.path = path
+        self._size = HEADER.size + self.stripes * self.slots_per_stripe * CELL.size
+        self._fd: Optional[int] = None
+        self._locks = [threading.Lock() for _ in range(self.stripes)]
+        self._map = self._open_shared(path)
+
+    def _open_shared(self, path: str) -> mmap.mmap:
+        try:
+            fd = self._open_table(path)
+        except OSError as e:
+            print(f"⚠️ Rate limit table {path} unavailable ({e}); using anonymous shared memory")
+            shared = mmap.mmap(-1, self._size)
+            HEADER.pack_into(shared, 0, MAGIC, VERSION, self.stripes, self.slots_per_stripe)
+            return shared
+
+        try:
+            shared = mmap.mmap(fd, self._size, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+        except Exception:
+            os.close(fd)
+            raise
+        self._fd = fd
+        return shared
+
+    def _open_table(self, path: str) -> int:
+        """
+        Open the table file with this layout, creating it if needed
+
+        A file with another layout (different RATE_LIMIT_SLOTS/STRIPES or
+        version) is never resized in place: other workers may have it mapped,
+        and shrinking a mapped file kills them with SIGBUS. Instead a new file
+        is built next to it and renamed over the path; processes still using
+        the old one keep their mapping of the unlinked file until they restart.
+        """
+        expected = HEADER.pack(MAGIC, VERSION, self.stripes, self.slots_per_stripe)
+        while True:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                ready = self._prepare_table(fd, path, expected)
+            except Exception:
+                os.close(fd)
+                raise
+            if ready:
+                return fd
+            os.close(fd)
+
+    def _prepare_table(self, fd: int, path: str, expected: bytes) -> bool:
+        """Initialize or check the opened file under its lock; False if path now names another file"""
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            try:
+                current = os.stat(path)
+            except FileNotFoundError:
+                return False
+            opened = os.fstat(fd)
+            if (opened.st_dev, opened.st_ino) != (current.st_dev, current.st_ino):
+                # Replaced by another process while we waited for the lock
+                return False
+            if opened.st_size == 0:
+                # New file, mapped by nobody yet
+                os.ftruncate(fd, self._size)
+                os.pwrite(fd, expected, 0)
+            elif opened.st_size != self._size or os.pread(fd, HEADER.size, 0) != expected:
+                print(f"⚠️ Rate limit table {path} has another layout; replacing it")
+                self._replace_table(path, expected)
+                return False
+            return True
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def _replace_table(self, path: str, header: bytes):
+        directory, name = os.path.split(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(prefix=f'.{name}.', suffix='.tmp', dir=directory)
+        try:
+            os.ftruncate(fd, self._size)
+            os.pwrite(fd, header, 0)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        finally:
+            os.close(fd)
+
+    def _lock_stripe(self, stripe: int):
+        self._locks[stripe].acquire()
+        if self._fd is not None and fcntl is not None:
+            try:
+                fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, stripe)
+            except OSError:
+                pass  # still serialized within this worker
+
+    def _unlock_stripe(self, stripe: int):
+        if self._fd is not None and fcntl is not None:
+            try:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, stripe)
+            except OSError:
+                pass
+        self._locks[stripe].release()
+
+    def _find_cell(self, stripe: int, key: int, now: float) -> int:
+        """Offset of the identifier's cell in its stripe, claiming a free or stale one if needed"""
+        base = HEADER.size + stripe * self.slots_per_stripe * CELL.size
+        start = (key // self.stripes) % self.slots_per_stripe
+        reusable = None
+        victim, victim_tat = None, None
+        for probe in range(min(MAX_PROBES, self.slots_per_stripe)):
+            offset = base + ((start + probe) % self.slots_per_stripe) * CELL.size
+            cell_key, minute_tat, hour_tat = CELL.unpack_from(self._map, offset)
+            if cell_key == key:
+                return offset
+            if cell_key == 0:
+                if reusable is None:
+                    reusable = offset
+                # Keys are only ever placed in the first free cell, so none beyond it
+                break
+            latest = max(minute_tat, hour_tat)
+            if latest <= now and reusable is None:
+                reusable = offset
+            if victim is None or latest < victim_tat:
+                victim, victim_tat = offset, latest
+        offset = reusable if reusable is not None else victim
+        CELL.pack_into(self._map, offset, key, 0.0, 0.0)
+        return offset
+
+    def hit(self, identifier: str, minute_limit: int, hour_limit: int,
+            now: float = None) -> Tuple[bool, Optional[str], float]:
+        """
+        Record a request if it fits both windows.
+
+        Returns (allowed, exceeded_window, retry_after_seconds) where
+        exceeded_window is 'minute' or 'hour' for rejected requests.
+        """
+        now = time.time() if now is None else now
+        key = _identifier_hash(identifier)
+        stripe = key % self.stripes
+        minute_interval = 60.0 / max(minute_limit, 1)
+        hour_interval = 3600.0 / max(hour_limit, 1)
+
+        self._lock_stripe(stripe)
+        try:
+            offset = self._find_cell(stripe, key, now)
+            _, minute_tat, hour_tat = CELL.unpack_from(self._map, offset)
+            minute_tat = max(minute_tat, now) + minute_interval
+            hour_tat = max(hour_tat, now) + hour_interval
+            # Allowed while the backlog stays within the window (burst of `limit`)
+            if minute_tat - now > 60.0:
+                return False, 'minute', minute_tat - now - 60.0
+            if hour_tat - now > 3600.0:
+                return False, 'hour', hour_tat - now - 3600.0
+            CELL.pack_into(self._map, offset, key, minute_tat, hour_tat)
+            return True, None, 0.0
+        finally:
+            self._unlock_stripe(stripe)
+
+    def reset(self, identifier: str):
+        """Forget the state of one identifier"""
+        key = _identifier_hash(identifier)
+        stripe = key % self.stripes
+        self._lock_stripe(stripe)
+        try:
+            offset = self._find_cell(stripe, key, time.time())
+            CELL.pack_into(self._map, offset, key, 0.0, 0.0)
+        finally:
+            self._unlock_stripe(stripe)
+
+    def stats(self, now: float = None) -> Dict[str, Any]:
+        """Number of identifiers that currently carry rate-limit state"""
+        now = time.time() if now is None else now
+        active = 0
+        for cell_key, minute_tat, hour_tat in CELL.iter_unpack(self._map[HEADER.size:self._size]):
+            if cell_key and max(minute_tat, hour_tat) > now:
+                active += 1
+        return {
+            'active_identifiers': active,
+            'capacity': self.stripes * self.slots_per_stripe,
+            'stripes': self.stripes,
+            'shared_file': self.path if self._fd is not None else None,
+        }
+
+    def close(self):
+        self._map.close()
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class BackendRateLimiter:
+    """
+    Fixed-window counters in a shared state backend (see backend/shared/state_backend.py)
+
+    Used when STATE_BACKEND_URL points at a backend shared by several app
+    servers. Each window is one counter keyed by identifier and window number
+    that expires with the window, so memory stays O(1) per active identifier.
+    Same interface as SharedRateLimiter. If the backend is unreachable,
+    requests are allowed rather than failing the API.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    @staticmethod
+    def _keys(identifier: str, now: float) -> Tuple[str, str]:
+        key = _identifier_hash(identifier)
+        return f"ratelimit:{key:x}:m:{int(now // 60)}", f"ratelimit:{key:x}:h:{int(now // 3600)}"
+
+    def hit(self, identifier: str, minute_limit: int, hour_limit: int,
+            now: float = None) -> Tuple[bool, Optional[str], float]:
+        now = time.time() if now is None else now
+        minute_key, hour_key = self._keys(identifier, now)
+        try:
+            if self.backend.incr(minute_key, 61) > minute_limit:
+                return False, 'minute', 60 - now % 60
+            if self.backend.incr(hour_key, 3601) > hour_limit:
+                return False, 'hour', 3600 - now % 3600
+        except Exception as e:
+            print(f"⚠️ Rate limit backend unavailable, allowing request: {e}")
+        return True, None, 0.0
+
+    def reset(self, identifier: str):
+        for key in self._keys(identifier, time.time()):
+            self.backend.delete(key)
+
+    def stats(self, now: float = None) -> Dict[str, Any]:
+        # Counters live in the backend; counting them would need a key scan
+        return {'active_identifiers': None, 'backend': self.backend.name}
+
+    def close(self):
+        pass
+
+
+def create_rate_limiter():
+    """Rate limiter for this deployment: shared backend across hosts, else the local shared-memory table"""
+    try:
+        from backend.shared.state_backend import get_state_backend, state_backend_configured
+    except ImportError:
+        return SharedRateLimiter()
+    if state_backend_configured():
+        return BackendRateLimiter(get_state_backend())
+    return SharedRateLimiter()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Training Corrections Journal for Nijenhuis Chatbot
+Append-only NDJSON journal for corrections submitted through /api/train,
+compacted into enhanced_training_data.json in the background
+"""
+
+import fcntl
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from backend.shared.atomic_json import write_json
+
+DEFAULT_TRAINING_FILE = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', 'training', 'data', 'enhanced_training_data.json'
+))
+
+
+class TrainingJournal:
+    """
+    Durable, append-only log of training corrections
+
+    Each line is {"seq": <n>, "session": {...}}. seq is a nanosecond
+    timestamp but always above the last seq in the file, taken under the
+    journal's lock, so it keeps increasing if the wall clock steps back.
+    Appends are cheap (one fsync'd write), and the JSON snapshot is rewritten
+    only by a debounced background compaction. The snapshot records the
+    highest compacted seq in metadata.journal_seq so replays never apply an
+    entry twice; compaction leaves a {"seq_floor": <n>} line behind so the
+    numbering continues above it.
+    """
+
+    def __init__(self, training_file: str = None, journal_file: str = None,
+                 compaction_delay: float = None):
+        self.training_file = training_file or DEFAULT_TRAINING_FILE
+        self.journal_file = journal_file or os.path.splitext(self.training_file)[0] + '.journal.ndjson'
+        if compaction_delay is None:
+            compaction_delay = float(os.environ.get('TRAINING_COMPACTION_DELAY', '10'))
+        self.compaction_delay = compaction_delay
+        self._timer = None
+        self._timer_lock = threading.Lock()
+
+    @staticmethod
+    def _last_seq(lines: List[str]) -> Optional[int]:
+        """seq (or seq_floor) of the last complete line; the highest, as seqs only increase"""
+        for line in reversed(lines):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(entry, dict):
+                seq = entry.get('seq', entry.get('seq_floor'))
+                if isinstance(seq, int):
+                    return seq
+        return None
+
+    def append(self, sessions: List[Dict[str, Any]], schedule: bool = True) -> int:
+        """Durably append sessions to the journal and schedule a compaction"""
+        if not sessions:
+            return 0
+
+        with open(self.journal_file, 'a+', encoding='utf-8') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                seq = self._last_seq(f.readlines())
+                if seq is None:
+                    # Fresh journal: continue above what the snapshot already holds
+                    try:
+                        seq = self._load_snapshot().get('metadata', {}).get('journal_seq', 0)
+                    except (OSError, ValueError):
+                        seq = 0
+                lines = []
+                for session in sessions:
+                    seq = max(time.time_ns(), seq + 1)
+                    lines.append(json.dumps({'seq': seq, 'session': session}, ensure_ascii=False))
+                f.write('\n'.join(lines) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+        if schedule:
+            self.schedule_compaction()
+        return len(sessions)
+
+    @staticmethod
+    def _parse_lines(lines: List[str]) -> List[Dict[str, Any]]:
+        entries = []
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # A torn final line from a crash mid-write; skip it
+                continue
+            if isinstance(entry, dict) and isinstance(entry.get('session'), dict):
+                entries.append(entry)
+        return entries
+
+    def read_entries(self, after_seq: int = 0) -> List[Dict[str, Any]]:
+        """Read journal entries newer than after_seq"""
+        try:
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                fcntl.flock(f, fcntl.LOCK_SH)
+                try:
+                    lines = f.readlines()
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+        except FileNotFoundError:
+            return []
+        return [e for e in self._parse_lines(lines) if e.get('seq', 0) > after_seq]
+
+    def pending_sessions(self, after_seq: int = 0) -> List[Dict[str, Any]]:
+        """Sessions in the journal that are not yet part of the snapshot"""
+        return [entry['session'] for entry in self.read_entries(after_seq)]
+
+    def _load_snapshot(self) -> Dict[str, Any]:
+        try:
+            with open(self.training_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {
+                "metadata": {
+                    "created": datetime.now().isoformat(),
+                    "version": "2.1",
+                    "enhanced": True
+                },
+                "training_sessions": [],
+                "training_data": {
+                    "improved_responses": {}
+                }
+            }
+
+    def _write_snapshot(self, data: Dict[str, Any]):
+        write_json(self.training_file, data)
+
+    def compact(self) -> int:
+        """Fold journal entries into the JSON snapshot and truncate the journal"""
+        try:
+            f = open(self.journal_file, 'r+', encoding='utf-8')
+        except FileNotFoundError:
+            return 0
+
+        with f:
+            # Holding the journal lock blocks appends from every worker, so no
+            # entry can land between reading the journal and truncating it
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                entries = self._parse_lines(f.readlines())
+                if not entries:
+                    return 0
+
+                data = self._load_snapshot()
+                metadata = data.setdefault('metadata', {})
+                compacted_seq = metadata.get('journal_seq', 0)
+                # Only entries of a compaction that crashed before truncating are at or below it
+                new_entries = [e for e in entries if e['seq'] > compacted_seq]
+
+                if new_entries:
+                    sessions = data.setdefault('training_sessions', [])
+                    sessions.extend(e['session'] for e in new_entries)
+                    metadata['last_updated'] = datetime.now().isoformat()
+                    metadata['last_source'] = new_entries[-1]['session'].get('source', metadata.get('last_source'))
+                    metadata['journal_seq'] = max(e['seq'] for e in new_entries)
+                    self._write_snapshot(data)
+
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps({'seq_floor': metadata.get('journal_seq', compacted_seq)}) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+                return len(new_entries)
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _run_compaction(self):
+        with self._timer_lock:
+            self._timer = None
+        try:
+            count = self.compact()
+            if count:
+                print(f"📚 Compacted {count} training corrections into {os.path.basename(self.training_file)}")
+        except Exception as e:
+            print(f"⚠️ Training journal compaction failed: {e}")
+
+    def schedule_compaction(self):
+        """Debounce compaction so a burst of corrections causes one rewrite"""
+        with self._timer_lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(self.compaction_delay, self._run_compaction)
+            self._timer.daemon = True
+            self._timer.start()
+
+
+# Global training journal instance
+_training_journal = None
+
+def get_training_journal() -> TrainingJournal:
+    """Get or create the global training journal instance"""
+    global _training_journal
+    if _training_journal is None:
+        _training_journal = TrainingJournal()
+    return _training_journal
@@ -7,7 +7,9 @@ Automatically improves responses based on user interactions and patterns
 import json
 import os
 import re
-from typing import Dict, Any, List, Optional
+import threading
+import time
+from typing import Callable, Dict, Any, List, Optional
 from datetime import datetime, timedelta
 from collections import defaultdict, Counter
 import difflib
@@ -20,6 +22,12 @@ class UnsupervisedLearning:
             self.data_file = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'training', 'data', 'unsupervised_learning_data.json'))
         else:
             self.data_file = data_file
+        # Guards interaction_data; request threads record while snapshots read.
+        # Pattern analysis and the file write run outside it (see _persist)
+        self._lock = threading.RLock()
+        self.revision = 0
+        self._persist_pending = False
+        self._persisting = False
         self.interaction_data = self.load_data()
         self.patterns = self.analyze_patterns()
         
@@ -47,12 +55,49 @@ class UnsupervisedLearning:
     
     def save_data(self):
         """Save interaction data to file"""
+        with self._lock:
+            content = json.dumps(self.interaction_data, indent=2, ensure_ascii=False)
+        self._write_data(content)
+    
+    def _write_data(self, content: str):
         try:
             with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(self.interaction_data, f, indent=2, ensure_ascii=False)
+                f.write(content)
         except Exception as e:
             print(f"Warning: Could not save unsupervised learning data: {e}")
     
+    def _persist(self):
+        """
+        Re-analyze patterns and save the data file without holding the lock
+        
+        Only the copy of the interactions and the serialization happen under
+        the lock. Concurrent calls are coalesced: while one thread is
+        persisting, the others only mark the data dirty and that thread runs
+        again with the newest data, so writes stay in order.
+        """
+        with self._lock:
+            self._persist_pending = True
+            if self._persisting:
+                return
+            self._persisting = True
+        try:
+            while True:
+                with self._lock:
+                    if not self._persist_pending:
+                        self._persisting = False
+                        return
+                    self._persist_pending = False
+                    interactions = list(self.interaction_data["interactions"])
+                patterns, improvements = self._find_patterns(interactions)
+                with self._lock:
+                    self._install_patterns(patterns, improvements)
+                    content = json.dumps(self.interaction_data, indent=2, ensure_ascii=False)
+                self._write_data(content)
+        except BaseException:
+            with self._lock:
+                self._persisting = False
+            raise
+    
     def record_interaction(self, question: str, response: str, success: bool = True, 
                           response_time: float = 0.0, user_feedback: Optional[str] = None):
         """Record a user interaction for learning"""
@@ -69,32 +114,33 @@ class UnsupervisedLearning:
             "response_words": len(response.split())
         }
         
-        self.interaction_data["interactions"].append(interaction)
-        self.interaction_data["statistics"]["total_interactions"] += 1
-        
-        if success:
-            self.interaction_data["statistics"]["successful_responses"] += 1
-        else:
-            self.interaction_data["statistics"]["failed_responses"] += 1
-        
-        # Update common questions
-        question_key = question.lower().strip()
-        if question_key not in self.interaction_data["statistics"]["common_questions"]:
-            self.interaction_data["statistics"]["common_questions"][question_key] = 0
-        self.interaction_data["statistics"]["common_questions"][question_key] += 1
-        
-        # Update response quality metrics
-        quality_score = self.calculate_response_quality(interaction)
-        if question_key not in self.interaction_data["statistics"]["response_quality"]:
-            self.interaction_data["statistics"]["response_quality"][question_key] = []
-        self.interaction_data["statistics"]["response_quality"][question_key].append(quality_score)
-        
-        # Keep only recent interactions (last 1000)
-        if len(self.interaction_data["interactions"]) > 1000:
-            self.interaction_data["interactions"] = self.interaction_data["interactions"][-1000:]
-        
-        self.save_data()
-        self.analyze_patterns()
+        with self._lock:
+            self.interaction_data["interactions"].append(interaction)
+            self.interaction_data["statistics"]["total_interactions"] += 1
+            
+            if success:
+                self.interaction_data["statistics"]["successful_responses"] += 1
+            else:
+                self.interaction_data["statistics"]["failed_responses"] += 1
+            
+            # Update common questions
+            question_key = question.lower().strip()
+            if question_key not in self.interaction_data["statistics"]["common_questions"]:
+                self.interaction_data["statistics"]["common_questions"][question_key] = 0
+            self.interaction_data["statistics"]["common_questions"][question_key] += 1
+            
+            # Update response quality metrics
+            quality_score = self.calculate_response_quality(interaction)
+            if question_key not in self.interaction_data["statistics"]["response_quality"]:
+                self.interaction_data["statistics"]["response_quality"][question_key] = []
+            self.interaction_data["statistics"]["response_quality"][question_key].append(quality_score)
+            
+            # Keep only recent interactions (last 1000)
+            if len(self.interaction_data["interactions"]) > 1000:
+                self.interaction_data["interactions"] = self.interaction_data["interactions"][-1000:]
+            
+            self.revision += 1
+        self._persist()
     
     def calculate_response_quality(self, interaction: Dict[str, Any]) -> float:
         """Calculate quality score for a response"""
@@ -122,14 +168,34 @@ class UnsupervisedLearning:
     
     def analyze_patterns(self):
         """Analyze interaction patterns to identify improvements"""
-        if not self.interaction_data["interactions"]:
+        with self._lock:
+            interactions = list(self.interaction_data["interactions"])
+        if not interactions:
+            return None
+        patterns, improvements = self._find_patterns(interactions)
+        with self._lock:
+            self._install_patterns(patterns, improvements)
+        return patterns
+    
+    def _install_patterns(self, patterns: Dict[str, Any], improvements: List[Dict[str, Any]]):
+        """Publish analysis results (call with the lock held)"""
+        if patterns is None:
             return
+        self.interaction_data["patterns"] = patterns
+        self.interaction_data["improvements"] = improvements
+        self.patterns = patterns
+        self.revision += 1
+    
+    def _find_patterns(self, interactions: List[Dict[str, Any]]):
+        """(patterns, improvements) of a list of interactions; (None, None) if it is empty"""
+        if not interactions:
+            return None, None
         
         # Analyze question patterns
         question_patterns = defaultdict(list)
         response_patterns = defaultdict(list)
         
-        for interaction in self.interaction_data["interactions"]:
+        for interaction in interactions:
             question = interaction["question"]
             response = interaction["response"]
             
@@ -207,13 +273,12 @@ class UnsupervisedLearning:
                     "suggested_action": "Improve response quality for this question"
                 })
         
-        self.interaction_data["patterns"] = patterns
-        self.interaction_data["improvements"] = improvements
-        self.patterns = patterns
+        return patterns, improvements
     
     def get_suggested_improvements(self) -> List[Dict[str, Any]]:
         """Get suggested improvements based on pattern analysis"""
-        return self.interaction_data.get("improvements", [])
+        with self._lock:
+            return list(self.interaction_data.get("improvements", []))
     
     def find_similar_questions(self, question: str, threshold: float = 0.8) -> List[Dict[str, Any]]:
         """Find similar questions from past interactions"""
@@ -254,29 +319,36 @@ class UnsupervisedLearning:
     
     def get_statistics(self) -> Dict[str, Any]:
         """Get learning statistics"""
-        stats = self.interaction_data["statistics"].copy()
-        
-        # Calculate success rate
-        total = stats["total_interactions"]
-        if total > 0:
-            stats["success_rate"] = stats["successful_responses"] / total
-        else:
-            stats["success_rate"] = 0.0
-        
-        # Calculate average response quality
-        all_qualities = []
-        for qualities in stats["response_quality"].values():
-            all_qualities.extend(qualities)
-        
-        if all_qualities:
-            stats["avg_response_quality"] = sum(all_qualities) / len(all_qualities)
-        else:
-            stats["avg_response_quality"] = 0.0
-        
-        # Most common questions
-        stats["top_questions"] = dict(Counter(stats["common_questions"]).most_common(10))
-        
-        return stats
+        with self._lock:
+            stats = self.interaction_data["statistics"].copy()
+            
+            # Calculate success rate
+            total = stats["total_interactions"]
+            if total > 0:
+                stats["success_rate"] = stats["successful_responses"] / total
+            else:
+                stats["success_rate"] = 0.0
+            
+            # Calculate average response quality
+            all_qualities = []
+            for qualities in stats["response_quality"].values():
+                all_qualities.extend(qualities)
+            
+            if all_qualities:
+                stats["avg_response_quality"] = sum(all_qualities) / len(all_qualities)
+            else:
+                stats["avg_response_quality"] = 0.0
+            
+            # Most common questions
+            stats["top_questions"] = dict(Counter(stats["common_questions"]).most_common(10))
+            
+            return stats
+    
+    def get_common_questions(self, limit: int = 10) -> List[str]:
+        """The most frequently asked (normalized) questions, most common first"""
+        with self._lock:
+            counts = Counter(self.interaction_data["statistics"]["common_questions"])
+        return [question for question, _ in counts.most_common(limit)]
     
     def auto_improve_responses(self, training_data: Dict[str, Any]) -> Dict[str, Any]:
         """Automatically improve training data based on unsupervised learning"""
@@ -305,6 +377,80 @@ class UnsupervisedLearning:
         
         return improved_data
 
+class LearningStatsSnapshot:
+    """Periodically refreshed, immutable view of learning statistics
+    
+    Statistics and improvements are serialized once per refresh and shared by
+    every request, so polling dashboards never touch the data file or re-run
+    pattern analysis. serialize turns a payload into a {'body', 'etag'} entry;
+    the API passes its precompute_json_response.
+    """
+    
+    def __init__(self, learning: UnsupervisedLearning, serialize: Callable[[Any], Dict[str, Any]],
+                 refresh_interval: float = None):
+        self.learning = learning
+        self._serialize = serialize
+        if refresh_interval is None:
+            refresh_interval = float(os.environ.get('LEARNING_STATS_REFRESH_SECONDS', '30'))
+        self.refresh_interval = max(refresh_interval, 1.0)
+        self._current = None
+        self._revision = None
+        self._refresh_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._thread_pid = None
+    
+    def refresh(self, force: bool = False) -> bool:
+        """Rebuild the snapshot if the learning data changed since the last build"""
+        with self._refresh_lock:
+            if not force and self._current is not None and self._revision == self.learning.revision:
+                return False
+            with self.learning._lock:
+                revision = self.learning.revision
+                stats = self.learning.get_statistics()
+                stats_entry = self._serialize(stats)
+                improvements_entry = self._serialize({'improvements': self.learning.get_suggested_improvements()})
+            # Swap in a new dict so readers always see a consistent pair
+            self._current = {
+                'stats': stats_entry,
+                'improvements': improvements_entry,
+                'generated_at': time.time()
+            }
+            self._revision = revision
+            return True
+    
+    def _refresh_loop(self):
+        while not self._stop_event.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"⚠️ Learning stats refresh failed: {e}")
+    
+    def ensure_started(self):
+        """Start the refresh thread in the current process (threads do not survive fork)"""
+        if self._thread_pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._refresh_lock:
+            if self._thread_pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            self._stop_event = threading.Event()
+            self._thread = threading.Thread(target=self._refresh_loop, daemon=True, name='learning-stats-refresh')
+            self._thread_pid = os.getpid()
+            self._thread.start()
+    
+    def stop(self):
+        """Stop the background refresh thread"""
+        self._stop_event.set()
+    
+    def get(self, name: str) -> Dict[str, Any]:
+        """Return the serialized entry ('stats' or 'improvements')"""
+        self.ensure_started()
+        current = self._current
+        if current is None:
+            self.refresh()
+            current = self._current
+        return current[name]
+
 def demonstrate_unsupervised_learning():
     """Demonstrate the unsupervised learning system"""
     
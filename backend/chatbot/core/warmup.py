@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Worker Warm-up for Nijenhuis Chatbot
+Primes caches and lazily loaded components in a fresh gunicorn worker by
+replaying the most common real questions before it accepts traffic
+"""
+
+import os
+import time
+from typing import Dict, Any, List, Optional
+
+DEFAULT_WARMUP_QUESTIONS = 20
+DEFAULT_WARMUP_COMPONENTS = ('neural_network', 'token_predictor')
+
+
+def _env_components() -> List[str]:
+    raw = os.environ.get('WARMUP_COMPONENTS')
+    if raw is None:
+        return list(DEFAULT_WARMUP_COMPONENTS)
+    return [name.strip() for name in raw.split(',') if name.strip()]
+
+
+def warm_up_chatbot(chatbot, website_content: str = None, limit: Optional[int] = None,
+                    components: Optional[List[str]] = None, max_seconds: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Replay the top `limit` entries of the learning system's common_questions
+    through process_query (without recording them as interactions) and touch the
+    lazily loaded components, so the first real users don't pay cold-start latency.
+
+    Args:
+        chatbot: Chatbot instance of this worker
+        website_content: Website content passed to process_query, as the API does
+        limit: Number of questions to replay (env WARMUP_QUESTIONS, default 20; 0 disables)
+        components: Lazy chatbot properties to initialize (env WARMUP_COMPONENTS)
+        max_seconds: Time budget; replay stops early when exceeded (env WARMUP_MAX_SECONDS)
+
+    Returns:
+        Summary with counts and timings
+    """
+    if limit is None:
+        limit = int(os.environ.get('WARMUP_QUESTIONS', str(DEFAULT_WARMUP_QUESTIONS)))
+    if components is None:
+        components = _env_components()
+    if max_seconds is None:
+        max_seconds = float(os.environ.get('WARMUP_MAX_SECONDS', '30'))
+
+    started = time.perf_counter()
+    summary = {'questions': 0, 'failed': 0, 'components': {}, 'budget_exceeded': False}
+    if limit <= 0:
+        summary['duration_ms'] = 0.0
+        return summary
+
+    for name in components:
+        component_start = time.perf_counter()
+        try:
+            loaded = getattr(chatbot, name) is not None
+        except Exception as e:
+            print(f"⚠️ Warm-up could not load {name}: {e}")
+            loaded = False
+        summary['components'][name] = {
+            'loaded': loaded,
+            'duration_ms': round((time.perf_counter() - component_start) * 1000, 1)
+        }
+
+    questions = chatbot.learning_system.get_common_questions(limit)
+    deadline = started + max_seconds
+    for question in questions:
+        if time.perf_counter() > deadline:
+            summary['budget_exceeded'] = True
+            break
+        try:
+            chatbot.process_query(
+                query=question,
+                website_content=website_content,
+                record_interaction=False
+            )
+            summary['questions'] += 1
+        except Exception as e:
+            summary['failed'] += 1
+            print(f"⚠️ Warm-up query failed: {e}")
+
+    summary['duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return summary
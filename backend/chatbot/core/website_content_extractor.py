@@ -6,7 +6,7 @@ Extracts relevant content from HTML pages for chatbot training and query process
 
 import os
 import re
-from typing import List, Dict, Set
+from typing import List, Dict, Set, Tuple
 from html.parser import HTMLParser
 from pathlib import Path
 
@@ -55,25 +55,38 @@ class WebsiteContentExtractor:
             return ""
         
         all_content = []
+        for html_file, content in self.extract_pages():
+            if content:
+                all_content.append(f"=== {html_file.stem} ===\n{content}\n")
         
-        # Process all HTML files
-        html_files = list(Path(self.pages_directory).glob("*.html"))
-        
-        for html_file in html_files:
+        combined_content = "\n\n".join(all_content)
+        self.cached_content = combined_content
+        return combined_content
+    
+    @property
+    def uses_bs4(self) -> bool:
+        return BS4_AVAILABLE
+    
+    def list_source_files(self) -> List[Path]:
+        """HTML pages that feed the chatbot content, in a stable order"""
+        if not os.path.exists(self.pages_directory):
+            return []
+        return sorted(
+            html_file for html_file in Path(self.pages_directory).glob("*.html")
             # Skip admin and offline pages
-            if 'admin' in str(html_file) or 'offline' in str(html_file):
-                continue
-            
+            if 'admin' not in str(html_file) and 'offline' not in str(html_file)
+        )
+    
+    def extract_pages(self) -> List[Tuple[Path, str]]:
+        """Extract every source page; returns (path, content) pairs"""
+        pages = []
+        for html_file in self.list_source_files():
             try:
-                content = self.extract_from_file(str(html_file))
-                if content:
-                    all_content.append(f"=== {html_file.stem} ===\n{content}\n")
+                pages.append((html_file, self.extract_from_file(str(html_file))))
             except Exception as e:
                 print(f"⚠️ Error extracting content from {html_file}: {e}")
-        
-        combined_content = "\n\n".join(all_content)
-        self.cached_content = combined_content
-        return combined_content
+                pages.append((html_file, ""))
+        return pages
     
     def extract_from_file(self, file_path: str) -> str:
         """
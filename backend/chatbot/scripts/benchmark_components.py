@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Component Micro-Benchmark Suite
+Times the hot chatbot components on fixed corpora and compares the results
+with a stored baseline, failing when a component regresses past a threshold
+
+Usage:
+    python backend/chatbot/scripts/benchmark_components.py                # compare with baseline
+    python backend/chatbot/scripts/benchmark_components.py --update-baseline
+    python backend/chatbot/scripts/benchmark_components.py --only language_detection --threshold 10
+
+Exit codes: 0 = no regressions, 1 = at least one component regressed, 2 = no baseline found
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+DEFAULT_BASELINE_FILE = Path(__file__).parent / 'benchmark_baseline.json'
+DEFAULT_REGRESSION_PCT = float(os.environ.get('BENCHMARK_REGRESSION_PCT', '25'))
+
+# --- Fixed corpora --------------------------------------------------------------
+# Kept in the script (not read from training data) so results stay comparable
+# when the training files change.
+
+QUERIES = [
+    ("Wat zijn de openingstijden?", 'nl'),
+    ("Hoeveel kost een elektrische boot voor een dag?", 'nl'),
+    ("Mogen honden mee aan boord?", 'nl'),
+    ("Kan ik een sloep huren voor 8 personen?", 'nl'),
+    ("What are your opening hours?", 'en'),
+    ("How much does it cost to rent a sailboat?", 'en'),
+    ("Do I need a license to drive the boat?", 'en'),
+    ("Wie viel kostet ein Elektroboot pro Tag?", 'de'),
+    ("Wo kann ich in Giethoorn parken?", 'de'),
+    ("Hallo, ik wil graag reserveren", 'nl'),
+]
+
+SIMILARITY_PAIRS = [
+    ("Wat kost een boot huren?", "Hoeveel kost het om een boot te huren?"),
+    ("What are the opening hours", "When are you open"),
+    ("Mogen honden mee?", "Zijn huisdieren toegestaan aan boord?"),
+    ("Wie viel kostet ein Boot?", "Was kostet die Miete eines Bootes?"),
+    ("Kan ik met pin betalen?", "Welke betaalmethoden accepteren jullie?"),
+]
+
+BOAT_TEXTS = [
+    ("Onze Electrosloep 10 en Tender 720 zijn populair, net als de Kano en de Kajak.", 'en'),
+    ("De Zeilboot is ideaal voor kleine groepen; een Sup Board kan ook.", 'de'),
+    ("Kies tussen de Tender 570 en de Electrosloep 8.", 'nl'),
+]
+
+CONVERSATION = [
+    {'role': 'user', 'content': "Hallo! Ik wil graag een boot huren 😊"},
+    {'role': 'assistant', 'content': "Welkom bij Nijenhuis! Voor hoeveel personen?"},
+    {'role': 'user', 'content': "Voor 6 personen, <b>morgen</b> de hele dag."},
+    {'role': 'assistant', 'content': "Dan raad ik de Elektrosloep 8 personen aan."},
+    {'role': 'user', 'content': "Wat kost dat?\x07 En mogen honden mee?"},
+    {'role': 'system', 'content': "ignored role"},
+] * 4
+
+PREDICTOR_TRAINING = [
+    [
+        {'role': 'user', 'content': question},
+        {'role': 'assistant', 'content': "U kunt bij ons elektrische boten en sloepen huren vanaf 9 uur."}
+    ]
+    for question, _ in QUERIES
+]
+
+
+# --- Statistics -----------------------------------------------------------------
+
+def measure(func: Callable[[], Any], inner: int, rounds: int, warmup: int) -> Dict[str, float]:
+    """
+    Run func `inner` times per round for `rounds` rounds after `warmup` calls.
+    Returns per-call microsecond statistics over the round means.
+    """
+    for _ in range(warmup):
+        func()
+
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(inner):
+            func()
+        samples.append((time.perf_counter() - start) / inner * 1e6)
+
+    ordered = sorted(samples)
+    return {
+        'median_us': statistics.median(ordered),
+        'mean_us': statistics.fmean(ordered),
+        'stdev_us': statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        'min_us': ordered[0],
+        'max_us': ordered[-1],
+        'rounds': rounds,
+        'inner': inner,
+    }
+
+
+def cycle(items: List[Any]) -> Callable[[], Any]:
+    """Return a function that yields the corpus items round-robin"""
+    state = {'index': 0}
+
+    def next_item():
+        item = items[state['index']]
+        state['index'] = (state['index'] + 1) % len(items)
+        return item
+    return next_item
+
+
+# --- Benchmarks -----------------------------------------------------------------
+
+def build_benchmarks() -> Dict[str, Callable[[], Any]]:
+    """Construct the components once and return a callable per benchmark"""
+    with redirect_stdout(io.StringIO()):
+        from backend.chatbot.core.chatbot import LanguageDetector, SimilarityMatcher
+        from backend.chatbot.core.knowledge_base import KnowledgeBase
+        from backend.chatbot.core.token_predictor import TokenPredictor
+        from backend.chatbot.core.boat_translations import translate_boat_names
+        from backend.chatbot.core.conversation_context import ConversationContextManager
+        from backend.chatbot.api.server import sanitize_conversation_history
+
+        detector = LanguageDetector(use_advanced=False)
+        matcher = SimilarityMatcher(use_advanced=False)
+        knowledge_base = KnowledgeBase()
+        predictor = TokenPredictor(use_transformer=False)
+        predictor.update_with_training_data(PREDICTOR_TRAINING)
+
+    next_query = cycle(QUERIES)
+    next_pair = cycle(SIMILARITY_PAIRS)
+    next_boat_text = cycle(BOAT_TEXTS)
+
+    # Cache hits: every corpus query is answered once so later calls hit the LRU
+    for query, language in QUERIES:
+        knowledge_base.answer_query(query, language)
+
+    def answer_query_miss():
+        query, language = next_query()
+        knowledge_base.clear_cache()
+        return knowledge_base.answer_query(query, language)
+
+    def conversation_context():
+        manager = ConversationContextManager(storage_dir=None)
+        context = manager.get_or_create_context('session_benchmark')
+        for message in CONVERSATION[:6]:
+            manager.add_message(context.session_id, message['role'], message['content'])
+        return manager.get_context(context.session_id).get_conversation_history(max_tokens=500)
+
+    return {
+        'language_detection': lambda: detector.detect_language(next_query()[0]),
+        'answer_query_cache_hit': lambda: knowledge_base.answer_query(*next_query()),
+        'answer_query_cache_miss': answer_query_miss,
+        'find_trained_response': lambda: knowledge_base.find_trained_response(next_query()[0]),
+        'similarity': lambda: matcher.calculate_similarity(*next_pair()),
+        'token_prediction_statistical': lambda: predictor._predict_with_statistics(next_query()[0], 10),
+        'translate_boat_names': lambda: translate_boat_names(*next_boat_text()),
+        'sanitize_conversation_history': lambda: sanitize_conversation_history(CONVERSATION),
+        'conversation_context': conversation_context,
+    }
+
+
+def calibrate_inner(func: Callable[[], Any], target_seconds: float) -> int:
+    """Pick an inner loop count so one round takes roughly target_seconds"""
+    start = time.perf_counter()
+    calls = 0
+    while time.perf_counter() - start < target_seconds / 10:
+        func()
+        calls += 1
+    per_call = (time.perf_counter() - start) / calls
+    return max(1, int(target_seconds / per_call))
+
+
+def run_suite(only: Optional[List[str]] = None, rounds: int = 15, round_seconds: float = 0.02,
+              warmup: int = 50) -> Dict[str, Dict[str, float]]:
+    benchmarks = build_benchmarks()
+    results = {}
+    with redirect_stdout(io.StringIO()):
+        for name, func in benchmarks.items():
+            if only and name not in only:
+                continue
+            inner = calibrate_inner(func, round_seconds)
+            results[name] = measure(func, inner=inner, rounds=rounds, warmup=warmup)
+    return results
+
+
+# --- Baseline comparison --------------------------------------------------------
+
+def machine_info() -> Dict[str, str]:
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'system': platform.system(),
+    }
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Any],
+            threshold_pct: float) -> Dict[str, Dict[str, Any]]:
+    """Compare median timings with the baseline; positive change means slower"""
+    comparison = {}
+    for name, result in results.items():
+        base = baseline.get('benchmarks', {}).get(name)
+        if not base:
+            comparison[name] = {'status': 'new', 'median_us': result['median_us']}
+            continue
+        change_pct = (result['median_us'] - base['median_us']) / base['median_us'] * 100
+        if change_pct > threshold_pct:
+            status = 'regressed'
+        elif change_pct < -threshold_pct:
+            status = 'improved'
+        else:
+            status = 'ok'
+        comparison[name] = {
+            'status': status,
+            'baseline_us': base['median_us'],
+            'median_us': result['median_us'],
+            'change_pct': change_pct,
+        }
+    return comparison
+
+
+def write_baseline(path: Path, results: Dict[str, Dict[str, float]]):
+    baseline = {
+        'created_at': datetime.now().isoformat(),
+        'machine': machine_info(),
+        'benchmarks': {
+            name: {k: (round(v, 3) if isinstance(v, float) else v) for k, v in result.items()}
+            for name, result in results.items()
+        },
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2)
+        f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark hot chatbot components against a stored baseline')
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE_FILE), help='Baseline JSON file')
+    parser.add_argument('--update-baseline', action='store_true', help='Write the results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_REGRESSION_PCT,
+                        help='Allowed slowdown of the median in percent before failing')
+    parser.add_argument('--rounds', type=int, default=15, help='Measured rounds per benchmark')
+    parser.add_argument('--round-seconds', type=float, default=0.02, help='Target duration of one round')
+    parser.add_argument('--warmup', type=int, default=50, help='Warmup calls per benchmark')
+    parser.add_argument('--only', action='append', help='Run only the named benchmark (repeatable)')
+    parser.add_argument('--json', action='store_true', help='Print results and comparison as JSON')
+    args = parser.parse_args()
+
+    results = run_suite(only=args.only, rounds=args.rounds, round_seconds=args.round_seconds, warmup=args.warmup)
+    baseline_path = Path(args.baseline)
+
+    if args.update_baseline:
+        write_baseline(baseline_path, results)
+        print(f"💾 Baseline written to {baseline_path}")
+        return 0
+
+    if not baseline_path.exists():
+        print(f"❌ No baseline at {baseline_path}; run with --update-baseline first")
+        return 2
+
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    comparison = compare(results, baseline, args.threshold)
+    regressions = [name for name, entry in comparison.items() if entry['status'] == 'regressed']
+
+    if args.json:
+        print(json.dumps({
+            'machine': machine_info(),
+            'threshold_pct': args.threshold,
+            'results': results,
+            'comparison': comparison,
+            'regressions': regressions,
+        }, indent=2))
+        return 1 if regressions else 0
+
+    if baseline.get('machine') != machine_info():
+        print("⚠️ Baseline was recorded on a different machine/Python; comparisons are indicative only")
+
+    print("=" * 72)
+    print(f"Component Benchmarks (µs per call, median of {args.rounds} rounds, threshold {args.threshold:.0f}%)")
+    print("=" * 72)
+    print(f"{'component':<32}{'baseline':>10}{'median':>10}{'stdev':>9}{'change':>10}")
+    icons = {'ok': '✅', 'improved': '🚀', 'regressed': '❌', 'new': '🆕'}
+    for name, entry in comparison.items():
+        baseline_us = f"{entry['baseline_us']:.1f}" if 'baseline_us' in entry else '-'
+        change = f"{entry['change_pct']:+.1f}%" if 'change_pct' in entry else '-'
+        print(f"{name:<32}{baseline_us:>10}{entry['median_us']:>10.1f}"
+              f"{results[name]['stdev_us']:>9.1f}{change:>10} {icons[entry['status']]}")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    print("\n✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Request Middleware Microbenchmark
+Measures per-request overhead of security headers, input sanitization,
+emoji removal and request logging, before and after precomputation
+"""
+
+import argparse
+import html
+import io
+import json
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+SAMPLE_MESSAGE = "Hallo! 😊 Wat kost een   elektrische boot voor 2 dagen?\x07 🚤 <b>Graag snel</b>"
+
+
+# --- Legacy implementations (as they were before precomputation) ---------------
+
+def legacy_remove_emojis(text: str) -> str:
+    if not text:
+        return text
+    emoji_pattern = re.compile(
+        "["
+        "\U0001F600-\U0001F64F"
+        "\U0001F300-\U0001F5FF"
+        "\U0001F680-\U0001F6FF"
+        "\U0001F1E0-\U0001F1FF"
+        "\U00002702-\U000027B0"
+        "\U000024C2-\U0001F251"
+        "\U0001F900-\U0001F9FF"
+        "\U0001FA00-\U0001FA6F"
+        "\U0001FA70-\U0001FAFF"
+        "\U00002600-\U000026FF"
+        "\U00002700-\U000027BF"
+        "\U0000FE00-\U0000FE0F"
+        "\U0001F000-\U0001F02F"
+        "\U0001F0A0-\U0001F0FF"
+        "]+",
+        flags=re.UNICODE
+    )
+    cleaned = emoji_pattern.sub('', text)
+    return re.sub(r'\s+', ' ', cleaned).strip()
+
+
+def legacy_sanitize_text(text: str, max_length: int = 1000) -> str:
+    text = text.strip()[:max_length]
+    text = re.sub(r'[\x00-\x08\x0B-\x0C\x0E-\x1F\x7F]', '', text)
+    text = html.escape(text)
+    text.encode('utf-8').decode('utf-8')
+    return text
+
+
+def legacy_set_security_headers(response, request):
+    """The old after_request hook: rebuilds the CSP and sets each header via werkzeug"""
+    is_production = os.environ.get('FLASK_ENV', '').lower() == 'production'
+    connect_src_dev = "connect-src 'self' https://nijenhuis-botenverhuur.com http://localhost:*; "
+    connect_src_prod = "connect-src 'self' https://nijenhuis-botenverhuur.com; "
+    connect_src = connect_src_prod if is_production else connect_src_dev
+    csp_policy = (
+        "default-src 'self'; "
+        "script-src 'self' 'unsafe-inline'; "
+        "style-src 'self' 'unsafe-inline'; "
+        "img-src 'self' data: https:; "
+        "font-src 'self' data:; " +
+        connect_src +
+        "frame-ancestors 'none'; "
+        "base-uri 'self'; "
+        "form-action 'self'; "
+        "object-src 'none'; "
+        "media-src 'none'; "
+        "worker-src 'none'; "
+        "manifest-src 'self';"
+    )
+    response.headers['Content-Security-Policy'] = csp_policy
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    response.headers['X-Frame-Options'] = 'DENY'
+    response.headers['X-XSS-Protection'] = '1; mode=block'
+    response.headers['Referrer-Policy'] = 'strict-origin-when-cross-origin'
+    response.headers['Permissions-Policy'] = 'geolocation=(), microphone=(), camera=(), payment=()'
+    response.headers['X-Permitted-Cross-Domain-Policies'] = 'none'
+    response.headers['Cross-Origin-Embedder-Policy'] = 'require-corp'
+    response.headers['Cross-Origin-Opener-Policy'] = 'same-origin'
+    response.headers['Cross-Origin-Resource-Policy'] = 'same-origin'
+    if request.is_secure or request.headers.get('X-Forwarded-Proto') == 'https':
+        response.headers['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains; preload'
+    return response
+
+
+def legacy_log_request(request, sink):
+    request_data = {
+        'endpoint': request.endpoint,
+        'method': request.method,
+        'ip': request.remote_addr,
+        'user_agent': request.headers.get('User-Agent', ''),
+        'timestamp': datetime.now().isoformat()
+    }
+    print(f"✅ {request.method} {request.endpoint} - 0.001s", file=sink)
+    return request_data
+
+
+# --- Benchmark ------------------------------------------------------------------
+
+def open_pipe_sink():
+    """A line-buffered pipe drained by a reader thread, like stdout under systemd"""
+    read_fd, write_fd = os.pipe()
+
+    def drain():
+        while os.read(read_fd, 65536):
+            pass
+
+    threading.Thread(target=drain, daemon=True).start()
+    return os.fdopen(write_fd, 'w', buffering=1, encoding='utf-8')
+
+
+def time_per_call(func, iterations: int) -> float:
+    """Average microseconds per call after a short warmup"""
+    for _ in range(min(1000, iterations)):
+        func()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def run_benchmark(iterations: int) -> dict:
+    # Silence startup output from importing the API module
+    with redirect_stdout(io.StringIO()):
+        from backend.chatbot.api import server
+
+    # Route the async request logger to a pipe sink for the benchmark
+    async_sink = open_pipe_sink()
+    for handler in server.request_logger.handlers:
+        handler.target_handler.setStream(async_sink)
+
+    base_headers = [('Content-Type', 'application/json'), ('Content-Length', '2')]
+    middleware = server.SecurityHeadersMiddleware(
+        lambda environ, start_response: start_response('200 OK', list(base_headers)) or [b'{}'],
+        server.SECURITY_HEADERS
+    )
+    environ = {'wsgi.url_scheme': 'http'}
+    no_op_start_response = lambda status, headers, exc_info=None: None
+
+    results = {}
+    with server.app.test_request_context('/api/chat', method='POST', headers={'User-Agent': 'bench'}):
+        from flask import request
+
+        results['security_headers'] = {
+            'before_us': time_per_call(
+                lambda: legacy_set_security_headers(server.app.response_class('{}', headers=base_headers), request),
+                iterations),
+            'after_us': time_per_call(
+                lambda: (server.app.response_class('{}', headers=base_headers), middleware(environ, no_op_start_response)),
+                iterations),
+        }
+        results['sanitize_text'] = {
+            'before_us': time_per_call(lambda: legacy_sanitize_text(SAMPLE_MESSAGE), iterations),
+            'after_us': time_per_call(lambda: server.sanitize_text(SAMPLE_MESSAGE), iterations),
+        }
+        results['remove_emojis'] = {
+            'before_us': time_per_call(lambda: legacy_remove_emojis(SAMPLE_MESSAGE), iterations),
+            'after_us': time_per_call(lambda: server.remove_emojis(SAMPLE_MESSAGE), iterations),
+        }
+
+        legacy_sink = open_pipe_sink()
+        extra = {'method': 'POST', 'endpoint': 'chat_api', 'ip': '127.0.0.1', 'duration_ms': 1.0, 'outcome': 'ok'}
+        results['request_logging'] = {
+            'before_us': time_per_call(lambda: legacy_log_request(request, legacy_sink), iterations),
+            'after_us': time_per_call(lambda: server.request_logger.info('request', extra=extra), iterations),
+        }
+
+    for handler in server.request_logger.handlers:
+        handler.stop()
+
+    total_before = sum(r['before_us'] for r in results.values())
+    total_after = sum(r['after_us'] for r in results.values())
+    results['total'] = {'before_us': total_before, 'after_us': total_after}
+    for entry in results.values():
+        entry['speedup'] = entry['before_us'] / entry['after_us'] if entry['after_us'] else None
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-request middleware overhead')
+    parser.add_argument('--iterations', type=int, default=20000, help='Calls per measurement')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    results = run_benchmark(args.iterations)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print("=" * 60)
+    print("Request Middleware Overhead (µs per request)")
+    print("=" * 60)
+    print(f"{'component':<20}{'before':>12}{'after':>12}{'speedup':>12}")
+    for name, entry in results.items():
+        print(f"{name:<20}{entry['before_us']:>12.2f}{entry['after_us']:>12.2f}{entry['speedup']:>11.1f}x")
+
+
+if __name__ == "__main__":
+    main()
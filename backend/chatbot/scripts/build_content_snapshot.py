@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Build Website Content Snapshot
+Extracts the chatbot's website content from pages/ once, at build/deploy time,
+so the API server can memory-map it instead of parsing HTML on startup
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+
+def main():
+    from backend.chatbot.core.content_snapshot import build_snapshot, check_snapshot, DEFAULT_MAX_CHARS
+
+    parser = argparse.ArgumentParser(description='Build the website content snapshot for the chatbot')
+    parser.add_argument('--output', default=None,
+                        help='Snapshot path (default: $WEBSITE_CONTENT_SNAPSHOT or backend/chatbot/data/website_content.snapshot)')
+    parser.add_argument('--pages', default=None, help='Pages directory (default: <project>/pages)')
+    parser.add_argument('--max-chars', type=int, default=DEFAULT_MAX_CHARS, help='Content size limit')
+    parser.add_argument('--check', action='store_true',
+                        help='Only report whether the existing snapshot is up to date (exit 1 if not)')
+    parser.add_argument('--force', action='store_true', help='Rebuild even if the snapshot is up to date')
+    args = parser.parse_args()
+
+    reason = check_snapshot(args.output, args.pages, args.max_chars)
+    if args.check:
+        if reason:
+            print(f"❌ Snapshot is {reason}")
+            return 1
+        print("✅ Snapshot is up to date")
+        return 0
+
+    if not reason and not args.force:
+        print("✅ Snapshot is up to date, nothing to do")
+        return 0
+
+    print("📄 Extracting content from website pages...")
+    header = build_snapshot(args.output, args.pages, args.max_chars)
+    pages_with_content = sum(1 for page in header['pages'].values() if page['length'])
+    print(f"✅ Snapshot written: {header['characters']} characters from "
+          f"{pages_with_content}/{len(header['pages'])} pages ({header['extractor']})")
+    if header['truncated']:
+        print(f"⚠️ Content truncated to {header['max_chars']} characters")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Chat API Load Test
+Drives /api/token and /api/chat with concurrent virtual users over keep-alive
+HTTP/1.1 connections and reports latency percentiles, throughput and error rates as JSON
+
+Example (against a local gunicorn):
+    python backend/chatbot/scripts/load_test.py --url http://127.0.0.1:5001 \\
+        --concurrency 20 --duration 30 --think-time 0.5 --output load_report.json
+
+The server rate-limits JWT clients (60 requests/minute by default), so 429s are
+reported separately; pass --api-key with a key created with a rate_limit_override
+to measure raw throughput instead of the limiter.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+DEFAULT_TRAINING_FILE = project_root / 'backend' / 'chatbot' / 'training' / 'data' / 'training_data.json'
+FALLBACK_QUERIES = [
+    "Wat zijn de openingstijden?",
+    "Hoeveel kost een elektrische boot?",
+    "Mogen honden mee aan boord?",
+    "What are your opening hours?",
+    "How much does a sailboat cost?",
+    "Wo kann ich parken?",
+]
+
+
+class LoadTestHTTPError(Exception):
+    """Raised when the server closes the connection or sends an unreadable response"""
+
+
+class KeepAliveConnection:
+    """Minimal HTTP/1.1 client connection reused across requests of one virtual user"""
+
+    def __init__(self, host: str, port: int, timeout: float):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self.connects = 0
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout
+        )
+        self.connects += 1
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+        self._reader = self._writer = None
+
+    async def request(self, method: str, path: str, headers: Dict[str, str],
+                      body: Optional[Dict[str, Any]] = None) -> Tuple[int, bytes]:
+        """Send one request; reconnects once if a reused connection was closed by the server"""
+        reused = self._writer is not None
+        try:
+            return await asyncio.wait_for(self._send(method, path, headers, body), self.timeout)
+        except (ConnectionError, LoadTestHTTPError, asyncio.IncompleteReadError):
+            await self.close()
+            if not reused:
+                raise
+        return await asyncio.wait_for(self._send(method, path, headers, body), self.timeout)
+
+    async def _send(self, method, path, headers, body) -> Tuple[int, bytes]:
+        if self._writer is None:
+            await self._connect()
+
+        payload = json.dumps(body).encode('utf-8') if body is not None else b''
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}", "Connection: keep-alive"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        if body is not None:
+            lines.append("Content-Type: application/json")
+        lines.append(f"Content-Length: {len(payload)}")
+        self._writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + payload)
+        await self._writer.drain()
+
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise LoadTestHTTPError("connection closed before response")
+        try:
+            status = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            raise LoadTestHTTPError(f"bad status line: {status_line!r}")
+
+        response_headers = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            data = await self._read_chunked()
+        elif 'content-length' in response_headers:
+            data = await self._reader.readexactly(int(response_headers['content-length']))
+        else:
+            data = await self._reader.read()
+            response_headers['connection'] = 'close'
+
+        if response_headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status, data
+
+    async def _read_chunked(self) -> bytes:
+        chunks = []
+        while True:
+            size = int((await self._reader.readline()).split(b';')[0], 16)
+            if size == 0:
+                # Trailer section ends with an empty line
+                while (await self._reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                return b''.join(chunks)
+            chunks.append(await self._reader.readexactly(size))
+            await self._reader.readline()
+
+
+def load_query_mix(training_file: Path) -> List[str]:
+    """Questions from training_data.json; falls back to a fixed set if the file is unavailable"""
+    try:
+        with open(training_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return list(FALLBACK_QUERIES)
+
+    sessions = data.get('training_sessions', []) if isinstance(data, dict) else data
+    questions = [s.get('question', '').strip() for s in sessions if isinstance(s, dict)]
+    questions = [q for q in questions if q and len(q) <= 1000]
+    return questions or list(FALLBACK_QUERIES)
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, int(-(-pct * len(sorted_values) // 100)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize_latencies(latencies_ms: List[float]) -> Dict[str, Optional[float]]:
+    ordered = sorted(latencies_ms)
+    summary = {
+        'min': ordered[0] if ordered else None,
+        'mean': sum(ordered) / len(ordered) if ordered else None,
+        'p50': percentile(ordered, 50),
+        'p95': percentile(ordered, 95),
+        'p99': percentile(ordered, 99),
+        'max': ordered[-1] if ordered else None,
+    }
+    return {k: (round(v, 2) if v is not None else None) for k, v in summary.items()}
+
+
+class LoadTest:
+    """Virtual users sharing a request budget and a stop time"""
+
+    def __init__(self, url: str, origin: str, concurrency: int, duration: Optional[float],
+                 total_requests: Optional[int], think_time: float, session_reuse: float,
+                 queries: List[str], api_key: Optional[str] = None, timeout: float = 30.0,
+                 seed: Optional[int] = None):
+        parts = urlsplit(url)
+        if parts.scheme != 'http':
+            raise ValueError("Only plain http:// targets are supported (run against a local gunicorn)")
+        self.host = parts.hostname or '127.0.0.1'
+        self.port = parts.port or 80
+        self.base_path = parts.path.rstrip('/')
+        self.origin = origin
+        self.concurrency = concurrency
+        self.duration = duration
+        self.total_requests = total_requests
+        self.think_time = think_time
+        self.session_reuse = session_reuse
+        self.queries = queries
+        self.api_key = api_key
+        self.timeout = timeout
+        self.random = random.Random(seed)
+
+        self.latencies_ms: List[float] = []
+        self.token_latencies_ms: List[float] = []
+        self.status_counts: Counter = Counter()
+        self.error_messages: Counter = Counter()
+        self.transport_errors = 0
+        self.token_failures = 0
+        self.sessions_started = 0
+        self.connections_opened = 0
+        self._issued = 0
+        self._deadline = None
+
+    def _take_request_slot(self) -> bool:
+        if self._deadline is not None and time.monotonic() >= self._deadline:
+            return False
+        if self.total_requests is not None:
+            if self._issued >= self.total_requests:
+                return False
+            self._issued += 1
+        return True
+
+    async def _mint_token(self, conn: KeepAliveConnection) -> Optional[str]:
+        start = time.perf_counter()
+        try:
+            status, body = await conn.request('GET', f"{self.base_path}/api/token", {'Origin': self.origin})
+        except (OSError, asyncio.TimeoutError, LoadTestHTTPError, asyncio.IncompleteReadError) as e:
+            self.error_messages[f"token: {type(e).__name__}"] += 1
+            self.token_failures += 1
+            return None
+        self.token_latencies_ms.append((time.perf_counter() - start) * 1000)
+        if status != 200:
+            self.error_messages[f"token: HTTP {status}"] += 1
+            self.token_failures += 1
+            return None
+        return json.loads(body).get('token')
+
+    def _new_session_id(self) -> str:
+        self.sessions_started += 1
+        return f"loadtest_{uuid.uuid4().hex[:16]}"
+
+    async def _user(self, user_index: int):
+        conn = KeepAliveConnection(self.host, self.port, self.timeout)
+        headers = {'Origin': self.origin}
+        try:
+            if self.api_key:
+                headers['X-API-Key'] = self.api_key
+            else:
+                token = await self._mint_token(conn)
+                if not token:
+                    return
+                headers['Authorization'] = f"Bearer {token}"
+
+            session_id = self._new_session_id()
+            # Stagger start so users don't arrive in lockstep
+            await asyncio.sleep(self.random.uniform(0, self.think_time))
+            while self._take_request_slot():
+                if self.random.random() >= self.session_reuse:
+                    session_id = self._new_session_id()
+                body = {'message': self.random.choice(self.queries), 'session_id': session_id}
+
+                start = time.perf_counter()
+                try:
+                    status, data = await conn.request('POST', f"{self.base_path}/api/chat", headers, body)
+                except (OSError, asyncio.TimeoutError, LoadTestHTTPError, asyncio.IncompleteReadError) as e:
+                    self.transport_errors += 1
+                    self.error_messages[type(e).__name__] += 1
+                else:
+                    self.latencies_ms.append((time.perf_counter() - start) * 1000)
+                    self.status_counts[status] += 1
+                    if status != 200:
+                        try:
+                            message = json.loads(data).get('error', '')
+                        except (ValueError, AttributeError):
+                            message = ''
+                        self.error_messages[f"HTTP {status}: {message}"[:120]] += 1
+
+                if self.think_time > 0:
+                    # Exponential think time gives a Poisson-like arrival pattern per user
+                    await asyncio.sleep(self.random.expovariate(1.0 / self.think_time))
+        finally:
+            self.connections_opened += conn.connects
+            await conn.close()
+
+    async def run(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        if self.duration is not None:
+            self._deadline = time.monotonic() + self.duration
+        await asyncio.gather(*(self._user(i) for i in range(self.concurrency)))
+        elapsed = time.perf_counter() - started
+        return self.report(elapsed)
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        completed = sum(self.status_counts.values())
+        attempted = completed + self.transport_errors
+        successes = self.status_counts.get(200, 0)
+        rate_limited = self.status_counts.get(429, 0)
+        return {
+            'target': f"http://{self.host}:{self.port}{self.base_path}",
+            'config': {
+                'concurrency': self.concurrency,
+                'duration_s': self.duration,
+                'requests': self.total_requests,
+                'think_time_s': self.think_time,
+                'session_reuse': self.session_reuse,
+                'query_mix_size': len(self.queries),
+                'auth': 'api_key' if self.api_key else 'jwt',
+            },
+            'elapsed_s': round(elapsed, 3),
+            'requests': attempted,
+            'successes': successes,
+            'rps': round(completed / elapsed, 2) if elapsed else 0.0,
+            'success_rps': round(successes / elapsed, 2) if elapsed else 0.0,
+            'latency_ms': summarize_latencies(self.latencies_ms),
+            'token_latency_ms': summarize_latencies(self.token_latencies_ms),
+            'status_counts': {str(k): v for k, v in sorted(self.status_counts.items())},
+            'error_rate': round((attempted - successes) / attempted, 4) if attempted else 0.0,
+            'rate_limited_rate': round(rate_limited / attempted, 4) if attempted else 0.0,
+            'transport_errors': self.transport_errors,
+            'token_failures': self.token_failures,
+            'sessions_started': self.sessions_started,
+            'connections_opened': self.connections_opened,
+            'errors': dict(self.error_messages.most_common(10)),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the chat API')
+    parser.add_argument('--url', default='http://127.0.0.1:5001', help='Base URL of the API server')
+    parser.add_argument('--origin', default=None,
+                        help='Origin header used for /api/token and /api/chat (defaults to the base URL)')
+    parser.add_argument('--concurrency', type=int, default=10, help='Number of virtual users')
+    parser.add_argument('--duration', type=float, default=None, help='Run for this many seconds')
+    parser.add_argument('--requests', type=int, default=None, help='Stop after this many chat requests')
+    parser.add_argument('--think-time', type=float, default=1.0,
+                        help='Mean seconds a user waits between requests (exponential, 0 = closed loop)')
+    parser.add_argument('--session-reuse', type=float, default=0.8,
+                        help='Probability that a request continues the current conversation session')
+    parser.add_argument('--training-file', default=str(DEFAULT_TRAINING_FILE), help='Source of the query mix')
+    parser.add_argument('--api-key', default=None,
+                        help='Use an X-API-Key (e.g. one with rate_limit_override) instead of minting JWTs')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Per-request timeout in seconds')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed for a reproducible query mix')
+    parser.add_argument('--output', default=None, help='Also write the JSON report to this file')
+    args = parser.parse_args()
+
+    if args.duration is None and args.requests is None:
+        args.duration = 30.0
+    if not 0.0 <= args.session_reuse <= 1.0:
+        parser.error('--session-reuse must be between 0 and 1')
+
+    load_test = LoadTest(
+        url=args.url,
+        origin=(args.origin or args.url).rstrip('/'),
+        concurrency=args.concurrency,
+        duration=args.duration,
+        total_requests=args.requests,
+        think_time=args.think_time,
+        session_reuse=args.session_reuse,
+        queries=load_query_mix(Path(args.training_file)),
+        api_key=args.api_key,
+        timeout=args.timeout,
+        seed=args.seed,
+    )
+    report = asyncio.run(load_test.run())
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    print(output)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+    return 0 if report['successes'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Report Gunicorn Worker Memory
+Shows RSS, PSS and USS of the chatbot's gunicorn master and workers, i.e. how
+much of each worker's memory is actually shared with the preloaded master
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+DEFAULT_PIDFILE = "/tmp/nijenhuis-chatbot.pid"  # pidfile in gunicorn.conf.py
+
+
+def main():
+    from backend.chatbot.core.process_memory import worker_memory_report
+
+    parser = argparse.ArgumentParser(description='Report USS/PSS of the gunicorn master and workers')
+    parser.add_argument('--pid', type=int, default=None, help='Gunicorn master pid (default: read the pidfile)')
+    parser.add_argument('--pidfile', default=DEFAULT_PIDFILE, help='Gunicorn pidfile')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args()
+
+    master_pid = args.pid
+    if master_pid is None:
+        try:
+            master_pid = int(Path(args.pidfile).read_text().strip())
+        except (OSError, ValueError) as e:
+            print(f"❌ Could not read master pid from {args.pidfile}: {e}")
+            return 1
+
+    report = worker_memory_report(master_pid)
+    if report['master'] is None:
+        print(f"❌ No memory information for pid {master_pid} (process gone or /proc unavailable)")
+        return 1
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    def row(label, usage):
+        shared_pct = usage['shared_kb'] / usage['rss_kb'] * 100 if usage['rss_kb'] else 0.0
+        return (f"{label:<16}{usage['rss_kb'] / 1024:>10.1f}{usage['pss_kb'] / 1024:>10.1f}"
+                f"{usage['uss_kb'] / 1024:>10.1f}{usage['shared_kb'] / 1024:>10.1f}{shared_pct:>9.0f}%")
+
+    print("=" * 65)
+    print("Gunicorn Memory (MiB)")
+    print("=" * 65)
+    print(f"{'process':<16}{'RSS':>10}{'PSS':>10}{'USS':>10}{'shared':>10}{'shared':>10}")
+    print(row(f"master {master_pid}", report['master']))
+    for pid, usage in report['workers'].items():
+        print(row(f"child {pid}", usage))
+
+    totals = report['totals']
+    print("-" * 65)
+    print(f"{'total':<16}{totals['rss_kb'] / 1024:>10.1f}{totals['pss_kb'] / 1024:>10.1f}{totals['uss_kb'] / 1024:>10.1f}")
+    print(f"\n💾 Sharing saves {totals['saved_by_sharing_kb'] / 1024:.1f} MiB across {totals['processes']} processes "
+          f"(actual footprint ≈ PSS total)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Admin Session Tests for Nijenhuis
+Tests the in-memory session cache of admin/booking-handler.py and when it
+writes the sessions file
+"""
+
+import unittest
+import importlib.util
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+# Add the project root to the path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.append(PROJECT_ROOT)
+
+
+class TestAdminSessionCache(unittest.TestCase):
+    """Test file-based admin sessions behind the process cache"""
+
+    def setUp(self):
+        spec = importlib.util.spec_from_file_location(
+            'booking_handler', os.path.join(PROJECT_ROOT, 'admin', 'booking-handler.py'))
+        self.handler = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.handler)
+
+        # The sessions "file" is a dict; writes are recorded
+        self.file = {}
+        self.writes = []
+
+        self.before_save = None
+
+        def save(sessions):
+            if self.before_save:
+                self.before_save()
+            self.file = {token: dict(session) for token, session in sessions.items()}
+            self.writes.append(self.file)
+            return True
+
+        patches = [
+            patch.object(self.handler, 'load_sessions', side_effect=lambda: dict(self.file)),
+            patch.object(self.handler, 'save_sessions', side_effect=save),
+            patch.object(self.handler, 'session_backend', return_value=None),
+            patch.object(self.handler, '_ensure_session_flusher'),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        # Nothing left for the module's atexit flush to write to the real file
+        self.addCleanup(setattr, self.handler, '_session_cache', None)
+
+    def test_validation_does_not_write(self):
+        """Test that repeated validation only touches memory until the flush"""
+        token = self.handler.create_session('admin')
+        self.assertEqual(len(self.writes), 1)
+        first_seen = self.file[token]['last_used']
+
+        for _ in range(50):
+            self.assertEqual(self.handler.validate_session(token), 'admin')
+        self.assertEqual(len(self.writes), 1)
+
+        self.assertTrue(self.handler.flush_sessions())
+        self.assertEqual(len(self.writes), 2)
+        self.assertGreaterEqual(self.file[token]['last_used'], first_seen)
+        # Nothing changed since: no write
+        self.handler.flush_sessions()
+        self.assertEqual(len(self.writes), 2)
+
+    def test_sessions_loaded_from_file(self):
+        """Test that sessions written before a restart are accepted"""
+        expires = (datetime.now() + timedelta(hours=1)).isoformat()
+        self.file = {'abc': {'username': 'manager', 'expires_at': expires, 'last_used': expires}}
+        self.assertEqual(self.handler.validate_session('abc'), 'manager')
+        self.assertIsNone(self.handler.validate_session('unknown'))
+
+    def test_expired_sessions_swept(self):
+        """Test that the sweeper drops expired sessions and the flush persists that"""
+        token = self.handler.create_session('admin')
+        expired = (datetime.now() - timedelta(seconds=1)).isoformat()
+        with self.handler.session_lock:
+            self.handler._cached_sessions()[token]['expires_at'] = expired
+
+        self.handler.sweep_expired_sessions()
+        self.handler.flush_sessions()
+        self.assertNotIn(token, self.file)
+        self.assertIsNone(self.handler.validate_session(token))
+
+    def test_logout_written_immediately(self):
+        """Test that delete_session persists right away"""
+        token = self.handler.create_session('admin')
+        self.handler.delete_session(token)
+        self.assertEqual(self.file, {})
+        self.assertIsNone(self.handler.validate_session(token))
+
+    def test_stale_flush_cannot_resurrect_logout(self):
+        """Test that a flush snapshotted before a logout is not written after it"""
+        token = self.handler.create_session('admin')
+        self.handler.validate_session(token)
+        saving, release = threading.Event(), threading.Event()
+
+        def slow_first_save():
+            self.before_save = None
+            saving.set()
+            release.wait(5)
+
+        self.before_save = slow_first_save
+        flusher = threading.Thread(target=self.handler.flush_sessions)
+        flusher.start()
+        self.assertTrue(saving.wait(5))
+
+        logout = threading.Thread(target=self.handler.delete_session, args=(token,))
+        logout.start()
+        # Validation is not held up by the pending write
+        self.assertIsNone(self.handler.validate_session('unknown'))
+        release.set()
+        flusher.join(5)
+        logout.join(5)
+        self.assertNotIn(token, self.file)
+
+
+if __name__ == "__main__":
+    unittest.main()
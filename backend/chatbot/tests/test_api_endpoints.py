@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+API Endpoint Tests for Nijenhuis Chatbot
+Tests for the Flask API served through the test client
+"""
+
+import unittest
+import atexit
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from unittest.mock import patch
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+# Shared tables and files of this test run, never those of a running server
+TEST_STATE_DIR = tempfile.mkdtemp(prefix='nijenhuis_test_')
+atexit.register(shutil.rmtree, TEST_STATE_DIR, True)
+os.environ['RATE_LIMIT_SHM_PATH'] = os.path.join(TEST_STATE_DIR, 'ratelimit')
+os.environ['IP_BLOCK_FILE'] = os.path.join(TEST_STATE_DIR, 'ipblocks.json')
+os.environ['INVALIDATION_DIR'] = os.path.join(TEST_STATE_DIR, 'invalidation')
+
+from backend.chatbot.api import server
+
+
+class TestStaticMetadataEndpoints(unittest.TestCase):
+    """Test precomputed metadata endpoints"""
+
+    def setUp(self):
+        self.client = server.app.test_client()
+
+    def test_config_served_with_etag(self):
+        """Config endpoint returns cacheable JSON with an ETag"""
+        response = self.client.get('/api/config')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['name'], 'Nijenhuis Customer Support Chatbot')
+        self.assertIn('ETag', response.headers)
+        self.assertIn('max-age', response.headers['Cache-Control'])
+
+    def test_if_none_match_returns_304(self):
+        """Matching If-None-Match returns 304 without a body"""
+        for path in ('/api/config', '/api/languages', '/api/neural-network/info'):
+            etag = self.client.get(path).headers['ETag']
+            response = self.client.get(path, headers={'If-None-Match': etag})
+            self.assertEqual(response.status_code, 304, path)
+            self.assertEqual(response.data, b'')
+            self.assertEqual(response.headers['ETag'], etag)
+
+    def test_neural_network_parameter_count(self):
+        """Parameter count matches the weights of an actual network"""
+        from backend.chatbot.core.neural_network import NeuralNetwork
+        network = NeuralNetwork(server.NEURAL_NETWORK_LAYERS)
+        expected = sum(w.size + b.size for w, b in zip(network.weights, network.biases))
+
+        info = self.client.get('/api/neural-network/info').json
+        self.assertEqual(info['architecture']['total_parameters'], expected)
+        self.assertEqual(info['architecture']['hidden_layers'], [64, 32])
+
+
+class TestSecurityHeaders(unittest.TestCase):
+    """Test the precomputed security header middleware"""
+
+    def setUp(self):
+        self.client = server.app.test_client()
+
+    def test_security_headers_added_once(self):
+        """Every response carries the precomputed header set exactly once"""
+        response = self.client.get('/api/languages', base_url='http://localhost')
+        self.assertEqual(len(response.headers.getlist('Content-Security-Policy')), 1)
+        self.assertEqual(response.headers['X-Frame-Options'], 'DENY')
+        self.assertNotIn('Strict-Transport-Security', response.headers)
+
+    def test_hsts_only_over_https(self):
+        """HSTS is added when the proxy reports HTTPS"""
+        response = self.client.get('/api/languages', base_url='http://localhost',
+                                   headers={'X-Forwarded-Proto': 'https'})
+        self.assertIn('Strict-Transport-Security', response.headers)
+
+
+class TestLearningSnapshot(unittest.TestCase):
+    """Test the shared learning statistics snapshot"""
+
+    def setUp(self):
+        from backend.chatbot.core.unsupervised_learning import UnsupervisedLearning, LearningStatsSnapshot
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.learning = UnsupervisedLearning(data_file=os.path.join(self.temp_dir.name, 'learning.json'))
+        self.snapshot = LearningStatsSnapshot(self.learning, server.precompute_json_response, refresh_interval=3600)
+
+    def tearDown(self):
+        self.snapshot.stop()
+        self.temp_dir.cleanup()
+
+    def test_snapshot_only_rebuilds_after_changes(self):
+        """Refresh is a no-op until a new interaction is recorded"""
+        first = self.snapshot.get('stats')
+        self.assertFalse(self.snapshot.refresh())
+        self.assertIs(self.snapshot.get('stats'), first)
+
+        self.learning.record_interaction("Wat kost een zeilboot?", "€70 per dag.", True, 0.2)
+        self.assertTrue(self.snapshot.refresh())
+        self.assertNotEqual(self.snapshot.get('stats')['etag'], first['etag'])
+
+    def test_file_written_outside_the_lock(self):
+        """Statistics stay readable while an interaction is written; later writes are coalesced"""
+        writing, release = threading.Event(), threading.Event()
+        write_data = self.learning._write_data
+
+        def slow_write(content):
+            writing.set()
+            release.wait(5)
+            write_data(content)
+
+        self.learning._write_data = slow_write
+        recorder = threading.Thread(target=self.learning.record_interaction,
+                                    args=("Wat kost een sloep?", "€150 per dag.", True, 0.1))
+        recorder.start()
+        self.assertTrue(writing.wait(5))
+
+        self.assertTrue(self.learning._lock.acquire(timeout=1))
+        self.learning._lock.release()
+        # Returns at once: the running write picks it up
+        self.learning.record_interaction("Hoe laat zijn jullie open?", "Vanaf 9 uur.", True, 0.1)
+        self.assertEqual(self.learning.get_statistics()['total_interactions'], 2)
+
+        release.set()
+        recorder.join(5)
+        with open(self.learning.data_file, encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['statistics']['total_interactions'], 2)
+
+    def test_learning_endpoints_use_snapshot(self):
+        """Learning endpoints serve the app-owned snapshot"""
+        client = server.app.test_client()
+        stats = client.get('/api/learning/stats')
+        self.assertEqual(stats.status_code, 200)
+        self.assertIn('success_rate', stats.json)
+        self.assertIn('private', stats.headers['Cache-Control'])
+
+        improvements = client.get('/api/learning/improvements')
+        self.assertEqual(improvements.status_code, 200)
+        self.assertIn('improvements', improvements.json)
+        self.assertIs(server.learning_snapshot.learning, server.chatbot.learning_system)
+
+
+class TestSharedHealthMonitor(unittest.TestCase):
+    """Test what the shared monitor process publishes to the workers"""
+
+    def setUp(self):
+        from backend.chatbot.core.connection_monitor import ConnectionMonitor
+        from backend.chatbot.core.health_board import SharedHealthBoard
+        self.board = SharedHealthBoard()
+        with patch.dict(os.environ, {'CONNECTIVITY_PROBE_HOSTS': '192.0.2.1:53'}):
+            self.sidecar = ConnectionMonitor()
+        self.sidecar.set_health_probe(server._in_process_health_probe)
+        self.sidecar.publish_to(self.board)
+
+    def _run_one_check(self):
+        def stop(seconds):
+            self.sidecar.is_monitoring = False
+        self.sidecar.is_monitoring = True
+        with patch('socket.create_connection', side_effect=OSError('unreachable')), \
+                patch('backend.chatbot.core.connection_monitor.time.sleep', side_effect=stop):
+            self.sidecar._monitoring_loop()
+
+    def test_failed_internet_probe_keeps_chat_available(self):
+        """A failed internet probe degrades the status but /api/chat still answers"""
+        self._run_one_check()
+        self.assertEqual(self.sidecar.status.value, 'degraded')
+        self.assertFalse(self.board.read()['internet_available'])
+
+        token = server.security_manager.generate_jwt_token('test', ['chat'])
+        with patch.object(server.connection_monitor, 'shared_board', self.board):
+            self.assertTrue(server.connection_monitor.get_health_snapshot().is_healthy)
+            response = server.app.test_client().post(
+                '/api/chat', json={'message': 'Hoe laat zijn jullie open?'},
+                headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.json.get('response_type'), 'fallback')
+
+    def test_health_probe_bypasses_response_cache(self):
+        """Every probe runs the knowledge base matchers instead of a cached answer"""
+        knowledge_base = server.chatbot.knowledge_base
+        knowledge_base.answer_query('openingstijden', 'nl')
+        with patch.object(knowledge_base, 'detect_intent', side_effect=RuntimeError('broken')):
+            with self.assertRaises(RuntimeError):
+                server._in_process_health_probe()
+
+
+class TestWorkerWarmup(unittest.TestCase):
+    """Test the post_worker_init warm-up replay"""
+
+    def test_warmup_replays_common_questions_without_recording(self):
+        from backend.chatbot.core.unsupervised_learning import UnsupervisedLearning
+        from backend.chatbot.core.warmup import warm_up_chatbot
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            learning = UnsupervisedLearning(data_file=os.path.join(temp_dir, 'learning.json'))
+            for question, times in (("Wat kost een zeilboot?", 3), ("Hoe laat zijn jullie open?", 2), ("Hallo", 1)):
+                for _ in range(times):
+                    learning.record_interaction(question, "antwoord", True, 0.1)
+            self.assertEqual(learning.get_common_questions(2), ["wat kost een zeilboot?", "hoe laat zijn jullie open?"])
+
+            original_learning = server.chatbot.learning_system
+            server.chatbot.learning_system = learning
+            server.chatbot.knowledge_base.clear_cache()
+            try:
+                summary = warm_up_chatbot(server.chatbot, server.NIJENHUIS_WEBSITE_CONTENT, limit=2, components=[])
+            finally:
+                server.chatbot.learning_system = original_learning
+
+            self.assertEqual(summary['questions'], 2)
+            self.assertEqual(learning.interaction_data['statistics']['total_interactions'], 6)
+            self.assertIn("wat kost een zeilboot?:nl", server.chatbot.knowledge_base._response_cache)
+
+    def test_warmup_can_be_disabled(self):
+        from backend.chatbot.core.warmup import warm_up_chatbot
+        self.assertEqual(warm_up_chatbot(server.chatbot, limit=0)['questions'], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Atomic JSON Tests for Nijenhuis
+Tests the shared writes of bookings.json/boats.json and that damaged files
+are reported instead of read as empty
+"""
+
+import unittest
+import fcntl
+import importlib.util
+import json
+import multiprocessing
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from http.server import HTTPServer
+from unittest.mock import patch
+
+# Add the project root to the path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.append(PROJECT_ROOT)
+
+from backend.shared.atomic_json import JSONFileError, read_json, update_json, write_json
+from backend.shared.booking_store import BookingStore
+
+
+def increment(data):
+    data['count'] += 1
+    return data
+
+
+def increment_many(path, times):
+    """Worker process: read-modify-write the counter"""
+    for _ in range(times):
+        update_json(path, increment)
+
+
+class TestAtomicJSON(unittest.TestCase):
+    """Test atomic writes, locking and damaged-file handling"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'bookings.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_no_lost_updates(self):
+        """Test concurrent read-modify-write from threads and processes"""
+        write_json(self.path, {'count': 0})
+        threads = [threading.Thread(target=increment_many, args=(self.path, 25)) for _ in range(4)]
+        processes = [multiprocessing.get_context('fork').Process(target=increment_many, args=(self.path, 25))
+                     for _ in range(2)]
+        for worker in threads + processes:
+            worker.start()
+        for worker in threads + processes:
+            worker.join()
+        self.assertEqual(read_json(self.path)['count'], 150)
+
+    def test_readers_never_see_partial_file(self):
+        """Test that readers see a complete old or new version during rewrites"""
+        write_json(self.path, [{'id': 'b0', 'notes': 'x' * 1000}] * 200)
+        stop = threading.Event()
+
+        def rewrite():
+            n = 0
+            while not stop.is_set():
+                n += 1
+                write_json(self.path, [{'id': f'b{n}', 'notes': 'x' * 1000}] * 200)
+
+        writer = threading.Thread(target=rewrite)
+        writer.start()
+        try:
+            for _ in range(200):
+                self.assertEqual(len(read_json(self.path, retries=0)), 200)
+        finally:
+            stop.set()
+            writer.join()
+        leftovers = [name for name in os.listdir(self.temp_dir) if name.endswith('.tmp')]
+        self.assertEqual(leftovers, [])
+
+    def test_missing_and_damaged_files(self):
+        """Test that a missing file gives the default and a damaged one raises"""
+        self.assertEqual(read_json(self.path, default=[]), [])
+        with open(self.path, 'w') as f:
+            f.write('[{"id": "b1", "boatType": "sl')
+        with self.assertRaises(JSONFileError):
+            read_json(self.path, default=[], retry_delay=0.001)
+        # A damaged file is not overwritten by an update either
+        with self.assertRaises(JSONFileError):
+            update_json(self.path, lambda data: data, default=[])
+
+    def test_unchanged_update_and_permissions(self):
+        """Test that None leaves the file alone and writes keep the file mode"""
+        write_json(self.path, [1])
+        os.chmod(self.path, 0o640)
+        mtime = os.stat(self.path).st_mtime_ns
+        self.assertFalse(update_json(self.path, lambda data: None))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, mtime)
+
+        self.assertTrue(update_json(self.path, lambda data: data + [2]))
+        self.assertEqual(read_json(self.path), [1, 2])
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o640)
+
+    def test_replace_waits_for_in_place_writer(self):
+        """Test that a rename waits for a writer holding the target file's lock (PHP style)"""
+        write_json(self.path, [1])
+        done = threading.Event()
+        with open(self.path, 'r+') as in_place:
+            fcntl.flock(in_place, fcntl.LOCK_EX)
+            writer = threading.Thread(target=lambda: (write_json(self.path, [2]), done.set()))
+            writer.start()
+            self.assertFalse(done.wait(0.2))
+            in_place.seek(0)
+            in_place.truncate()
+            in_place.write('[1, 1]')
+            in_place.flush()
+            fcntl.flock(in_place, fcntl.LOCK_UN)
+        self.assertTrue(done.wait(5))
+        writer.join()
+        self.assertEqual(read_json(self.path), [2])
+
+    def test_store_refuses_damaged_bookings_file(self):
+        """Test that the booking store does not migrate a damaged bookings.json as empty"""
+        with open(self.path, 'w') as f:
+            f.write('[{"id": "b1"')
+        with self.assertRaises(JSONFileError):
+            BookingStore(os.path.join(self.temp_dir, 'bookings.db'), self.path)
+
+
+class TestUnavailableData(unittest.TestCase):
+    """Test that the booking handler answers 503 for damaged data"""
+
+    def setUp(self):
+        spec = importlib.util.spec_from_file_location(
+            'booking_handler', os.path.join(PROJECT_ROOT, 'admin', 'booking-handler.py'))
+        self.handler = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.handler)
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.boats_path = os.path.join(self.temp_dir, 'boats.json')
+        with open(self.boats_path, 'w') as f:
+            f.write('[{"id": "sloep", "tot')
+
+        patches = [
+            patch.object(self.handler.BookingHandler, '_boats_path', lambda handler: self.boats_path),
+            patch.object(self.handler, 'read_json',
+                         lambda path, default=None: read_json(path, default, retry_delay=0.001)),
+            patch.object(self.handler.BookingHandler, 'log_message'),
+            patch.object(self.handler, 'print', create=True),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+        self.server = HTTPServer(('127.0.0.1', 0), self.handler.BookingHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/admin/booking-handler.py'
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def request(self, data=None, query=''):
+        body = json.dumps(data).encode() if data is not None else None
+        request = urllib.request.Request(self.url + query, data=body, headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    def test_damaged_boats_file(self):
+        """Test that boats and cart checks fail with 503 instead of an empty fleet"""
+        status, body = self.request(query='?action=boats')
+        self.assertEqual(status, 503)
+        self.assertFalse(body['success'])
+
+        status, _ = self.request({'action': 'validateCartAvailability',
+                                  'items': [{'boatId': 'sloep', 'startDate': '2026-07-01'}]})
+        self.assertEqual(status, 503)
+
+        with open(self.boats_path, 'w') as f:
+            json.dump([{'id': 'sloep', 'total': 1}], f)
+        status, body = self.request(query='?action=boats')
+        self.assertEqual((status, body['boats'][0]['id']), (200, 'sloep'))
+
+
+if __name__ == "__main__":
+    unittest.main()
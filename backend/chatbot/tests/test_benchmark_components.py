@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Component Benchmark Tests for Nijenhuis Chatbot
+Tests baseline comparison and statistics of the benchmark suite
+"""
+
+import unittest
+import os
+import sys
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from backend.chatbot.scripts.benchmark_components import compare, measure
+
+
+class TestBaselineComparison(unittest.TestCase):
+    """Test regression detection against a stored baseline"""
+
+    def setUp(self):
+        self.baseline = {'benchmarks': {
+            'language_detection': {'median_us': 20.0},
+            'similarity': {'median_us': 4.0},
+            'translate_boat_names': {'median_us': 2.0},
+        }}
+
+    def test_statuses(self):
+        results = {
+            'language_detection': {'median_us': 26.0},   # +30%
+            'similarity': {'median_us': 4.4},            # +10%
+            'translate_boat_names': {'median_us': 1.0},  # -50%
+            'conversation_context': {'median_us': 50.0},
+        }
+        comparison = compare(results, self.baseline, threshold_pct=25)
+        self.assertEqual(comparison['language_detection']['status'], 'regressed')
+        self.assertAlmostEqual(comparison['language_detection']['change_pct'], 30.0)
+        self.assertEqual(comparison['similarity']['status'], 'ok')
+        self.assertEqual(comparison['translate_boat_names']['status'], 'improved')
+        self.assertEqual(comparison['conversation_context']['status'], 'new')
+
+    def test_threshold_is_configurable(self):
+        comparison = compare({'similarity': {'median_us': 4.4}}, self.baseline, threshold_pct=5)
+        self.assertEqual(comparison['similarity']['status'], 'regressed')
+
+    def test_measure_reports_statistics(self):
+        calls = []
+        stats = measure(lambda: calls.append(1), inner=10, rounds=3, warmup=5)
+        self.assertEqual(len(calls), 35)
+        self.assertLessEqual(stats['min_us'], stats['median_us'])
+        self.assertLessEqual(stats['median_us'], stats['max_us'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Booking Server Tests for Nijenhuis
+Tests the pooled keep-alive server of admin/booking-handler.py
+"""
+
+import unittest
+import http.client
+import importlib.util
+import json
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+
+# Add the project root to the path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.append(PROJECT_ROOT)
+
+from backend.shared.booking_store import BookingStore
+
+API_PATH = '/admin/booking-handler.py'
+
+
+class TestPooledBookingServer(unittest.TestCase):
+    """Test concurrency and keep-alive of the booking server"""
+
+    def setUp(self):
+        spec = importlib.util.spec_from_file_location(
+            'booking_handler', os.path.join(PROJECT_ROOT, 'admin', 'booking-handler.py'))
+        self.handler = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.handler)
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = BookingStore(os.path.join(self.temp_dir, 'bookings.db'), None)
+        self.boats_path = os.path.join(self.temp_dir, 'boats.json')
+        with open(self.boats_path, 'w', encoding='utf-8') as f:
+            json.dump([{'id': 'sloep', 'total': 1}], f)
+
+        patches = [
+            patch.object(self.handler, 'get_booking_store', return_value=self.store),
+            patch.object(self.handler.BookingHandler, '_boats_path', lambda handler: self.boats_path),
+            patch.object(self.handler.BookingHandler, 'log_message'),
+            patch.object(self.handler, 'print', create=True),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+        self.server = self.handler.PooledHTTPServer(('127.0.0.1', 0), self.handler.BookingHandler, workers=4)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.port = self.server.server_address[1]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.store.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_keep_alive_reuses_connection(self):
+        """Test that several requests, including errors, share one connection"""
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=5)
+        self.addCleanup(conn.close)
+        sockets = set()
+        for method, path, body in [
+            ('GET', f'{API_PATH}?action=boats', None),
+            ('POST', API_PATH, json.dumps({'action': 'validateCartAvailability',
+                                           'items': [{'boatId': 'sloep', 'startDate': '2026-07-01'}]})),
+            ('POST', API_PATH, json.dumps({'action': 'noSuchAction'})),
+            ('GET', f'{API_PATH}?action=availability&from=2026-07-01&to=2026-07-02', None),
+        ]:
+            conn.request(method, path, body=body, headers={'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            response.read()
+            self.assertFalse(response.will_close)
+            sockets.add(id(conn.sock))
+        self.assertEqual(len(sockets), 1)
+
+    def test_stalled_client_does_not_block_others(self):
+        """Test that a client that never finishes its request does not hold up the server"""
+        stalled = socket.create_connection(('127.0.0.1', self.port))
+        self.addCleanup(stalled.close)
+        stalled.sendall(f'POST {API_PATH} HTTP/1.1\r\nContent-Length: 100\r\n\r\n{{"act'.encode())
+        time.sleep(0.1)
+
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=2)
+        self.addCleanup(conn.close)
+        conn.request('GET', f'{API_PATH}?action=boats')
+        self.assertEqual(json.loads(conn.getresponse().read())['boats'][0]['id'], 'sloep')
+
+    def test_idle_keep_alive_connections_free_workers(self):
+        """Test that idle keep-alive connections do not starve clients beyond the pool size"""
+        server = self.handler.PooledHTTPServer(('127.0.0.1', 0), self.handler.BookingHandler, workers=2)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        port = server.server_address[1]
+
+        idle = []
+        for _ in range(2):
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            self.addCleanup(conn.close)
+            conn.request('GET', f'{API_PATH}?action=boats')
+            conn.getresponse().read()
+            idle.append(conn)
+
+        started = time.monotonic()
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+        self.addCleanup(conn.close)
+        conn.request('GET', f'{API_PATH}?action=boats')
+        self.assertEqual(conn.getresponse().status, 200)
+        self.assertLess(time.monotonic() - started, 1.0)
+
+        # A client whose idle connection was closed reconnects on its next request
+        idle[0].close()
+        idle[0].request('GET', f'{API_PATH}?action=boats')
+        self.assertEqual(idle[0].getresponse().status, 200)
+
+    def test_pipelined_requests_answered(self):
+        """Test that a request already buffered behind the previous one is not left waiting"""
+        sock = socket.create_connection(('127.0.0.1', self.port), timeout=2)
+        self.addCleanup(sock.close)
+        request = f'GET {API_PATH}?action=boats HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode()
+        sock.sendall(request * 2)
+        received = b''
+        started = time.monotonic()
+        while received.count(b'HTTP/1.1 200') < 2:
+            chunk = sock.recv(65536)
+            self.assertTrue(chunk)
+            received += chunk
+        self.assertLess(time.monotonic() - started, 1.0)
+
+    def test_concurrent_boat_saves_keep_file_valid(self):
+        """Test that parallel saveBoats writes never leave a partial boats.json"""
+        handler = self.handler.BookingHandler.__new__(self.handler.BookingHandler)
+        handler.project_root = PROJECT_ROOT
+
+        def save(n):
+            for i in range(20):
+                self.assertTrue(handler.save_boats([{'id': f'boat{n}', 'total': i, 'pad': 'x' * 5000}]))
+
+        threads = [threading.Thread(target=save, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for _ in range(50):
+            boats = handler.load_boats()
+            self.assertEqual(len(boats), 1)
+        for thread in threads:
+            thread.join()
+        self.assertEqual([name for name in os.listdir(self.temp_dir) if name.endswith('.tmp')], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Booking Store Tests for Nijenhuis
+Tests the SQLite booking store used by admin/booking-handler.py: JSON
+migration, row-level operations and the bookings.json export
+"""
+
+import unittest
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from backend.shared.atomic_json import update_json
+from backend.shared.booking_store import BookingStore
+
+
+def make_booking(booking_id, boat='tender-720', date='2026-07-01', **extra):
+    booking = {'id': booking_id, 'boatType': boat, 'date': date, 'status': 'confirmed',
+               'customerName': 'Jan de Vries'}
+    booking.update(extra)
+    return booking
+
+
+class TestBookingStore(unittest.TestCase):
+    """Test the SQLite booking store"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, 'bookings.db')
+        self.json_path = os.path.join(self.temp_dir, 'bookings.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def open_store(self, export_delay=0):
+        store = BookingStore(self.db_path, self.json_path, export_delay=export_delay)
+        self.addCleanup(store.close)
+        return store
+
+    def write_json(self, bookings):
+        with open(self.json_path, 'w', encoding='utf-8') as f:
+            json.dump(bookings, f)
+
+    def read_json(self):
+        with open(self.json_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def test_migrates_existing_json_once(self):
+        """Test that bookings.json is imported in order on first use only"""
+        self.write_json([make_booking('b2'), make_booking('b1'), make_booking('b3')])
+        store = self.open_store()
+        self.assertEqual([b['id'] for b in store.all()], ['b2', 'b1', 'b3'])
+        store.close()
+
+        os.remove(self.json_path)
+        reopened = self.open_store()
+        self.assertEqual(len(reopened), 3)
+
+    def test_row_operations(self):
+        """Test add, get, update and delete of single bookings"""
+        store = self.open_store()
+        store.add(make_booking('b1'))
+        store.add(make_booking('b2', paymentId='tr_123'))
+        with self.assertRaises(ValueError):
+            store.add(make_booking('b1'))
+
+        updated = store.update('b1', {'status': 'picked_up', 'date': '2026-07-03'})
+        self.assertEqual(updated['status'], 'picked_up')
+        self.assertEqual(store.get('b1')['customerName'], 'Jan de Vries')
+        self.assertIsNone(store.update('missing', {'status': 'x'}))
+
+        self.assertEqual([b['id'] for b in store.find_by_payment_id('tr_123')], ['b2'])
+        self.assertTrue(store.delete('b2'))
+        self.assertFalse(store.delete('b2'))
+        self.assertEqual([b['id'] for b in store.all()], ['b1'])
+
+    def test_for_boat_matches_overlapping_ranges(self):
+        """Test the (boatType, date) range query used for availability"""
+        store = self.open_store()
+        store.add(make_booking('single', date='2026-07-10'))
+        store.add(make_booking('multi', date='2026-07-08', endDate='2026-07-12'))
+        store.add(make_booking('other-boat', boat='sloep-500', date='2026-07-10'))
+        store.add(make_booking('before', date='2026-07-01'))
+
+        ids = [b['id'] for b in store.for_boat('tender-720', '2026-07-10', '2026-07-11')]
+        self.assertEqual(ids, ['single', 'multi'])
+        self.assertEqual([b['id'] for b in store.for_boat('tender-720', '2026-07-12')], ['multi'])
+        self.assertEqual(store.for_boat('tender-720', '2026-07-13'), [])
+
+    def test_changes_exported_to_json(self):
+        """Test that the PHP-compatible bookings.json follows the store"""
+        store = self.open_store()
+        store.add(make_booking('b1'))
+        store.add(make_booking('b2'))
+        store.update('b2', {'status': 'cancelled'})
+        self.assertEqual(self.read_json(), store.all())
+
+    def test_export_is_debounced(self):
+        """Test that a burst of changes rewrites bookings.json once, on flush at the latest"""
+        store = self.open_store(export_delay=60)
+        for i in range(5):
+            store.add(make_booking(f'b{i}'))
+        self.assertFalse(os.path.exists(self.json_path))
+        self.assertTrue(store.flush())
+        self.assertEqual(len(self.read_json()), 5)
+
+    def test_external_json_changes_reimported(self):
+        """Test that a bookings.json rewritten by the PHP side is picked up"""
+        store = self.open_store()
+        store.add(make_booking('b1'))
+
+        changed = self.read_json()
+        changed[0]['status'] = 'paid'
+        changed.append(make_booking('php-booking', paymentId='tr_456'))
+        self.write_json(changed)
+
+        self.assertEqual(store.get('b1')['status'], 'paid')
+        self.assertEqual(store.find_by_payment_id('tr_456')[0]['id'], 'php-booking')
+
+    def test_external_change_survives_pending_export(self):
+        """Test that a webhook update between a store write and its export is kept"""
+        store = self.open_store(export_delay=60)
+        store.add(make_booking('b1', status='pending', paymentId='tr_789'))
+        store.add(make_booking('b2'))
+        store.flush()
+
+        # Local change, export still pending
+        store.update('b1', {'notes': 'Extra zwemvesten'})
+        store.update('b2', {'status': 'cancelled'})
+
+        def mark_paid(bookings):
+            for booking in bookings:
+                if booking.get('paymentId') == 'tr_789':
+                    booking['status'] = 'paid'
+            return bookings
+
+        update_json(self.json_path, mark_paid)
+        store.flush()
+
+        for bookings in (self.read_json(), store.all()):
+            by_id = {b['id']: b for b in bookings}
+            self.assertEqual(by_id['b1']['status'], 'paid')
+            self.assertEqual(by_id['b1']['notes'], 'Extra zwemvesten')
+            self.assertEqual(by_id['b2']['status'], 'cancelled')
+
+    def test_external_removal_merged(self):
+        """Test that a booking removed from bookings.json by another writer is removed"""
+        store = self.open_store(export_delay=60)
+        store.add(make_booking('b1'))
+        store.add(make_booking('b2'))
+        store.flush()
+
+        store.add(make_booking('b3'))
+        update_json(self.json_path, lambda bookings: [b for b in bookings if b['id'] != 'b1'])
+        store.flush()
+        self.assertEqual([b['id'] for b in self.read_json()], ['b2', 'b3'])
+
+
+if __name__ == "__main__":
+    unittest.main()
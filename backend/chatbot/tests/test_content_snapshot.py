@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Website Content Snapshot Tests for Nijenhuis Chatbot
+Tests building, loading and staleness detection of the content snapshot
+"""
+
+import unittest
+import os
+import sys
+import tempfile
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from backend.chatbot.core.content_snapshot import (
+    ContentSnapshot, build_snapshot, check_snapshot, load_website_content
+)
+from backend.chatbot.core.website_content_extractor import WebsiteContentExtractor
+
+PAGE = """<html><head><title>{title}</title></head><body><main>
+<h1>{title}</h1><p>{text}</p></main></body></html>"""
+
+
+class TestContentSnapshot(unittest.TestCase):
+    """Snapshots built from a temporary pages directory"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.pages = os.path.join(self.temp_dir.name, 'pages')
+        os.makedirs(self.pages)
+        self._write_page('index.html', 'Welkom', 'Boten huren in Giethoorn vanaf 9 uur.')
+        self._write_page('prijzen.html', 'Prijzen', 'Een Tender 720 kost €230 per dag.')
+        self._write_page('admin.html', 'Admin', 'Deze pagina wordt overgeslagen.')
+        self.snapshot_path = os.path.join(self.temp_dir.name, 'content.snapshot')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _write_page(self, name, title, text):
+        with open(os.path.join(self.pages, name), 'w', encoding='utf-8') as f:
+            f.write(PAGE.format(title=title, text=text))
+
+    def test_snapshot_matches_live_extraction(self):
+        build_snapshot(self.snapshot_path, self.pages)
+        content, source = load_website_content(self.snapshot_path, self.pages)
+
+        self.assertEqual(source, 'snapshot')
+        self.assertEqual(content, WebsiteContentExtractor(self.pages).extract_all_content())
+        self.assertNotIn('overgeslagen', content)
+
+        snapshot = ContentSnapshot(self.snapshot_path)
+        self.assertEqual(set(snapshot.pages), {'index.html', 'prijzen.html'})
+        self.assertTrue(snapshot.page_text('prijzen.html').startswith('=== prijzen ==='))
+        self.assertIn('230', snapshot.structured['prices'])
+        snapshot.close()
+
+    def test_changed_page_triggers_rebuild(self):
+        build_snapshot(self.snapshot_path, self.pages)
+        self.assertIsNone(check_snapshot(self.snapshot_path, self.pages))
+
+        self._write_page('prijzen.html', 'Prijzen', 'Een Tender 720 kost nu €250 per dag.')
+        self.assertIn('prijzen.html', check_snapshot(self.snapshot_path, self.pages))
+
+        content, source = load_website_content(self.snapshot_path, self.pages)
+        self.assertEqual(source, 'extracted')
+        self.assertIn('€250', content)
+        self.assertIsNone(check_snapshot(self.snapshot_path, self.pages))
+
+    def test_touched_but_unchanged_page_is_not_stale(self):
+        build_snapshot(self.snapshot_path, self.pages)
+        index = os.path.join(self.pages, 'index.html')
+        os.utime(index, ns=(0, 0))
+        self.assertIsNone(check_snapshot(self.snapshot_path, self.pages))
+
+    def test_content_is_capped(self):
+        header = build_snapshot(self.snapshot_path, self.pages, max_chars=40)
+        self.assertTrue(header['truncated'])
+        content, _ = load_website_content(self.snapshot_path, self.pages, max_chars=40)
+        self.assertEqual(len(content), 40)
+
+    def test_corrupt_snapshot_falls_back(self):
+        with open(self.snapshot_path, 'wb') as f:
+            f.write(b'not a snapshot')
+        content, source = load_website_content(self.snapshot_path, self.pages)
+        self.assertEqual(source, 'extracted')
+        self.assertIn('Giethoorn', content)
+
+
+if __name__ == "__main__":
+    unittest.main()
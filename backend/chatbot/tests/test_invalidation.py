@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Invalidation Bus Tests for Nijenhuis Chatbot
+Tests for cross-worker training reloads and cache clears
+"""
+
+import unittest
+import os
+import sys
+import tempfile
+import threading
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from backend.chatbot.core.invalidation import InvalidationBus
+from backend.chatbot.core.knowledge_base import KnowledgeBase
+
+
+class TestInvalidationBus(unittest.TestCase):
+    """Two bus instances on one directory stand in for two workers"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.worker_a = InvalidationBus(directory=self.temp_dir.name, poll_interval=0)
+        self.worker_b = InvalidationBus(directory=self.temp_dir.name, poll_interval=0)
+        self.received_a = []
+        self.received_b = threading.Event()
+        self.payload_b = {}
+        self.worker_a.subscribe('cache', self.received_a.append)
+        self.worker_b.subscribe('cache', self._handle_b)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _handle_b(self, payload):
+        self.payload_b.update(payload)
+        self.received_b.set()
+
+    def test_other_worker_handles_publication(self):
+        """A publication is dispatched in the other worker, not the publisher"""
+        self.worker_a.publish('cache', {'reason': 'test'})
+        self.worker_a.poll(force=True)
+        self.worker_b.poll(force=True)
+
+        self.assertTrue(self.received_b.wait(2))
+        self.assertEqual(self.payload_b, {'reason': 'test'})
+        self.assertEqual(self.received_a, [])
+
+    def test_unchanged_generation_is_not_redispatched(self):
+        """Polling again without a new publication does nothing"""
+        self.worker_a.publish('cache')
+        self.worker_b.poll(force=True)
+        self.assertTrue(self.received_b.wait(2))
+
+        self.received_b.clear()
+        self.worker_b.poll(force=True)
+        self.assertFalse(self.received_b.wait(0.2))
+
+    def test_overwritten_generation_is_not_lost(self):
+        """A publisher that replaced another worker's unseen generation still handles it"""
+        self.worker_a.publish('cache', {'reason': 'a'})
+        self.worker_b.publish('cache', {'reason': 'b'})
+        self.worker_b.poll(force=True)
+        self.assertTrue(self.received_b.wait(2))
+
+        # The other worker only sees the latest record and handles it once
+        self.worker_a.poll(force=True)
+        for _ in range(20):
+            if self.received_a:
+                break
+            threading.Event().wait(0.05)
+        self.assertEqual(len(self.received_a), 1)
+
+    def test_own_publication_after_poll_is_skipped(self):
+        """A publisher that had seen the previous generation does not re-handle its own"""
+        self.worker_a.publish('cache')
+        self.worker_b.poll(force=True)
+        self.assertTrue(self.received_b.wait(2))
+
+        self.received_b.clear()
+        self.worker_b.publish('cache')
+        self.worker_b.poll(force=True)
+        self.assertFalse(self.received_b.wait(0.2))
+
+    def test_directory_is_private(self):
+        """The bus directory is created 0700 and one other users can write to is refused"""
+        directory = os.path.join(self.temp_dir.name, 'bus')
+        InvalidationBus(directory=directory, poll_interval=0)
+        self.assertEqual(os.stat(directory).st_mode & 0o777, 0o700)
+
+        os.chmod(directory, 0o777)
+        with self.assertRaises(PermissionError):
+            InvalidationBus(directory=directory, poll_interval=0)
+
+    def test_default_directory_outside_tmp(self):
+        """Without INVALIDATION_DIR the bus lives in the app's data directory"""
+        from backend.chatbot.core.invalidation import DEFAULT_INVALIDATION_DIR
+        self.assertFalse(DEFAULT_INVALIDATION_DIR.startswith(tempfile.gettempdir()))
+        self.assertEqual(os.path.basename(os.path.dirname(DEFAULT_INVALIDATION_DIR)), 'data')
+
+
+class TestTrainedResponseRefresh(unittest.TestCase):
+    """Test diff-based refresh of trained responses"""
+
+    def test_refresh_evicts_only_changed_questions(self):
+        kb = KnowledgeBase()
+        kb._cache_response(kb._get_cache_key("wat kost een zeilboot", 'nl'), {'response': 'y'})
+        kb._cache_response(kb._get_cache_key("mogen honden mee aan boord", 'nl'), {'response': 'x'})
+
+        # Simulate another worker having trained a new answer
+        fresh = dict(kb.trained_responses)
+        fresh["mogen honden mee aan boord"] = "Ja, honden zijn welkom."
+        kb._load_trained_responses = lambda: fresh
+
+        self.assertEqual(kb.refresh_trained_responses(), 1)
+        self.assertNotIn("mogen honden mee aan boord:nl", kb._response_cache)
+        self.assertIn("wat kost een zeilboot:nl", kb._response_cache)
+        self.assertEqual(kb.find_trained_response("mogen honden mee aan boord"), "Ja, honden zijn welkom.")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+IP Block Table Tests for Nijenhuis Chatbot
+Tests expiry, CIDR matching and sharing of blocks between table instances
+"""
+
+import unittest
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from backend.chatbot.core.ip_block_table import IPBlockTable
+
+
+class TestIPBlockTable(unittest.TestCase):
+    """Test the shared IP block table"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'ipblocks.json')
+        self.table = IPBlockTable(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_exact_address_block_expires(self):
+        """Test that a single address is blocked until its expiry"""
+        self.table.block('203.0.113.7', 60, 'test')
+        self.assertIsNotNone(self.table.lookup('203.0.113.7'))
+        self.assertIsNone(self.table.lookup('203.0.113.8'))
+        self.assertIsNone(self.table.lookup('203.0.113.7', now=time.time() + 61))
+
+    def test_cidr_block(self):
+        """Test that a /24 blocks every address in it and nothing outside"""
+        self.assertEqual(self.table.block('198.51.100.77/24', None, 'hosting range'), '198.51.100.0/24')
+        self.assertEqual(self.table.lookup('198.51.100.1')['reason'], 'hosting range')
+        self.assertIsNotNone(self.table.lookup('198.51.100.255'))
+        self.assertIsNone(self.table.lookup('198.51.101.1'))
+        # IPv4-mapped IPv6 and X-Forwarded-For lists resolve to the client address
+        self.assertIsNotNone(self.table.lookup('::ffff:198.51.100.9'))
+        self.assertIsNotNone(self.table.lookup('198.51.100.9, 10.0.0.1'))
+
+    def test_ipv6_prefix(self):
+        """Test IPv6 prefix blocks"""
+        self.table.block('2001:db8:abcd::/48', 60)
+        self.assertIsNotNone(self.table.lookup('2001:db8:abcd:12::1'))
+        self.assertIsNone(self.table.lookup('2001:db8:abce::1'))
+
+    def test_unparsable_and_invalid_input(self):
+        """Test that junk client IPs are not blocked and junk networks are rejected"""
+        self.table.block('0.0.0.0/0', 60)
+        self.assertIsNone(self.table.lookup('unknown'))
+        with self.assertRaises(ValueError):
+            self.table.block('not-a-network', 60)
+
+    def test_block_visible_to_other_instances(self):
+        """Test that blocks and unblocks written by one worker apply in another"""
+        other = IPBlockTable(self.path)
+        self.assertIsNone(other.lookup('192.0.2.10'))
+
+        self.table.block('192.0.2.0/28', 60)
+        self.assertIsNotNone(other.lookup('192.0.2.10'))
+
+        self.assertTrue(other.unblock('192.0.2.0/28'))
+        self.assertIsNone(self.table.lookup('192.0.2.10'))
+        self.assertFalse(self.table.unblock('192.0.2.0/28'))
+
+    def test_expired_entries_dropped_on_write(self):
+        """Test that expired entries are pruned instead of accumulating"""
+        self.table.block('192.0.2.1', 0.01)
+        time.sleep(0.02)
+        self.table.block('192.0.2.2', 60)
+        self.assertEqual([entry['network'] for entry in self.table.active_entries()], ['192.0.2.2/32'])
+        self.assertEqual(len(self.table._entries), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
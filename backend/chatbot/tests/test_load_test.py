@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Load Test Harness Tests for Nijenhuis Chatbot
+Tests percentile reporting and the keep-alive client against a stub server
+"""
+
+import unittest
+import asyncio
+import json
+import os
+import sys
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from backend.chatbot.scripts.load_test import LoadTest, percentile, summarize_latencies
+
+
+async def _stub_api(reader, writer):
+    """Answers /api/token and /api/chat like the real API; every third chat request gets a 429"""
+    chats = 0
+    while True:
+        request_line = await reader.readline()
+        if not request_line:
+            break
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode().partition(':')
+            if name.lower() == 'content-length':
+                length = int(value)
+        body = await reader.readexactly(length) if length else b''
+
+        if b'/api/token' in request_line:
+            status, payload = '200 OK', {'token': 'stub', 'expires_in': 3600}
+        else:
+            chats += 1
+            assert json.loads(body)['session_id'].startswith('loadtest_')
+            if chats % 3 == 0:
+                status, payload = '429 Too Many Requests', {'error': 'Rate limit exceeded'}
+            else:
+                status, payload = '200 OK', {'response': 'ok', 'success': True}
+        data = json.dumps(payload).encode()
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(data)}\r\n\r\n".encode() + data)
+        await writer.drain()
+    writer.close()
+
+
+class TestPercentiles(unittest.TestCase):
+    """Test nearest-rank percentile reporting"""
+
+    def test_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertIsNone(percentile([], 50))
+
+    def test_summary_of_single_sample(self):
+        summary = summarize_latencies([12.345])
+        self.assertEqual(summary['p50'], 12.35)
+        self.assertEqual(summary['p99'], 12.35)
+
+
+class TestLoadTestRun(unittest.TestCase):
+    """Run the harness against a local stub server"""
+
+    def test_report_counts_and_connection_reuse(self):
+        async def scenario():
+            server = await asyncio.start_server(_stub_api, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            load_test = LoadTest(
+                url=f"http://127.0.0.1:{port}", origin='http://127.0.0.1:5001', concurrency=2,
+                duration=None, total_requests=12, think_time=0, session_reuse=0.5,
+                queries=['Hallo'], seed=7
+            )
+            try:
+                return await load_test.run()
+            finally:
+                server.close()
+                await server.wait_closed()
+
+        report = asyncio.run(scenario())
+        self.assertEqual(report['requests'], 12)
+        self.assertEqual(sum(report['status_counts'].values()), 12)
+        self.assertEqual(report['successes'] + report['status_counts'].get('429', 0), 12)
+        self.assertGreater(report['rate_limited_rate'], 0)
+        self.assertEqual(report['error_rate'], report['rate_limited_rate'])
+        # One keep-alive connection per virtual user
+        self.assertEqual(report['connections_opened'], 2)
+        self.assertIsNotNone(report['latency_ms']['p95'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Occupancy Index Tests for Nijenhuis
+Tests the per-boat day counters used for cart availability checks
+"""
+
+import unittest
+import importlib.util
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from datetime import date, timedelta
+from http.server import HTTPServer
+from unittest.mock import patch
+
+# Add the project root to the path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.append(PROJECT_ROOT)
+
+from backend.shared.booking_store import BookingStore
+from backend.shared.occupancy_index import OccupancyIndex, is_blocking_booking, booking_range, run_length_encode
+
+
+def brute_force_count(bookings, boat_id, day):
+    """Blocking bookings of a boat on one day, the way the handler used to count"""
+    count = 0
+    for booking in bookings:
+        if booking.get('boatType') != boat_id or not is_blocking_booking(booking):
+            continue
+        dates = booking_range(booking)
+        if dates and dates[0] <= day <= dates[1]:
+            count += 1
+    return count
+
+
+class TestOccupancyIndex(unittest.TestCase):
+    """Test the occupancy index"""
+
+    def test_blocking_rules(self):
+        """Test which statuses occupy a boat"""
+        self.assertTrue(is_blocking_booking({'status': 'paid'}))
+        self.assertTrue(is_blocking_booking({'status': 'confirmed', 'paymentId': 'manual_1'}))
+        self.assertFalse(is_blocking_booking({'status': 'cancelled'}))
+        self.assertFalse(is_blocking_booking({'status': 'pending', 'paymentId': 'tr_1'}))
+        self.assertFalse(is_blocking_booking({'status': 'not-confirmed'}))
+
+    def test_counts_and_first_full_day(self):
+        """Test multi-day bookings, including one across the new year"""
+        index = OccupancyIndex([
+            {'boatType': 'sloep', 'date': '2026-07-01', 'endDate': '2026-07-03', 'status': 'paid'},
+            {'boatType': 'sloep', 'date': '2026-07-03', 'status': 'confirmed'},
+            {'boatType': 'sloep', 'date': '2026-12-31', 'endDate': '2027-01-01', 'status': 'manual'},
+            {'boatType': 'sloep', 'date': 'not-a-date', 'status': 'paid'},
+            {'boatType': 'kano', 'date': '2026-07-02', 'status': 'paid'},
+        ])
+        self.assertEqual(index.counts('sloep', date(2026, 6, 30), date(2026, 7, 4)), [0, 1, 1, 2, 0])
+        self.assertEqual(index.counts('sloep', date(2026, 12, 31), date(2027, 1, 1)), [1, 1])
+        self.assertEqual(index.first_full_day('sloep', date(2026, 7, 1), date(2026, 7, 5), 2), date(2026, 7, 3))
+        self.assertIsNone(index.first_full_day('sloep', date(2026, 7, 1), date(2026, 7, 5), 3))
+        self.assertIsNone(index.first_full_day('unknown', date(2026, 7, 1), date(2026, 7, 5), 1))
+
+    def test_run_length_encode(self):
+        """Test the compact per-day encoding"""
+        self.assertEqual(run_length_encode([2, 2, 2, 1, 2, 2]), [2, 3, 1, 1, 2, 2])
+        self.assertEqual(run_length_encode([]), [])
+
+    def test_matches_brute_force(self):
+        """Test the index against a per-day scan of random bookings"""
+        rng = random.Random(42)
+        statuses = ['paid', 'confirmed', 'cancelled', 'pending', 'manual', 'temporary']
+        bookings = []
+        for _ in range(300):
+            start = date(2026, 4, 1) + timedelta(days=rng.randrange(214))
+            booking = {'boatType': rng.choice(['sloep', 'tender', 'kano']),
+                       'date': start.isoformat(), 'status': rng.choice(statuses)}
+            if rng.random() < 0.3:
+                booking['endDate'] = (start + timedelta(days=rng.randrange(5))).isoformat()
+            bookings.append(booking)
+
+        index = OccupancyIndex(bookings)
+        season = [date(2026, 4, 1) + timedelta(days=i) for i in range(214)]
+        for boat_id in ('sloep', 'tender', 'kano'):
+            expected = [brute_force_count(bookings, boat_id, day) for day in season]
+            self.assertEqual(index.counts(boat_id, season[0], season[-1]), expected)
+
+
+class TestBookingStoreOccupancy(unittest.TestCase):
+    """Test that the booking store keeps its occupancy index current"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = BookingStore(os.path.join(self.temp_dir, 'bookings.db'),
+                                  os.path.join(self.temp_dir, 'bookings.json'), export_delay=0)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def day_count(self, day='2026-07-01'):
+        start = date.fromisoformat(day)
+        return self.store.occupancy().counts('sloep', start, start)[0]
+
+    def test_index_follows_writes(self):
+        """Test create, update, delete and bulk replace"""
+        self.store.add({'id': 'b1', 'boatType': 'sloep', 'date': '2026-07-01', 'status': 'paid'})
+        self.assertEqual(self.day_count(), 1)
+
+        self.store.add({'id': 'b2', 'boatType': 'sloep', 'date': '2026-07-01', 'status': 'pending',
+                        'paymentId': 'tr_1'})
+        self.assertEqual(self.day_count(), 1)
+        self.store.update('b2', {'status': 'paid'})
+        self.assertEqual(self.day_count(), 2)
+
+        self.store.update('b1', {'date': '2026-07-02'})
+        self.assertEqual(self.day_count(), 1)
+        self.assertEqual(self.day_count('2026-07-02'), 1)
+
+        self.store.delete('b2')
+        self.assertEqual(self.day_count(), 0)
+
+        self.store.replace_all([{'id': 'b3', 'boatType': 'sloep', 'date': '2026-07-01', 'status': 'manual'}])
+        self.assertEqual(self.day_count(), 1)
+        self.assertEqual(self.day_count('2026-07-02'), 0)
+
+
+class TestAvailabilityEndpoint(unittest.TestCase):
+    """Test GET ?action=availability of admin/booking-handler.py"""
+
+    def setUp(self):
+        spec = importlib.util.spec_from_file_location(
+            'booking_handler', os.path.join(PROJECT_ROOT, 'admin', 'booking-handler.py'))
+        self.handler = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.handler)
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = BookingStore(os.path.join(self.temp_dir, 'bookings.db'), None)
+        self.store.add({'id': 'b1', 'boatType': 'sloep', 'date': '2026-07-02', 'endDate': '2026-07-03',
+                        'status': 'paid'})
+        self.store.add({'id': 'b2', 'boatType': 'sloep', 'date': '2026-07-03', 'status': 'manual'})
+        boats = [{'id': 'sloep', 'total': 2}, {'id': 'kano'}]
+
+        patches = [
+            patch.object(self.handler, 'get_booking_store', return_value=self.store),
+            patch.object(self.handler.BookingHandler, 'load_boats', return_value=boats),
+            patch.object(self.handler.BookingHandler, 'log_message'),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+        self.server = HTTPServer(('127.0.0.1', 0), self.handler.BookingHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/admin/booking-handler.py'
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.store.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def get(self, query, headers=None):
+        request = urllib.request.Request(f'{self.url}?action=availability&{query}', headers=headers or {})
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, response.headers, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers, e.read()
+
+    def test_remaining_per_day(self):
+        """Test the run-length encoded remaining capacity"""
+        status, headers, body = self.get('from=2026-07-01&to=2026-07-05')
+        self.assertEqual(status, 200)
+        data = json.loads(body)
+        self.assertEqual(data['days'], 5)
+        self.assertEqual(data['boats']['sloep'], {'total': 2, 'remaining': [2, 1, 1, 1, 0, 1, 2, 2]})
+        self.assertEqual(data['boats']['kano'], {'total': 1, 'remaining': [1, 5]})
+        self.assertEqual(int(headers['Content-Length']), len(body))
+
+        status, _, body = self.get('boat=kano&from=2026-07-01&to=2026-07-01')
+        self.assertEqual(list(json.loads(body)['boats']), ['kano'])
+
+    def test_etag_revalidation(self):
+        """Test that an unchanged calendar answers 304 and a change a new body"""
+        _, headers, _ = self.get('from=2026-07-01&to=2026-07-05')
+        status, _, body = self.get('from=2026-07-01&to=2026-07-05', {'If-None-Match': headers['ETag']})
+        self.assertEqual((status, body), (304, b''))
+
+        self.store.update('b2', {'status': 'cancelled'})
+        status, _, body = self.get('from=2026-07-01&to=2026-07-05', {'If-None-Match': headers['ETag']})
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body)['boats']['sloep']['remaining'], [2, 1, 1, 2, 2, 2])
+
+    def test_invalid_requests(self):
+        """Test date validation and unknown boats"""
+        self.assertEqual(self.get('from=2026-13-01')[0], 400)
+        self.assertEqual(self.get('from=2026-07-05&to=2026-07-01')[0], 400)
+        self.assertEqual(self.get('from=2026-01-01&to=2029-01-01')[0], 400)
+        self.assertEqual(self.get('boat=jacht')[0], 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Process Memory Tests for Nijenhuis Chatbot
+Tests USS/PSS reporting and copy-on-write preservation with gc.freeze
+"""
+
+import unittest
+import gc
+import os
+import subprocess
+import sys
+
+# Add the project root to the path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.append(PROJECT_ROOT)
+
+from backend.chatbot.core.process_memory import (
+    read_process_memory, child_pids, worker_memory_report, disable_gc_for_preload, freeze_preloaded_heap
+)
+
+HAS_SMAPS_ROLLUP = os.path.exists(f"/proc/{os.getpid()}/smaps_rollup")
+
+
+def _child_uss_growth_after_collect(freeze: bool) -> int:
+    """
+    In a forked 'master', preload a heap of container objects, optionally freeze
+    it, fork a 'worker' and return how much its USS grows during gc.collect().
+    """
+    read_fd, write_fd = os.pipe()
+    master = os.fork()
+    if master == 0:
+        try:
+            disable_gc_for_preload()
+            preloaded = [{'question': f"vraag {i}", 'tags': [i]} for i in range(150000)]
+            if freeze:
+                freeze_preloaded_heap()
+            gc.enable()
+            worker = os.fork()
+            if worker == 0:
+                before = read_process_memory()['uss_kb']
+                gc.collect()
+                growth = read_process_memory()['uss_kb'] - before
+                os.write(write_fd, str(growth).encode())
+                os._exit(0)
+            os.waitpid(worker, 0)
+            del preloaded
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    os.waitpid(master, 0)
+    with os.fdopen(read_fd) as f:
+        return int(f.read())
+
+
+@unittest.skipUnless(HAS_SMAPS_ROLLUP and hasattr(gc, 'freeze'), "requires Linux smaps_rollup and gc.freeze")
+class TestProcessMemory(unittest.TestCase):
+    """Test memory reporting from /proc"""
+
+    def test_current_process_memory(self):
+        usage = read_process_memory()
+        self.assertGreater(usage['rss_kb'], 0)
+        self.assertEqual(usage['uss_kb'], usage['private_clean_kb'] + usage['private_dirty_kb'])
+        self.assertLessEqual(usage['uss_kb'], usage['pss_kb'])
+        self.assertLessEqual(usage['pss_kb'], usage['rss_kb'])
+
+    def test_worker_report_lists_children(self):
+        pid = os.fork()
+        if pid == 0:
+            import time
+            time.sleep(2)
+            os._exit(0)
+        try:
+            self.assertIn(pid, child_pids(os.getpid()))
+            report = worker_memory_report(os.getpid())
+            self.assertIn(pid, report['workers'])
+            # A fresh fork shares nearly everything with its parent
+            self.assertGreater(report['totals']['saved_by_sharing_kb'], 0)
+        finally:
+            os.kill(pid, 9)
+            os.waitpid(pid, 0)
+
+    def test_frozen_heap_stays_shared_through_collection(self):
+        unfrozen_growth = _child_uss_growth_after_collect(freeze=False)
+        frozen_growth = _child_uss_growth_after_collect(freeze=True)
+        self.assertGreater(unfrozen_growth, 4 * 1024)
+        self.assertLess(frozen_growth, unfrozen_growth / 4)
+
+
+
+@unittest.skipUnless(hasattr(gc, 'freeze'), "requires gc.freeze")
+class TestGunicornPreload(unittest.TestCase):
+    """Test the GC handling of gunicorn.conf.py"""
+
+    def test_config_disables_gc_for_preload(self):
+        script = "import gc, runpy; runpy.run_path('gunicorn.conf.py'); print(gc.isenabled())"
+        for setting, expected in (('true', 'False'), ('false', 'True')):
+            env = dict(os.environ, GC_FREEZE_PRELOAD=setting)
+            output = subprocess.run([sys.executable, '-c', script], cwd=PROJECT_ROOT, env=env,
+                                    capture_output=True, text=True, check=True).stdout
+            self.assertEqual(output.strip(), expected, setting)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,16 +5,26 @@ Comprehensive tests for authentication, rate limiting, and connection security
 """
 
 import unittest
+import atexit
 import requests
 import time
 import json
 import os
+import shutil
 import sys
+import tempfile
+import threading
 from unittest.mock import patch, MagicMock
 
 # Add the project root to the path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
+# Shared tables and files of this test run, never those of a running server
+TEST_STATE_DIR = tempfile.mkdtemp(prefix='nijenhuis_test_')
+atexit.register(shutil.rmtree, TEST_STATE_DIR, True)
+os.environ['RATE_LIMIT_SHM_PATH'] = os.path.join(TEST_STATE_DIR, 'ratelimit')
+os.environ['IP_BLOCK_FILE'] = os.path.join(TEST_STATE_DIR, 'ipblocks.json')
+
 from backend.chatbot.core.security_manager import SecurityManager
 from backend.chatbot.core.connection_monitor import ConnectionMonitor
 
@@ -22,6 +32,12 @@ class TestSecurityManager(unittest.TestCase):
     """Test security manager functionality"""
     
     def setUp(self):
+        # Each test gets its own IP block table
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, True)
+        env = patch.dict(os.environ, {'IP_BLOCK_FILE': os.path.join(self.temp_dir, 'ipblocks.json')})
+        env.start()
+        self.addCleanup(env.stop)
         self.security_manager = SecurityManager()
         self.test_api_key = "test_api_key_12345"
     
@@ -74,6 +90,7 @@ class TestSecurityManager(unittest.TestCase):
     def test_rate_limiting(self):
         """Test rate limiting functionality"""
         identifier = "test_client"
+        self.security_manager.rate_limiter.reset(identifier)
         
         # Test normal requests with default limit
         for i in range(10):
@@ -84,8 +101,7 @@ class TestSecurityManager(unittest.TestCase):
         api_key = self.security_manager.create_api_key("rate_test", ["chat"], rate_limit_override=3)
         
         # Clear any existing rate limit data for this identifier
-        if identifier in self.security_manager.rate_limits:
-            self.security_manager.rate_limits[identifier].clear()
+        self.security_manager.rate_limiter.reset(identifier)
         
         # Test with the custom rate limit
         for i in range(4):
@@ -145,6 +161,143 @@ class TestSecurityManager(unittest.TestCase):
             payload = self.security_manager.verify_jwt_token(token)
             self.assertIsNone(payload)
 
+    def test_jwt_cache_skips_decode(self):
+        """Test that repeat verification of a token is served from the cache"""
+        token = self.security_manager.generate_jwt_token("cached", ["chat"])
+        first = self.security_manager.verify_jwt_token(token)
+
+        with patch('backend.chatbot.core.security_manager.jwt.decode') as decode:
+            second = self.security_manager.verify_jwt_token(token)
+            decode.assert_not_called()
+        self.assertEqual(first, second)
+
+        # Callers get their own copy of the payload
+        second['permissions'] = ['config']
+        self.assertEqual(self.security_manager.verify_jwt_token(token)['permissions'], ["chat"])
+
+    def test_jwt_cache_respects_exp(self):
+        """Test that cached payloads are not returned past their exp"""
+        token = self.security_manager.generate_jwt_token("short", ["chat"])
+        payload = self.security_manager.verify_jwt_token(token)
+
+        import jwt
+        with patch('backend.chatbot.core.security_manager.time.time', return_value=payload['exp'] + 1), \
+             patch('backend.chatbot.core.security_manager.jwt.decode',
+                   side_effect=jwt.ExpiredSignatureError) as decode:
+            self.assertIsNone(self.security_manager.verify_jwt_token(token))
+            decode.assert_called_once()
+        self.assertNotIn(self.security_manager._token_digest(token), self.security_manager._token_cache)
+
+    def test_jwt_cache_secret_change(self):
+        """Test that changing the secret invalidates cached tokens"""
+        token = self.security_manager.generate_jwt_token("rotate", ["chat"])
+        self.assertIsNotNone(self.security_manager.verify_jwt_token(token))
+
+        self.security_manager.jwt_secret = "a-different-secret-" + "x" * 64
+        self.assertIsNone(self.security_manager.verify_jwt_token(token))
+
+        fresh = self.security_manager.generate_jwt_token("rotate", ["chat"])
+        self.assertIsNotNone(self.security_manager.verify_jwt_token(fresh))
+
+    def test_jwt_cache_is_bounded(self):
+        """Test that the cache evicts least recently used tokens"""
+        self.security_manager._token_cache_size = 2
+        tokens = [self.security_manager.generate_jwt_token(f"key{i}", ["chat"]) for i in range(3)]
+        for token in tokens:
+            self.security_manager.verify_jwt_token(token)
+
+        self.assertEqual(len(self.security_manager._token_cache), 2)
+        self.assertNotIn(self.security_manager._token_digest(tokens[0]), self.security_manager._token_cache)
+
+class TestApiKeyUsage(unittest.TestCase):
+    """Test that X-API-Key usage is counted in memory and flushed to the keys file"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.keys_file = os.path.join(self.temp_dir, 'api_keys.json')
+        self.api_key = "usage_test_key"
+        with open(self.keys_file, 'w') as f:
+            json.dump({self.api_key: {'name': 'usage', 'permissions': ['chat'], 'usage_count': 5,
+                                      'last_used': None, 'rate_limit_override': None}}, f)
+        self.security_manager = SecurityManager(keys_file=self.keys_file)
+
+    def tearDown(self):
+        self.security_manager._usage_pending.clear()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _file_usage(self):
+        with open(self.keys_file) as f:
+            return json.load(f)[self.api_key]['usage_count']
+
+    def test_authentication_does_not_write_file(self):
+        """Test that authenticated requests only update memory until flushed"""
+        with patch.object(self.security_manager, '_save_api_keys') as save:
+            for _ in range(3):
+                self.assertTrue(self.security_manager.authenticate_request(self.api_key)[0])
+            save.assert_not_called()
+        self.assertEqual(self.security_manager.api_keys[self.api_key]['usage_count'], 8)
+        self.assertEqual(self._file_usage(), 5)
+
+        self.security_manager.flush_api_key_usage()
+        self.assertEqual(self._file_usage(), 8)
+        self.assertEqual(self.security_manager._usage_pending, {})
+
+    def test_flush_merges_usage_of_other_workers(self):
+        """Test that two processes flushing the same file add up their counts"""
+        other = SecurityManager(keys_file=self.keys_file)
+        self.security_manager.authenticate_request(self.api_key)
+        other.authenticate_request(self.api_key)
+        other.authenticate_request(self.api_key)
+
+        self.security_manager.flush_api_key_usage()
+        other.flush_api_key_usage()
+        self.assertEqual(self._file_usage(), 8)
+        self.assertIsNotNone(json.load(open(self.keys_file))[self.api_key]['last_used'])
+
+    def test_reload_on_mtime_change(self):
+        """Test that keys added to the file are picked up without a restart"""
+        self.security_manager.authenticate_request(self.api_key)
+        with open(self.keys_file) as f:
+            keys = json.load(f)
+        keys['added_key'] = {'name': 'added', 'permissions': ['chat'], 'usage_count': 0}
+        with open(self.keys_file, 'w') as f:
+            json.dump(keys, f)
+        os.utime(self.keys_file, ns=(time.time_ns(), time.time_ns() + 10**9))
+
+        self.assertTrue(self.security_manager.reload_api_keys_if_changed(force=True))
+        self.assertTrue(self.security_manager.authenticate_request('added_key')[0])
+        # Unflushed usage survives the reload
+        self.assertEqual(self.security_manager.api_keys[self.api_key]['usage_count'], 6)
+        self.assertFalse(self.security_manager.reload_api_keys_if_changed(force=True))
+
+    def test_single_usage_flusher_per_process(self):
+        """Test that concurrent first requests start one flush thread"""
+        barrier = threading.Barrier(8)
+
+        def first_request():
+            barrier.wait()
+            self.security_manager._ensure_usage_flusher()
+
+        callers = [threading.Thread(target=first_request) for _ in range(8)]
+        pid = os.getpid()
+        # A slow getpid widens the window between the check and the start
+        with patch('backend.chatbot.core.security_manager.os.getpid',
+                   side_effect=lambda: time.sleep(0.001) or pid), \
+                patch('backend.chatbot.core.security_manager.threading.Thread') as flusher:
+            for caller in callers:
+                caller.start()
+            for caller in callers:
+                caller.join()
+        self.assertEqual(flusher.call_count, 1)
+
+    def test_revoked_key_drops_pending_usage(self):
+        """Test that revoking a key removes it from file and memory"""
+        self.security_manager.authenticate_request(self.api_key)
+        self.assertTrue(self.security_manager.revoke_api_key(self.api_key))
+        self.assertNotIn(self.api_key, self.security_manager.api_keys)
+        with open(self.keys_file) as f:
+            self.assertNotIn(self.api_key, json.load(f))
+
 class TestConnectionMonitor(unittest.TestCase):
     """Test connection monitor functionality"""
     
@@ -204,6 +357,68 @@ class TestConnectionMonitor(unittest.TestCase):
         self.assertEqual(status['status'], 'offline')
         self.assertFalse(status['is_healthy'])
         self.assertTrue(status['needs_attention'])
+    
+    def test_health_snapshot_follows_status(self):
+        """Test the published health snapshot tracks status changes"""
+        snapshot = self.connection_monitor.get_health_snapshot()
+        self.assertTrue(snapshot.is_healthy)
+        
+        for i in range(3):
+            self.connection_monitor.update_connection_health(success=False)
+        
+        snapshot = self.connection_monitor.get_health_snapshot()
+        self.assertEqual(snapshot.status.value, 'offline')
+        self.assertFalse(snapshot.is_healthy)
+        self.assertFalse(self.connection_monitor.is_connection_healthy())
+    
+    def test_internet_probe_can_be_disabled(self):
+        """Test disabling the internet probe for offline deployments"""
+        with patch.dict(os.environ, {'CONNECTIVITY_PROBE_HOSTS': 'off'}):
+            monitor = ConnectionMonitor()
+        self.assertEqual(monitor.probe_hosts, [])
+        with patch('socket.create_connection') as create_connection:
+            self.assertTrue(monitor.check_internet_connectivity())
+            create_connection.assert_not_called()
+    
+    def test_shared_board_visible_across_fork(self):
+        """Test a status written by another process is read through the board"""
+        from backend.chatbot.core.health_board import SharedHealthBoard
+        board = SharedHealthBoard()
+        self.assertIsNone(board.read())
+        
+        pid = os.fork()
+        if pid == 0:
+            board.write(4, False, 12.5, 40.0, 3, 10, 6)
+            os._exit(0)
+        os.waitpid(pid, 0)
+        
+        state = board.read()
+        self.assertEqual(state['status_code'], 4)
+        self.assertFalse(state['internet_available'])
+        self.assertEqual(state['writer_pid'], pid)
+    
+    def test_worker_merges_shared_status(self):
+        """Test workers adopt a worse shared status and ignore a stale board"""
+        from backend.chatbot.core.health_board import SharedHealthBoard
+        from backend.chatbot.core.connection_monitor import STATUS_CODES, ConnectionStatus
+        board = SharedHealthBoard()
+        self.connection_monitor.attach_shared_board(board)
+        board.write(STATUS_CODES.index(ConnectionStatus.OFFLINE), True, 5.0, 0.0, 3, 3, 3)
+        
+        self.assertFalse(self.connection_monitor.get_health_snapshot().is_healthy)
+        self.assertEqual(self.connection_monitor.get_connection_status()['shared_monitor']['status'], 'offline')
+        
+        self.connection_monitor.shared_board_max_age = -1
+        self.assertTrue(self.connection_monitor.get_health_snapshot().is_healthy)
+    
+    def test_request_reconnection_does_not_block(self):
+        """Test reconnection runs in the background and is single-flight"""
+        with patch.object(self.connection_monitor, 'attempt_reconnection',
+                          side_effect=lambda: time.sleep(0.5)):
+            start = time.time()
+            self.assertTrue(self.connection_monitor.request_reconnection())
+            self.assertFalse(self.connection_monitor.request_reconnection())
+            self.assertLess(time.time() - start, 0.2)
 
 class TestSecurityIntegration(unittest.TestCase):
     """Integration tests for security features"""
@@ -256,6 +471,7 @@ class TestSecurityIntegration(unittest.TestCase):
         api_key = security_manager.create_api_key("rate_test", ["chat"], rate_limit_override=3)
         
         identifier = "test_client"
+        security_manager.rate_limiter.reset(identifier)
         
         # Test rate limiting
         for i in range(5):
@@ -278,6 +494,67 @@ class TestSecurityIntegration(unittest.TestCase):
         self.assertEqual(security_manager.security_log[0]['type'], 'test_event')
         self.assertEqual(security_manager.security_log[0]['details']['test'], 'data')
 
+    def test_security_log_is_bounded(self):
+        """Test that an event storm keeps a fixed number of events and counts all of them"""
+        security_manager = SecurityManager()
+        security_manager.security_sink = None
+        with patch('builtins.print') as console:
+            for i in range(5000):
+                security_manager._log_security_event('rate_limit_exceeded', {'identifier': f'client{i}'})
+
+        self.assertEqual(len(security_manager.security_log), security_manager.security_log.maxlen)
+        self.assertEqual(security_manager.security_log[-1]['details']['identifier'], 'client4999')
+        self.assertEqual(security_manager.security_event_counts['rate_limit_exceeded'], 5000)
+        # Console output is throttled per event type
+        self.assertEqual(console.call_count, 1)
+
+        stats = security_manager.get_security_stats()
+        self.assertEqual(len(stats['recent_security_events']), 10)
+        self.assertEqual(stats['security_event_counts']['rate_limit_exceeded'], 5000)
+
+class TestSecurityEventSink(unittest.TestCase):
+    """Test the asynchronous NDJSON file sink"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'security_events.ndjson')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _logger(self, name, **kwargs):
+        from backend.chatbot.core.async_logging import get_async_file_logger
+        logger = get_async_file_logger(f'test.security.{name}', self.path, **kwargs)
+        self.addCleanup(lambda: [handler.stop() for handler in logger.handlers])
+        return logger
+
+    def test_events_written_as_json_lines_with_rotation(self):
+        """Test that events are appended as NDJSON and the file is rotated"""
+        logger = self._logger('rotation', max_bytes=2000, backup_count=2)
+        handler = logger.handlers[0]
+        for i in range(50):
+            handler.submit(logger.name, 'jwt_invalid', {'event': 'jwt_invalid', 'details': {'n': i}})
+        handler.stop()
+
+        files = sorted(name for name in os.listdir(self.temp_dir) if name.startswith('security_events') and not name.endswith('.lock'))
+        self.assertEqual(files, ['security_events.ndjson', 'security_events.ndjson.1', 'security_events.ndjson.2'])
+        with open(self.path) as f:
+            entries = [json.loads(line) for line in f]
+        self.assertEqual(entries[-1]['details']['n'], 49)
+        self.assertEqual(entries[-1]['event'], 'jwt_invalid')
+        self.assertEqual(entries[-1]['level'], 'INFO')
+        self.assertEqual(entries[-1]['msg'], 'jwt_invalid')
+
+    def test_full_queue_drops_instead_of_growing(self):
+        """Test that a bounded queue drops records when the writer falls behind"""
+        logger = self._logger('bounded', max_queue=5)
+        handler = logger.handlers[0]
+        with patch.object(handler.target_handler, 'handle', side_effect=lambda record: time.sleep(0.01)):
+            for i in range(100):
+                logger.info('ip_blocked', extra={'details': {'n': i}})
+            handler.stop()
+        self.assertGreater(handler.dropped, 0)
+
 class TestErrorHandling(unittest.TestCase):
     """Test error handling and fallback mechanisms"""
     
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Shared Rate Limiter Tests for Nijenhuis Chatbot
+Tests GCRA limits, cell reuse and consistency across processes
+"""
+
+import unittest
+import os
+import shutil
+import sys
+import tempfile
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from backend.chatbot.core.shared_rate_limiter import SharedRateLimiter
+
+
+class TestSharedRateLimiter(unittest.TestCase):
+    """Test the shared-memory GCRA table"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'ratelimit')
+        self.limiter = SharedRateLimiter(self.path, slots=256, stripes=4)
+
+    def tearDown(self):
+        self.limiter.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_burst_then_steady_rate(self):
+        """Test that a limit of N allows a burst of N, then one request per period/N"""
+        now = 1000.0
+        for _ in range(3):
+            self.assertTrue(self.limiter.hit('client', 3, 100, now=now)[0])
+        allowed, window, retry_after = self.limiter.hit('client', 3, 100, now=now)
+        self.assertFalse(allowed)
+        self.assertEqual(window, 'minute')
+        self.assertAlmostEqual(retry_after, 20.0)
+
+        self.assertFalse(self.limiter.hit('client', 3, 100, now=now + 19)[0])
+        self.assertTrue(self.limiter.hit('client', 3, 100, now=now + 20)[0])
+        # Other identifiers are independent
+        self.assertTrue(self.limiter.hit('other', 3, 100, now=now)[0])
+
+    def test_hour_limit_in_same_check(self):
+        """Test that the hour window is enforced together with the minute window"""
+        now = 1000.0
+        for i in range(5):
+            self.assertTrue(self.limiter.hit('client', 60, 5, now=now + i * 2)[0])
+        allowed, window, _ = self.limiter.hit('client', 60, 5, now=now + 10)
+        self.assertFalse(allowed)
+        self.assertEqual(window, 'hour')
+
+    def test_rejected_requests_do_not_consume(self):
+        """Test that rejected requests leave the state unchanged"""
+        now = 1000.0
+        self.limiter.hit('client', 1, 100, now=now)
+        for _ in range(10):
+            self.assertFalse(self.limiter.hit('client', 1, 100, now=now + 1)[0])
+        self.assertTrue(self.limiter.hit('client', 1, 100, now=now + 60)[0])
+
+    def test_reset(self):
+        """Test that reset forgets an identifier"""
+        self.limiter.hit('client', 1, 100, now=1000.0)
+        self.limiter.reset('client')
+        self.assertTrue(self.limiter.hit('client', 1, 100, now=1000.0)[0])
+
+    def test_fixed_size_with_stale_cell_reuse(self):
+        """Test that many identifiers fit in a small table by reusing idle cells"""
+        limiter = SharedRateLimiter(os.path.join(self.temp_dir, 'small'), slots=8, stripes=2)
+        try:
+            for i in range(100):
+                self.assertTrue(limiter.hit(f'client{i}', 60, 1000, now=1000.0 + i * 3600)[0])
+            stats = limiter.stats(now=1000.0 + 99 * 3600)
+            self.assertEqual(stats['capacity'], 8)
+            self.assertEqual(stats['active_identifiers'], 1)
+            self.assertEqual(os.path.getsize(os.path.join(self.temp_dir, 'small')), limiter._size)
+        finally:
+            limiter.close()
+
+    def test_state_shared_between_processes(self):
+        """Test that hits from a forked process count against the same limit"""
+        if not hasattr(os, 'fork'):
+            self.skipTest("fork not available")
+        pid = os.fork()
+        if pid == 0:
+            child = SharedRateLimiter(self.path, slots=256, stripes=4)
+            allowed = sum(child.hit('shared', 10, 1000)[0] for _ in range(6))
+            os._exit(0 if allowed == 6 else 1)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.WEXITSTATUS(status), 0)
+
+        allowed = sum(self.limiter.hit('shared', 10, 1000)[0] for _ in range(6))
+        self.assertEqual(allowed, 4)
+
+    def test_layout_change_resets_table(self):
+        """Test that a table with a different layout is reinitialized instead of misread"""
+        self.limiter.hit('client', 1, 100)
+        resized = SharedRateLimiter(self.path, slots=512, stripes=8)
+        try:
+            self.assertTrue(resized.hit('client', 1, 100)[0])
+            self.assertEqual(resized.stats()['capacity'], 512)
+        finally:
+            resized.close()
+
+    def test_layout_change_leaves_mapped_table_intact(self):
+        """Test that a smaller table replaces the file instead of shrinking it under other mappings"""
+        self.limiter.hit('client', 1, 100, now=1000.0)
+        shrunk = SharedRateLimiter(self.path, slots=16, stripes=2)
+        try:
+            self.assertEqual(os.path.getsize(self.path), shrunk._size)
+            # The old mapping is still fully readable and keeps its state (no SIGBUS)
+            self.assertEqual(self.limiter.stats(now=1000.0)['active_identifiers'], 1)
+            self.assertFalse(self.limiter.hit('client', 1, 100, now=1001.0)[0])
+            self.assertTrue(shrunk.hit('client', 1, 100, now=1001.0)[0])
+        finally:
+            shrunk.close()
+        self.assertEqual([name for name in os.listdir(self.temp_dir) if name.endswith('.tmp')], [])
+
+if __name__ == "__main__":
+    unittest.main()
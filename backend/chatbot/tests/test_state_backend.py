@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Shared State Backend Tests for Nijenhuis Chatbot
+Tests the in-process and Redis-protocol backends (against a local stand-in
+server) and the components that share state through them
+"""
+
+import unittest
+import importlib.util
+import os
+import socketserver
+import sys
+import threading
+import time
+from unittest.mock import patch
+
+# Add the project root to the path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.append(PROJECT_ROOT)
+
+from backend.shared.state_backend import (
+    InMemoryStateBackend, RedisStateBackend, StateBackend, StateBackendError, create_state_backend
+)
+from backend.chatbot.core.shared_rate_limiter import BackendRateLimiter
+from backend.chatbot.core.conversation_context import ConversationContextManager
+
+
+class _RespStandIn(socketserver.ThreadingTCPServer):
+    """Just enough of the Redis protocol for the commands the backend sends"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, password=None):
+        self.password = password
+        self.data = {}  # key -> (value, expires_at)
+        self.lock = threading.Lock()
+        self.commands = []
+        # Command name -> 'before_reply' (run it, then hang up) or 'after_reply'
+        self.hangup = {}
+        super().__init__(('127.0.0.1', 0), _RespStandInHandler)
+
+    @property
+    def url(self):
+        auth = f":{self.password}@" if self.password else ""
+        return f"redis://{auth}127.0.0.1:{self.server_address[1]}/2"
+
+
+class _RespStandInHandler(socketserver.StreamRequestHandler):
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        count = int(line[1:])
+        args = []
+        for _ in range(count):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2].decode())
+        return args
+
+    def _live(self, key):
+        item = self.server.data.get(key)
+        if item and item[1] is not None and item[1] <= time.time():
+            del self.server.data[key]
+            return None
+        return item
+
+    def handle(self):
+        authenticated = self.server.password is None
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            name = args[0].upper()
+            self.server.commands.append(name)
+            with self.server.lock:
+                if name == 'AUTH':
+                    authenticated = args[1] == self.server.password
+                    reply = b'+OK\r\n' if authenticated else b'-WRONGPASS invalid password\r\n'
+                elif not authenticated:
+                    reply = b'-NOAUTH Authentication required.\r\n'
+                elif name in ('PING',):
+                    reply = b'+PONG\r\n'
+                elif name == 'SELECT':
+                    reply = b'+OK\r\n'
+                elif name == 'GET':
+                    item = self._live(args[1])
+                    reply = b'$-1\r\n' if item is None else b'$%d\r\n%s\r\n' % (len(item[0].encode()), item[0].encode())
+                elif name == 'SET':
+                    options = [arg.upper() for arg in args[3:]]
+                    expires_at = None
+                    if 'PX' in options:
+                        expires_at = time.time() + int(args[3 + options.index('PX') + 1]) / 1000
+                    if 'NX' in options and self._live(args[1]) is not None:
+                        reply = b'$-1\r\n'
+                    else:
+                        self.server.data[args[1]] = (args[2], expires_at)
+                        reply = b'+OK\r\n'
+                elif name == 'DEL':
+                    reply = b':%d\r\n' % int(self.server.data.pop(args[1], None) is not None)
+                elif name == 'INCR':
+                    item = self._live(args[1])
+                    value = int(item[0]) + 1 if item else 1
+                    self.server.data[args[1]] = (str(value), item[1] if item else None)
+                    reply = b':%d\r\n' % value
+                else:
+                    reply = b"-ERR unknown command '%s'\r\n" % name.encode()
+            hangup = self.server.hangup.pop(name, None)
+            if hangup != 'before_reply':
+                self.wfile.write(reply)
+            if hangup:
+                return
+
+
+class _BackendContract:
+    """Behaviour every state backend must have"""
+
+    def make_backend(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.backend = self.make_backend()
+
+    def test_get_set_delete(self):
+        self.assertIsNone(self.backend.get('missing'))
+        self.assertTrue(self.backend.set('key', 'value'))
+        self.assertEqual(self.backend.get('key'), 'value')
+        self.assertTrue(self.backend.delete('key'))
+        self.assertFalse(self.backend.delete('key'))
+        self.assertIsNone(self.backend.get('key'))
+
+    def test_ttl_and_only_if_absent(self):
+        self.backend.set('short', 'x', ttl=0.05)
+        self.assertFalse(self.backend.set('short', 'y', only_if_absent=True))
+        time.sleep(0.1)
+        self.assertIsNone(self.backend.get('short'))
+        self.assertTrue(self.backend.set('short', 'y', only_if_absent=True))
+
+    def test_incr_counter_expires(self):
+        self.assertEqual(self.backend.incr('counter', 0.1), 1)
+        self.assertEqual(self.backend.incr('counter', 0.1), 2)
+        time.sleep(0.15)
+        self.assertEqual(self.backend.incr('counter', 0.1), 1)
+
+    def test_json_round_trip(self):
+        self.backend.set_json('doc', {'naam': 'Électrosloep', 'n': [1, 2]})
+        self.assertEqual(self.backend.get_json('doc'), {'naam': 'Électrosloep', 'n': [1, 2]})
+
+
+class TestInMemoryStateBackend(_BackendContract, unittest.TestCase):
+    """Test the in-process backend"""
+
+    def make_backend(self):
+        return InMemoryStateBackend()
+
+    def test_expired_keys_are_swept(self):
+        for i in range(1000):
+            self.backend.set(f'k{i}', 'v', ttl=0.01)
+        time.sleep(0.02)
+        # Reaching the sweep threshold drops the expired keys
+        for i in range(100):
+            self.backend.set(f'fresh{i}', 'v')
+        self.assertLess(len(self.backend._data), 1000)
+
+    def test_interface_requires_all_commands(self):
+        class Incomplete(StateBackend):
+            def get(self, key):
+                return None
+
+        with self.assertRaises(TypeError):
+            StateBackend()
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+
+class TestRedisStateBackend(_BackendContract, unittest.TestCase):
+    """Test the RESP client against a local stand-in server"""
+
+    def make_backend(self):
+        self.server = _RespStandIn(password='geheim')
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        backend = create_state_backend(self.server.url)
+        self.addCleanup(backend.close)
+        return backend
+
+    def test_url_and_auth(self):
+        self.assertIsInstance(self.backend, RedisStateBackend)
+        self.assertEqual(self.backend.db, 2)
+        self.assertTrue(self.backend.ping())
+        self.assertEqual(self.server.commands[:2], ['AUTH', 'SELECT'])
+        # Keys are namespaced
+        self.backend.set('key', 'value')
+        self.assertIn('nijenhuis:key', self.server.data)
+
+    def test_errors_and_reconnect(self):
+        with self.assertRaises(StateBackendError):
+            self.backend.execute('FLUSHALL')
+        # The connection is still usable after an error reply
+        self.assertTrue(self.backend.ping())
+
+        self.backend._local.connection[0].close()
+        self.assertTrue(self.backend.ping())
+
+    def test_sent_batch_not_retried(self):
+        """An INCR the server ran before the connection dropped is not sent again"""
+        self.backend.ping()
+        self.server.hangup['INCR'] = 'before_reply'
+        with self.assertRaises(StateBackendError):
+            self.backend.incr('counter', 60)
+        self.assertEqual(self.server.data['nijenhuis:counter'][0], '1')
+        self.assertEqual(self.backend.incr('counter', 60), 2)
+
+    def test_idle_connection_closed_by_server(self):
+        """A connection the server closed while idle is replaced before sending"""
+        self.server.hangup['PING'] = 'after_reply'
+        self.assertTrue(self.backend.ping())
+        time.sleep(0.05)
+        self.assertEqual(self.backend.incr('counter', 60), 1)
+        self.assertEqual(self.server.commands.count('AUTH'), 2)
+
+    def test_unreachable_server(self):
+        backend = RedisStateBackend('redis://127.0.0.1:1', timeout=0.2)
+        with self.assertRaises(StateBackendError):
+            backend.get('key')
+
+
+class TestSharedComponents(unittest.TestCase):
+    """Test that components on different servers see each other's state"""
+
+    def setUp(self):
+        self.backend = InMemoryStateBackend()
+
+    def test_rate_limit_shared_between_servers(self):
+        first, second = BackendRateLimiter(self.backend), BackendRateLimiter(self.backend)
+        now = 1000.0 * 60
+        self.assertTrue(first.hit('client', 2, 100, now=now)[0])
+        self.assertTrue(second.hit('client', 2, 100, now=now + 1)[0])
+        allowed, window, retry_after = first.hit('client', 2, 100, now=now + 2)
+        self.assertFalse(allowed)
+        self.assertEqual(window, 'minute')
+        self.assertAlmostEqual(retry_after, 58.0)
+        # Next minute window
+        self.assertTrue(second.hit('client', 2, 100, now=now + 60)[0])
+
+    def test_rate_limit_allows_when_backend_fails(self):
+        limiter = BackendRateLimiter(RedisStateBackend('redis://127.0.0.1:1', timeout=0.2))
+        self.assertTrue(limiter.hit('client', 1, 1)[0])
+
+    def test_conversation_continues_on_other_server(self):
+        first = ConversationContextManager(state_backend=self.backend)
+        second = ConversationContextManager(state_backend=self.backend)
+
+        first.add_message('session_abc', 'user', 'Wat kost een sloep?')
+        context = second.get_or_create_context('session_abc')
+        self.assertEqual([m['content'] for m in context.messages], ['Wat kost een sloep?'])
+
+        # Messages added directly to a context are published by commit_context
+        context.add_message('assistant', 'Vanaf 150 euro per dag.')
+        second.commit_context('session_abc')
+        history = first.get_or_create_context('session_abc').get_conversation_history()
+        self.assertEqual(len(history), 2)
+
+        second.clear_context('session_abc')
+        self.assertEqual(len(first.get_or_create_context('session_abc').messages), 0)
+
+    def test_admin_sessions_shared(self):
+        spec = importlib.util.spec_from_file_location(
+            'booking_handler', os.path.join(PROJECT_ROOT, 'admin', 'booking-handler.py'))
+        handler = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(handler)
+
+        with patch.object(handler, 'session_backend', return_value=self.backend), \
+             patch.object(handler, 'save_sessions') as save_sessions:
+            token = handler.create_session('medewerker')
+            self.assertEqual(handler.validate_session(token), 'medewerker')
+            handler.delete_session(token)
+            self.assertIsNone(handler.validate_session(token))
+            save_sessions.assert_not_called()
+
+        # An unreachable store refuses the login instead of raising
+        unreachable = RedisStateBackend('redis://127.0.0.1:1', timeout=0.2)
+        with patch.object(handler, 'session_backend', return_value=unreachable), \
+             patch.object(handler, 'print', create=True):
+            self.assertIsNone(handler.create_session('medewerker'))
+
+
+if __name__ == "__main__":
+    unittest.main()
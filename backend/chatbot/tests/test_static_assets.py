@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Static Asset Tests for Nijenhuis
+Tests ETag/304 revalidation and gzip variants of files served by
+admin/booking-handler.py
+"""
+
+import unittest
+import functools
+import gzip
+import http.client
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from unittest.mock import patch
+
+# Add the project root to the path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.append(PROJECT_ROOT)
+
+from backend.shared.static_assets import StaticAssetCache, accepts_gzip, not_modified
+
+SCRIPT = b'console.log("nijenhuis");\n' * 200
+
+
+class TestStaticAssetCache(unittest.TestCase):
+    """Test the asset metadata cache"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'app.js')
+        with open(self.path, 'wb') as f:
+            f.write(SCRIPT)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_metadata_cached_until_file_changes(self):
+        """Test that an unchanged file keeps its metadata and ETag"""
+        cache = StaticAssetCache()
+        asset = cache.lookup(self.path)
+        self.assertIs(cache.lookup(self.path), asset)
+        self.assertEqual(asset.identity.size, len(SCRIPT))
+        self.assertIsNone(asset.gzip)
+
+        with open(self.path, 'ab') as f:
+            f.write(b'// changed\n')
+        changed = cache.lookup(self.path)
+        self.assertNotEqual(changed.identity.etag, asset.identity.etag)
+
+        os.remove(self.path)
+        self.assertIsNone(cache.lookup(self.path))
+        self.assertIsNone(cache.lookup(self.temp_dir))
+
+    def test_stale_gzip_variant_ignored(self):
+        """Test that a .gz older than its source is not used"""
+        with open(self.path + '.gz', 'wb') as f:
+            f.write(gzip.compress(SCRIPT))
+        cache = StaticAssetCache()
+        asset = cache.lookup(self.path)
+        self.assertTrue(asset.variant(True).etag.endswith('-gz"'))
+        self.assertIs(asset.variant(False), asset.identity)
+
+        newer = os.stat(self.path + '.gz').st_mtime_ns + 1_000_000_000
+        os.utime(self.path, ns=(newer, newer))
+        self.assertIsNone(cache.lookup(self.path).gzip)
+
+    def test_request_headers(self):
+        """Test Accept-Encoding and conditional request parsing"""
+        self.assertTrue(accepts_gzip('gzip, deflate, br'))
+        self.assertTrue(accepts_gzip('br;q=1.0, gzip;q=0.8'))
+        self.assertFalse(accepts_gzip('gzip;q=0'))
+        self.assertFalse(accepts_gzip('identity'))
+        self.assertFalse(accepts_gzip(''))
+
+        self.assertTrue(not_modified('"a", W/"b"', None, '"b"', 0))
+        self.assertFalse(not_modified('"a"', 'Thu, 01 Jan 2099 00:00:00 GMT', '"b"', 0))
+        self.assertTrue(not_modified(None, 'Thu, 01 Jan 2099 00:00:00 GMT', '"b"', 1000))
+        self.assertFalse(not_modified(None, 'not a date', '"b"', 1000))
+
+
+class TestStaticAssetServing(unittest.TestCase):
+    """Test static files served by the booking handler"""
+
+    def setUp(self):
+        spec = importlib.util.spec_from_file_location(
+            'booking_handler', os.path.join(PROJECT_ROOT, 'admin', 'booking-handler.py'))
+        self.handler = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.handler)
+
+        self.temp_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.temp_dir, 'js'))
+        os.makedirs(os.path.join(self.temp_dir, 'pages'))
+        with open(os.path.join(self.temp_dir, 'js', 'app.js'), 'wb') as f:
+            f.write(SCRIPT)
+        with open(os.path.join(self.temp_dir, 'js', 'app.js.gz'), 'wb') as f:
+            f.write(gzip.compress(SCRIPT))
+        with open(os.path.join(self.temp_dir, 'pages', 'overview.html'), 'wb') as f:
+            f.write(b'<h1>Overzicht</h1>')
+
+        patches = [
+            patch.object(self.handler, 'validate_session',
+                         side_effect=lambda token: 'admin' if token == 'valid' else None),
+            patch.object(self.handler.BookingHandler, 'log_message'),
+            patch.object(self.handler, 'print', create=True),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+        handler_class = functools.partial(self.handler.BookingHandler, directory=self.temp_dir)
+        self.server = self.handler.PooledHTTPServer(('127.0.0.1', 0), handler_class, workers=2)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.conn = http.client.HTTPConnection('127.0.0.1', self.server.server_address[1], timeout=5)
+
+    def tearDown(self):
+        self.conn.close()
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def get(self, path, headers=None):
+        self.conn.request('GET', path, headers=headers or {})
+        response = self.conn.getresponse()
+        return response, response.read()
+
+    def test_etag_revalidation(self):
+        """Test that a repeated load of an unchanged asset is a 304 on the same connection"""
+        response, body = self.get('/js/app.js')
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body, SCRIPT)
+        self.assertEqual(int(response.headers['Content-Length']), len(SCRIPT))
+        self.assertIsNone(response.headers['Content-Encoding'])
+        self.assertEqual(response.headers['Vary'], 'Accept-Encoding')
+        etag = response.headers['ETag']
+
+        response, body = self.get('/js/app.js', {'If-None-Match': etag})
+        self.assertEqual((response.status, body), (304, b''))
+        self.assertEqual(response.headers['ETag'], etag)
+
+        response, body = self.get('/js/app.js', {'If-Modified-Since': response.headers['Last-Modified']})
+        self.assertEqual(response.status, 304)
+
+    def test_gzip_variant(self):
+        """Test that clients accepting gzip get the precompressed file"""
+        response, body = self.get('/js/app.js', {'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(body), SCRIPT)
+        self.assertLess(len(body), len(SCRIPT))
+
+        response, _ = self.get('/js/app.js', {'Accept-Encoding': 'gzip', 'If-None-Match': response.headers['ETag']})
+        self.assertEqual(response.status, 304)
+        # The gzip ETag does not validate the identity representation
+        response, _ = self.get('/js/app.js', {'If-None-Match': response.headers['ETag']})
+        self.assertEqual(response.status, 200)
+
+    def test_protected_pages_require_session(self):
+        """Test that non-public files still need a session, also for revalidation"""
+        response, _ = self.get('/pages/overview.html')
+        self.assertEqual(response.status, 302)
+
+        response, body = self.get('/pages/overview.html', {'Cookie': 'admin_session_token=valid'})
+        self.assertEqual((response.status, body), (200, b'<h1>Overzicht</h1>'))
+        self.assertEqual(response.headers['Content-Type'], 'text/html')
+
+        response, _ = self.get('/pages/overview.html', {'If-None-Match': response.headers['ETag']})
+        self.assertEqual(response.status, 302)
+
+        response, _ = self.get('/js/missing.js')
+        self.assertEqual(response.status, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
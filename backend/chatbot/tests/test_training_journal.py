@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Training Journal Tests for Nijenhuis Chatbot
+Tests for the append-only corrections journal and incremental index updates
+"""
+
+import unittest
+import json
+import os
+import sys
+import tempfile
+from unittest.mock import patch
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from backend.chatbot.core.training_journal import TrainingJournal
+from backend.chatbot.core.knowledge_base import KnowledgeBase
+
+
+def make_session(question, corrected):
+    return {
+        "question": question,
+        "original_response": "",
+        "corrected_response": corrected,
+        "detected_language": "nl",
+        "response_type": "general",
+        "status": "Corrected",
+        "source": "VYBR1S"
+    }
+
+
+class TestTrainingJournal(unittest.TestCase):
+    """Test journal append, replay and compaction"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.training_file = os.path.join(self.temp_dir.name, 'enhanced_training_data.json')
+        with open(self.training_file, 'w', encoding='utf-8') as f:
+            json.dump({"metadata": {}, "training_sessions": [make_session("oud", "antwoord")]}, f)
+        self.journal = TrainingJournal(training_file=self.training_file, compaction_delay=3600)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_append_is_pending_until_compacted(self):
+        """Journaled sessions are replayable before compaction"""
+        self.journal.append([make_session("vraag een", "a"), make_session("vraag twee", "b")], schedule=False)
+        pending = self.journal.pending_sessions()
+        self.assertEqual([s['question'] for s in pending], ["vraag een", "vraag twee"])
+
+    def test_compaction_folds_journal_into_snapshot(self):
+        """Compaction appends sessions to the snapshot and empties the journal"""
+        self.journal.append([make_session("vraag een", "a")], schedule=False)
+        self.assertEqual(self.journal.compact(), 1)
+
+        with open(self.training_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.assertEqual(len(data['training_sessions']), 2)
+        self.assertIn('journal_seq', data['metadata'])
+        self.assertEqual(self.journal.pending_sessions(), [])
+        self.assertEqual(self.journal.compact(), 0)
+
+    def test_compacted_entries_are_not_replayed(self):
+        """Entries at or below the snapshot's journal_seq are skipped"""
+        self.journal.append([make_session("vraag een", "a")], schedule=False)
+        seq = self.journal.read_entries()[0]['seq']
+        self.assertEqual(self.journal.pending_sessions(after_seq=seq), [])
+
+    def test_clock_stepping_back_loses_nothing(self):
+        """Sessions journaled after the wall clock moved back are still compacted"""
+        with patch('backend.chatbot.core.training_journal.time.time_ns', return_value=2_000_000_000):
+            self.journal.append([make_session("vraag een", "a")], schedule=False)
+            self.assertEqual(self.journal.compact(), 1)
+        with patch('backend.chatbot.core.training_journal.time.time_ns', return_value=1_000_000_000):
+            self.journal.append([make_session("vraag twee", "b"), make_session("vraag drie", "c")],
+                                schedule=False)
+            self.assertEqual(len(self.journal.pending_sessions(after_seq=2_000_000_000)), 2)
+            self.assertEqual(self.journal.compact(), 2)
+
+        with open(self.training_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.assertEqual([s['question'] for s in data['training_sessions']],
+                         ["oud", "vraag een", "vraag twee", "vraag drie"])
+
+    def test_torn_line_is_ignored(self):
+        """A partially written final line does not break replay"""
+        self.journal.append([make_session("vraag een", "a")], schedule=False)
+        with open(self.journal.journal_file, 'a', encoding='utf-8') as f:
+            f.write('{"seq": 1, "sess')
+        self.assertEqual(len(self.journal.pending_sessions()), 1)
+
+
+class TestIncrementalCorrections(unittest.TestCase):
+    """Test applying corrections without a full reload"""
+
+    def setUp(self):
+        self.kb = KnowledgeBase()
+
+    def test_only_affected_cache_entries_are_evicted(self):
+        """A correction evicts matching cached answers and keeps the rest"""
+        self.kb._cache_response(self.kb._get_cache_key("hoe laat gaan jullie open", 'nl'), {'response': 'x'})
+        self.kb._cache_response(self.kb._get_cache_key("wat kost een zeilboot", 'nl'), {'response': 'y'})
+
+        applied = self.kb.apply_corrections([make_session("Hoe laat gaan jullie open", "Vanaf 9:00")])
+
+        self.assertEqual(applied, 1)
+        self.assertNotIn("hoe laat gaan jullie open:nl", self.kb._response_cache)
+        self.assertIn("wat kost een zeilboot:nl", self.kb._response_cache)
+        self.assertEqual(self.kb.find_trained_response("hoe laat gaan jullie open"), "Vanaf 9:00")
+        self.assertEqual(self.kb.answer_query("hoe laat gaan jullie open")['response'], "Vanaf 9:00")
+
+
+if __name__ == "__main__":
+    unittest.main()
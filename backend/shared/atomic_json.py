@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Atomic JSON Files for Nijenhuis
+Crash- and concurrency-safe reads and writes of the shared JSON files
+(bookings.json, boats.json). Writers replace the file with a fsync'd temp
+file, so readers see the old or the new version, never a partial one.
+Read-modify-write cycles are serialized per file by an advisory lock on a
+sidecar lock file; readers never wait for each other.
+"""
+
+import fcntl
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+
+READ_RETRIES = 3
+READ_RETRY_DELAY = 0.05
+
+
+class JSONFileError(Exception):
+    """A JSON file exists but could not be read or parsed"""
+
+
+def lock_path(path: str) -> str:
+    """Sidecar lock file of a JSON file: .<name>.lock next to it"""
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, f'.{name}.lock')
+
+
+@contextmanager
+def locked(path: str):
+    """
+    Hold the exclusive write lock of a JSON file
+
+    The lock lives on a sidecar file because writes replace the JSON file
+    itself (a lock on the old inode would not exclude the next writer).
+    flock locks belong to the open file, so threads of one process exclude
+    each other just like separate processes. PHP's saveJsonSafe
+    (components/data_access.php) takes the same lock. The file is opened
+    read-only (enough for flock) so the web server user and ours can share it.
+    """
+    fd = os.open(lock_path(path), os.O_RDONLY | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+def read_json(path: str, default: Any = None, retries: int = READ_RETRIES,
+              retry_delay: float = READ_RETRY_DELAY) -> Any:
+    """
+    Read a JSON file, or default if it does not exist
+
+    The shared lock keeps out writers that rewrite the file in place under
+    an exclusive flock (migration scripts, older PHP code). A file that is empty or does not parse is
+    retried a few times (a writer that does not lock may be mid-write), then
+    JSONFileError is raised: callers must not mistake a damaged file for an
+    empty list.
+    """
+    last_error: Optional[Exception] = None
+    for attempt in range(retries + 1):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                fcntl.flock(f, fcntl.LOCK_SH)
+                try:
+                    content = f.read()
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+        except FileNotFoundError:
+            return default
+        except (OSError, UnicodeDecodeError) as e:
+            last_error = e
+        else:
+            try:
+                return json.loads(content)
+            except ValueError as e:
+                last_error = e
+        if attempt < retries:
+            time.sleep(retry_delay * (2 ** attempt))
+    raise JSONFileError(f"Could not read {path}: {last_error}")
+
+
+def write_json(path: str, data: Any, indent: Optional[int] = 2):
+    """
+    Atomically replace a JSON file: temp file in the same directory, fsync,
+    rename, fsync of the directory. Keeps the permissions of the file it
+    replaces (0644 for a new file) so the web server can still read it.
+    """
+    path = os.path.abspath(path)
+    directory, name = os.path.split(path)
+    os.makedirs(directory, exist_ok=True)
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        mode = 0o644
+
+    fd, tmp_path = tempfile.mkstemp(prefix=f'.{name}.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, mode)
+        _replace_locked(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    # Make the rename itself durable
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+def _replace_locked(tmp_path: str, path: str):
+    """
+    Rename over path while holding LOCK_EX on the current file: the lock
+    readers (shared) and in-place writers take, so none of them is still
+    reading or writing the file when it is replaced
+    """
+    try:
+        current = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        os.replace(tmp_path, path)
+        return
+    try:
+        fcntl.flock(current, fcntl.LOCK_EX)
+        os.replace(tmp_path, path)
+    finally:
+        os.close(current)
+
+
+def update_json(path: str, mutate: Callable[[Any], Any], default: Any = None,
+                indent: Optional[int] = 2) -> bool:
+    """
+    Read-modify-write a JSON file under its write lock
+
+    mutate receives the current content (default if the file is missing)
+    and returns the content to write, or None to leave the file unchanged.
+    Returns True if the file was written.
+    """
+    with locked(path):
+        data = mutate(read_json(path, default))
+        if data is None:
+            return False
+        write_json(path, data, indent)
+        return True
@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""
+Booking Store for Nijenhuis
+SQLite (WAL) storage for bookings with a dict-shaped API, a one-time import
+of bookings.json and a debounced export back to bookings.json for the PHP
+handlers that still read it
+"""
+
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from typing import Dict, Any, List, Optional
+
+try:
+    from .occupancy_index import OccupancyIndex
+    from .atomic_json import JSONFileError, locked, read_json, write_json
+except ImportError:
+    from backend.shared.occupancy_index import OccupancyIndex
+    from backend.shared.atomic_json import JSONFileError, locked, read_json, write_json
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bookings (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    boat_type TEXT,
+    date TEXT,
+    end_date TEXT,
+    payment_id TEXT,
+    status TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_bookings_boat_date ON bookings (boat_type, date);
+CREATE INDEX IF NOT EXISTS idx_bookings_payment_id ON bookings (payment_id);
+CREATE TABLE IF NOT EXISTS store_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS json_base (
+    id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+DEFAULT_EXPORT_DELAY = 0.5
+_MISSING = object()
+
+
+def _columns(booking: Dict[str, Any]) -> tuple:
+    """Values of the indexed columns for a booking dict"""
+    return (
+        booking.get('boatType'),
+        booking.get('date'),
+        booking.get('endDate') or booking.get('date'),
+        booking.get('paymentId') or None,
+        booking.get('status'),
+    )
+
+
+class BookingStore:
+    """
+    Bookings in one SQLite table: the full booking dict as JSON plus the
+    fields that are queried (id, boatType/date range, paymentId, status) as
+    indexed columns, so a lookup or update touches only the affected rows.
+    Insertion order is kept, so all() returns bookings in the same order as
+    the old JSON list. occupancy() returns a per-boat day index of blocking
+    bookings that is built once and updated by every write of this store.
+
+    On first use an existing bookings.json is imported. After every change
+    the JSON file is rewritten (atomically, debounced by export_delay
+    seconds) for the PHP side. json_base holds the bookings as last written
+    to or read from that file. If another program (the Mollie webhook, PHP)
+    rewrites bookings.json, the next operation or export merges its changes
+    per booking and field against json_base, so they survive pending
+    exports of our own.
+    """
+
+    def __init__(self, db_path: str, json_path: Optional[str] = None,
+                 export_delay: float = DEFAULT_EXPORT_DELAY):
+        self.db_path = db_path
+        self.json_path = json_path
+        self.export_delay = export_delay
+        self._local = threading.local()
+        self._export_lock = threading.Lock()
+        self._export_timer: Optional[threading.Timer] = None
+        self._export_pending = False
+        self._closed = False
+        self._occupancy: Optional[OccupancyIndex] = None
+        # Serializes writes with building and updating the occupancy index
+        self._occupancy_lock = threading.RLock()
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        with conn:
+            conn.executescript(SCHEMA)
+        if conn.execute('PRAGMA user_version').fetchone()[0] < SCHEMA_VERSION:
+            self._migrate_from_json()
+        else:
+            self._sync_external_changes()
+        atexit.register(self.flush)
+
+    # --- connections ---
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread (and per process after a fork)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _transaction(self, statements) -> Any:
+        """Run statements(conn) in one IMMEDIATE transaction"""
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            result = statements(conn)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return result
+
+    def _write(self, statements, update_index=None) -> Any:
+        """
+        A changing transaction. update_index(index, result) applies it to a
+        built occupancy index (None: drop the index); an export of
+        bookings.json is scheduled.
+        """
+        with self._occupancy_lock:
+            result = self._transaction(statements)
+            if self._occupancy is not None:
+                if update_index is None:
+                    self._occupancy = None
+                else:
+                    update_index(self._occupancy, result)
+        self._schedule_export()
+        return result
+
+    # --- JSON compatibility ---
+
+    def _json_state(self) -> Optional[str]:
+        if not self.json_path:
+            return None
+        try:
+            stat = os.stat(self.json_path)
+        except FileNotFoundError:
+            return None
+        return f"{stat.st_ino}:{stat.st_mtime_ns}:{stat.st_size}"
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._conn().execute('SELECT value FROM store_meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _set_meta(conn: sqlite3.Connection, key: str, value: Optional[str]):
+        conn.execute('INSERT OR REPLACE INTO store_meta (key, value) VALUES (?, ?)', (key, value))
+
+    def _read_json(self) -> Optional[List[Dict[str, Any]]]:
+        """The bookings in bookings.json, None if there is no file; raises JSONFileError if it is damaged"""
+        if not self.json_path:
+            return None
+        data = read_json(self.json_path)
+        if data is not None and not isinstance(data, list):
+            raise JSONFileError(f"{self.json_path} does not hold a list of bookings")
+        return data
+
+    def _import(self, conn: sqlite3.Connection, bookings: List[Dict[str, Any]]):
+        conn.execute('DELETE FROM bookings')
+        for booking in bookings:
+            if not isinstance(booking, dict):
+                continue
+            if not booking.get('id'):
+                booking = dict(booking, id=uuid.uuid4().hex)
+            # A duplicate id keeps its first position and the last version
+            conn.execute(
+                'INSERT INTO bookings (id, boat_type, date, end_date, payment_id, status, data) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT(id) DO UPDATE SET boat_type = excluded.boat_type, date = excluded.date, '
+                'end_date = excluded.end_date, payment_id = excluded.payment_id, '
+                'status = excluded.status, data = excluded.data',
+                (booking['id'],) + _columns(booking) + (json.dumps(booking, ensure_ascii=False),))
+
+    def _set_base(self, conn: sqlite3.Connection, bookings: List[Dict[str, Any]], state: Optional[str]):
+        """Record bookings as the content of bookings.json in the given file state"""
+        conn.execute('DELETE FROM json_base')
+        conn.executemany(
+            'INSERT OR REPLACE INTO json_base (id, data) VALUES (?, ?)',
+            [(b['id'], json.dumps(b, ensure_ascii=False)) for b in bookings if isinstance(b, dict) and b.get('id')])
+        self._set_meta(conn, 'json_state', state)
+
+    def _merge_external(self, conn: sqlite3.Connection, external: List[Dict[str, Any]]) -> int:
+        """
+        Apply what another writer changed in bookings.json since json_base:
+        changed fields, added bookings and removed bookings. Fields the file
+        did not change keep their (possibly newer) value in the store.
+        Returns the number of bookings touched.
+        """
+        base = {row[0]: json.loads(row[1]) for row in conn.execute('SELECT id, data FROM json_base')}
+        touched = 0
+        seen = set()
+        for booking in external:
+            if not isinstance(booking, dict):
+                continue
+            if not booking.get('id'):
+                booking = dict(booking, id=uuid.uuid4().hex)
+            booking_id = booking['id']
+            seen.add(booking_id)
+            original = base.get(booking_id)
+            if original == booking:
+                continue
+            row = conn.execute('SELECT data FROM bookings WHERE id = ?', (booking_id,)).fetchone()
+            if row is None:
+                merged = booking
+                conn.execute(
+                    'INSERT INTO bookings (id, boat_type, date, end_date, payment_id, status, data) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (booking_id,) + _columns(merged) + (json.dumps(merged, ensure_ascii=False),))
+            else:
+                merged = json.loads(row[0])
+                original = original or {}
+                for key in set(booking) | set(original):
+                    if key not in booking:
+                        merged.pop(key, None)
+                    elif booking[key] != original.get(key, _MISSING):
+                        merged[key] = booking[key]
+                conn.execute(
+                    'UPDATE bookings SET boat_type = ?, date = ?, end_date = ?, payment_id = ?, status = ?, '
+                    'data = ? WHERE id = ?',
+                    _columns(merged) + (json.dumps(merged, ensure_ascii=False), booking_id))
+            touched += 1
+        for booking_id in base:
+            if booking_id not in seen:
+                conn.execute('DELETE FROM bookings WHERE id = ?', (booking_id,))
+                touched += 1
+        return touched
+
+    def _migrate_from_json(self):
+        """One-time import of the existing bookings.json"""
+        # A damaged file raises: migrating it as empty would lose every booking
+        bookings = self._read_json() or []
+
+        def migrate(conn):
+            # Another process may have migrated while we waited for the lock
+            if conn.execute('PRAGMA user_version').fetchone()[0] < SCHEMA_VERSION:
+                self._import(conn, bookings)
+                self._set_base(conn, bookings, self._json_state())
+                conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+        self._transaction(migrate)
+        if bookings:
+            print(f"✅ Imported {len(bookings)} bookings from {self.json_path} into {self.db_path}")
+
+    def _sync_external_changes(self, hold_lock: bool = True):
+        """Merge bookings.json into the store if something other than this store rewrote it"""
+        if not self.json_path:
+            return
+        state = self._json_state()
+        if state is None or state == self._meta('json_state'):
+            return
+        if hold_lock:
+            # Only on a changed file: wait for a running export to record its own version
+            with locked(self.json_path):
+                self._sync_external_changes(hold_lock=False)
+            return
+        try:
+            bookings = self._read_json()
+        except JSONFileError as e:
+            # Keep serving the bookings already in the database
+            print(f"⚠️ {e}")
+            return
+        if bookings is None:
+            return
+
+        def merge(conn):
+            # Another thread or process may have merged this version already
+            if self._meta('json_state') == state:
+                return 0
+            touched = self._merge_external(conn, bookings)
+            self._set_base(conn, bookings, state)
+            return touched
+
+        with self._occupancy_lock:
+            touched = self._transaction(merge)
+            if touched:
+                self._occupancy = None
+        if touched:
+            print(f"🔄 Merged {touched} bookings changed externally in {self.json_path}")
+
+    def _schedule_export(self):
+        if not self.json_path or self._closed:
+            return
+        with self._export_lock:
+            self._export_pending = True
+            if self.export_delay > 0:
+                # Changes within export_delay share one rewrite of the file
+                if self._export_timer is None:
+                    self._export_timer = threading.Timer(self.export_delay, self.flush)
+                    self._export_timer.daemon = True
+                    self._export_timer.start()
+                return
+        self.flush()
+
+    def flush(self) -> bool:
+        """Write pending changes to bookings.json now"""
+        with self._export_lock:
+            if self._export_timer is not None:
+                self._export_timer.cancel()
+                self._export_timer = None
+            if not self._export_pending:
+                return True
+            try:
+                self.export_json()
+            except (OSError, sqlite3.Error) as e:
+                print(f"❌ Error exporting bookings to {self.json_path}: {e}")
+                return False
+            self._export_pending = False
+            return True
+
+    def export_json(self, path: Optional[str] = None):
+        """Write all bookings as a JSON list, atomically (tmp file + fsync + rename)"""
+        path = path or self.json_path
+        if path != self.json_path:
+            with locked(path):
+                write_json(path, self.all())
+            return
+        with locked(path):
+            # Under the file's write lock no other writer can change it between
+            # merging its last external changes and replacing it
+            self._sync_external_changes(hold_lock=False)
+            rows = self._conn().execute('SELECT data FROM bookings ORDER BY seq').fetchall()
+            bookings = [json.loads(row[0]) for row in rows]
+            write_json(path, bookings)
+            self._transaction(lambda conn: self._set_base(conn, bookings, self._json_state()))
+
+    # --- dict-shaped API ---
+
+    def all(self) -> List[Dict[str, Any]]:
+        """All bookings in insertion order"""
+        self._sync_external_changes()
+        rows = self._conn().execute('SELECT data FROM bookings ORDER BY seq').fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def get(self, booking_id: str) -> Optional[Dict[str, Any]]:
+        self._sync_external_changes()
+        row = self._conn().execute('SELECT data FROM bookings WHERE id = ?', (booking_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find_by_payment_id(self, payment_id: str) -> List[Dict[str, Any]]:
+        """Bookings paid with one Mollie payment (a cart can hold several)"""
+        self._sync_external_changes()
+        rows = self._conn().execute(
+            'SELECT data FROM bookings WHERE payment_id = ? ORDER BY seq', (payment_id,)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def for_boat(self, boat_type: str, start_date: str, end_date: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Bookings of a boat type whose date range overlaps start_date..end_date (YYYY-MM-DD)"""
+        self._sync_external_changes()
+        rows = self._conn().execute(
+            'SELECT data FROM bookings WHERE boat_type = ? AND date <= ? AND end_date >= ? ORDER BY seq',
+            (boat_type, end_date or start_date, start_date)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def add(self, booking: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert a booking; raises ValueError if its id is missing or already used"""
+        if not booking.get('id'):
+            raise ValueError('Booking id required')
+        self._sync_external_changes()
+
+        def insert(conn):
+            try:
+                conn.execute(
+                    'INSERT INTO bookings (id, boat_type, date, end_date, payment_id, status, data) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (booking['id'],) + _columns(booking) + (json.dumps(booking, ensure_ascii=False),))
+            except sqlite3.IntegrityError:
+                raise ValueError(f"Booking {booking['id']} already exists")
+            return booking
+
+        return self._write(insert, lambda index, added: index.add(added))
+
+    def update(self, booking_id: str, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Merge changes into a booking; returns the updated booking or None if not found"""
+        self._sync_external_changes()
+
+        def merge(conn):
+            row = conn.execute('SELECT data FROM bookings WHERE id = ?', (booking_id,)).fetchone()
+            if row is None:
+                return None
+            old = json.loads(row[0])
+            booking = dict(old)
+            booking.update(changes)
+            booking['id'] = booking_id
+            conn.execute(
+                'UPDATE bookings SET boat_type = ?, date = ?, end_date = ?, payment_id = ?, status = ?, '
+                'data = ? WHERE id = ?',
+                _columns(booking) + (json.dumps(booking, ensure_ascii=False), booking_id))
+            return old, booking
+
+        def reindex(index, result):
+            if result is not None:
+                index.replace(*result)
+
+        result = self._write(merge, reindex)
+        return result[1] if result is not None else None
+
+    def delete(self, booking_id: str) -> bool:
+        self._sync_external_changes()
+
+        def remove(conn):
+            row = conn.execute('SELECT data FROM bookings WHERE id = ?', (booking_id,)).fetchone()
+            if row is None:
+                return None
+            conn.execute('DELETE FROM bookings WHERE id = ?', (booking_id,))
+            return json.loads(row[0])
+
+        return self._write(remove, lambda index, removed: index.remove(removed)) is not None
+
+    def replace_all(self, bookings: List[Dict[str, Any]]):
+        """Replace every booking (bulk save of a full list)"""
+        self._write(lambda conn: self._import(conn, bookings))
+
+    def occupancy(self) -> OccupancyIndex:
+        """Day index of blocking bookings, built on first use"""
+        self._sync_external_changes()
+        with self._occupancy_lock:
+            if self._occupancy is None:
+                rows = self._conn().execute('SELECT data FROM bookings').fetchall()
+                self._occupancy = OccupancyIndex(json.loads(row[0]) for row in rows)
+            return self._occupancy
+
+    def __len__(self) -> int:
+        self._sync_external_changes()
+        return self._conn().execute('SELECT COUNT(*) FROM bookings').fetchone()[0]
+
+    def close(self):
+        self.flush()
+        self._closed = True
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
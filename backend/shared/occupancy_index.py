@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Occupancy Index for Nijenhuis
+Per-boat, per-year arrays of day counters built from the blocking bookings,
+so availability for a date range is one array read per day
+"""
+
+import threading
+from array import array
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+NON_BLOCKING_STATUSES = ('canceled', 'cancelled', 'payment-rejected', 'failed', 'expired', 'rejected')
+BLOCKING_STATUSES = ('success', 'manual', 'paid', 'picked_up', 'confirmed', 'confirmed-paid')
+
+
+def is_blocking_booking(booking: Dict[str, Any]) -> bool:
+    """True if the booking occupies its boat (paid, confirmed or manual)"""
+    status = (booking.get('status') or '').strip()
+    payment_id = (booking.get('paymentId') or '').strip()
+    has_online_payment = bool(payment_id) and not payment_id.startswith('manual_')
+
+    # Non-blocking statuses
+    if status in NON_BLOCKING_STATUSES:
+        return False
+    if status == 'temporary':
+        return False
+    if has_online_payment and status in ('pending', 'open', 'not-confirmed'):
+        return False
+
+    # Blocking statuses
+    return status in BLOCKING_STATUSES
+
+
+def parse_date(value: str) -> date:
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def booking_range(booking: Dict[str, Any]) -> Optional[Tuple[date, date]]:
+    """(first day, last day) of a booking, or None if its dates do not parse"""
+    if not booking.get('date'):
+        return None
+    try:
+        start = parse_date(booking['date'])
+        end = parse_date(booking.get('endDate') or booking['date'])
+    except (TypeError, ValueError):
+        return None
+    return start, end
+
+
+def day_of_year_index(day: date) -> int:
+    """0-based index of a day in its year's counter array"""
+    return day.toordinal() - date(day.year, 1, 1).toordinal()
+
+
+def run_length_encode(values: Iterable[int]) -> List[int]:
+    """[value, run, value, run, ...]; a season of mostly equal days stays a few numbers long"""
+    runs: List[int] = []
+    for value in values:
+        if runs and runs[-2] == value:
+            runs[-1] += 1
+        else:
+            runs += [value, 1]
+    return runs
+
+
+class OccupancyIndex:
+    """
+    Number of blocking bookings per boat per day
+
+    Counters are kept in one array of 366 unsigned shorts per boat and year,
+    indexed by day of the year (the April-October season falls inside it;
+    bookings outside the season are counted as well). Building parses every
+    booking's dates once; after that create, update and delete adjust only
+    the days of the affected booking, and a range check costs one array read
+    per day (a slice of the year's array).
+    """
+
+    def __init__(self, bookings: Iterable[Dict[str, Any]] = ()):
+        self._days: Dict[Tuple[str, int], array] = {}
+        self._lock = threading.Lock()
+        for booking in bookings:
+            self._apply(booking, 1)
+
+    def _apply(self, booking: Dict[str, Any], delta: int):
+        if not booking or not is_blocking_booking(booking):
+            return
+        boat_id = booking.get('boatType')
+        dates = booking_range(booking)
+        if not boat_id or dates is None:
+            return
+        day, end = dates
+        while day <= end:
+            key = (boat_id, day.year)
+            counters = self._days.get(key)
+            if counters is None:
+                counters = self._days[key] = array('H', bytes(2 * 366))
+            index = day_of_year_index(day)
+            counters[index] = max(0, counters[index] + delta)
+            day += timedelta(days=1)
+
+    def add(self, booking: Dict[str, Any]):
+        with self._lock:
+            self._apply(booking, 1)
+
+    def remove(self, booking: Dict[str, Any]):
+        with self._lock:
+            self._apply(booking, -1)
+
+    def replace(self, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]):
+        """Apply an update of one booking"""
+        with self._lock:
+            self._apply(old, -1)
+            self._apply(new, 1)
+
+    def counts(self, boat_id: str, start: date, end: date) -> List[int]:
+        """Blocking bookings of a boat on each day from start to end (inclusive)"""
+        result: List[int] = []
+        for year in range(start.year, end.year + 1):
+            first = day_of_year_index(start) if year == start.year else 0
+            last = day_of_year_index(end) if year == end.year else day_of_year_index(date(year, 12, 31))
+            counters = self._days.get((boat_id, year))
+            if counters is None:
+                result.extend([0] * (last - first + 1))
+            else:
+                result.extend(counters[first:last + 1])
+        return result
+
+    def first_full_day(self, boat_id: str, start: date, end: date, total: int) -> Optional[date]:
+        """First day in start..end on which all `total` boats are booked, or None"""
+        for offset, count in enumerate(self.counts(boat_id, start, end)):
+            if count >= total:
+                return start + timedelta(days=offset)
+        return None
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Shared State Backend for Nijenhuis
+Small key/value abstraction for state that must be shared between app
+servers (rate limits, conversation contexts, admin sessions): an in-process
+implementation and a Redis-protocol (RESP2) client without extra dependencies
+"""
+
+import json
+import os
+import select
+import socket
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlparse, unquote
+
+
+class StateBackendError(Exception):
+    """The state backend could not be reached or rejected a command"""
+
+
+class StateBackend(ABC):
+    """
+    Interface of a state backend. Values are strings; ttl is in seconds.
+    `shared` tells whether other hosts see the same state.
+    """
+
+    name = 'base'
+    shared = False
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """Return the value, or None if the key does not exist"""
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl: Optional[float] = None, only_if_absent: bool = False) -> bool:
+        """Store a value; with only_if_absent, returns False if the key already exists"""
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        """Remove a key; returns whether it existed"""
+
+    @abstractmethod
+    def incr(self, key: str, ttl: float) -> int:
+        """Atomically increment a counter; a new counter expires after ttl"""
+
+    def get_json(self, key: str) -> Optional[Any]:
+        raw = self.get(key)
+        if raw is None:
+            return None
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return None
+
+    def set_json(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        return self.set(key, json.dumps(value, ensure_ascii=False), ttl)
+
+    def close(self):
+        pass
+
+
+class InMemoryStateBackend(StateBackend):
+    """Dictionary with per-key expiry; state is local to the process"""
+
+    name = 'memory'
+    shared = False
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[str, Optional[float]]] = {}
+        self._lock = threading.Lock()
+        self._sweep_at = 1024
+
+    def _live(self, key: str, now: float) -> Optional[Tuple[str, Optional[float]]]:
+        item = self._data.get(key)
+        if item is not None and item[1] is not None and item[1] <= now:
+            del self._data[key]
+            return None
+        return item
+
+    def _sweep(self, now: float):
+        # Expired keys are removed lazily; a full sweep runs when the dict doubles
+        if len(self._data) >= self._sweep_at:
+            self._data = {key: item for key, item in self._data.items() if item[1] is None or item[1] > now}
+            self._sweep_at = max(1024, len(self._data) * 2)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._live(key, time.time())
+            return item[0] if item else None
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None, only_if_absent: bool = False) -> bool:
+        now = time.time()
+        with self._lock:
+            if only_if_absent and self._live(key, now) is not None:
+                return False
+            self._data[key] = (str(value), now + ttl if ttl is not None else None)
+            self._sweep(now)
+            return True
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def incr(self, key: str, ttl: float) -> int:
+        now = time.time()
+        with self._lock:
+            item = self._live(key, now)
+            if item is None:
+                value, expires_at = 1, now + ttl
+            else:
+                value, expires_at = int(item[0]) + 1, item[1]
+            self._data[key] = (str(value), expires_at)
+            self._sweep(now)
+            return value
+
+
+class RedisStateBackend(StateBackend):
+    """
+    Minimal RESP2 client for Redis (or any server speaking its protocol)
+
+    One connection per thread and process (connections are not shared across
+    a fork). Only failures before a batch is sent are retried on a fresh
+    connection; a connection the server closed while idle is replaced first.
+    URL format: redis://[:password@]host[:port][/db]
+    """
+
+    name = 'redis'
+    shared = True
+
+    def __init__(self, url: str, timeout: float = None, key_prefix: str = None):
+        parsed = urlparse(url)
+        if parsed.scheme != 'redis':
+            raise ValueError(f"Unsupported state backend URL: {url}")
+        self.host = parsed.hostname or '127.0.0.1'
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip('/') or 0)
+        self.timeout = timeout if timeout is not None else float(os.environ.get('STATE_BACKEND_TIMEOUT', '1.0'))
+        self.key_prefix = key_prefix if key_prefix is not None else os.environ.get('STATE_BACKEND_PREFIX', 'nijenhuis:')
+        self._local = threading.local()
+
+    # --- protocol ---
+
+    @staticmethod
+    def _encode(args) -> bytes:
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode('utf-8')
+            parts.append(b'$%d\r\n%s\r\n' % (len(data), data))
+        return b''.join(parts)
+
+    def _read_reply(self, reader):
+        line = reader.readline()
+        if not line.endswith(b'\r\n'):
+            raise ConnectionError("Connection closed by state backend")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload.decode('utf-8')
+        if kind == b'-':
+            raise StateBackendError(payload.decode('utf-8', 'replace'))
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError("Connection closed by state backend")
+            return data[:-2].decode('utf-8')
+        if kind == b'*':
+            count = int(payload)
+            return None if count < 0 else [self._read_reply(reader) for _ in range(count)]
+        raise StateBackendError(f"Unexpected reply from state backend: {line[:40]!r}")
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        reader = sock.makefile('rb')
+        connection = (sock, reader, os.getpid())
+        if self.password:
+            self._roundtrip(connection, [('AUTH', self.password)])
+        if self.db:
+            self._roundtrip(connection, [('SELECT', self.db)])
+        return connection
+
+    def _roundtrip(self, connection, commands: List[tuple]) -> List[Any]:
+        sock, reader, _ = connection
+        sock.sendall(b''.join(self._encode(command) for command in commands))
+        replies = []
+        error = None
+        for _ in commands:
+            try:
+                replies.append(self._read_reply(reader))
+            except StateBackendError as e:
+                # Keep reading so the connection stays in sync
+                error = error or e
+                replies.append(None)
+        if error:
+            raise error
+        return replies
+
+    def _drop_connection(self):
+        connection = getattr(self._local, 'connection', None)
+        self._local.connection = None
+        if connection is not None:
+            try:
+                connection[1].close()
+                connection[0].close()
+            except OSError:
+                pass
+
+    @staticmethod
+    def _is_stale(connection) -> bool:
+        """True if an idle connection has something to read: the server closed or reset it"""
+        try:
+            readable, _, _ = select.select([connection[0]], [], [], 0)
+        except (OSError, ValueError):
+            return True
+        return bool(readable)
+
+    def pipeline(self, commands: List[tuple]) -> List[Any]:
+        """
+        Send several commands in one round trip and return their replies
+
+        Connecting is retried once. A batch that failed after sending started
+        is not: the server may have run it, and INCR would count twice.
+        """
+        for attempt in (1, 2):
+            sent = False
+            try:
+                connection = getattr(self._local, 'connection', None)
+                if connection is not None and (connection[2] != os.getpid() or self._is_stale(connection)):
+                    self._drop_connection()
+                    connection = None
+                if connection is None:
+                    connection = self._local.connection = self._connect()
+                sent = True
+                return self._roundtrip(connection, commands)
+            except (OSError, ConnectionError) as e:
+                self._drop_connection()
+                if sent or attempt == 2:
+                    raise StateBackendError(f"State backend {self.host}:{self.port} unavailable: {e}") from e
+
+    def execute(self, *args) -> Any:
+        return self.pipeline([args])[0]
+
+    # --- StateBackend ---
+
+    def _key(self, key: str) -> str:
+        return self.key_prefix + key
+
+    def get(self, key: str) -> Optional[str]:
+        return self.execute('GET', self._key(key))
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None, only_if_absent: bool = False) -> bool:
+        args = ['SET', self._key(key), value]
+        if ttl is not None:
+            args += ['PX', max(1, int(ttl * 1000))]
+        if only_if_absent:
+            args.append('NX')
+        return self.execute(*args) == 'OK'
+
+    def delete(self, key: str) -> bool:
+        return bool(self.execute('DEL', self._key(key)))
+
+    def incr(self, key: str, ttl: float) -> int:
+        # SET NX gives a new counter its expiry; both commands share one round trip
+        full_key = self._key(key)
+        replies = self.pipeline([
+            ('SET', full_key, 0, 'PX', max(1, int(ttl * 1000)), 'NX'),
+            ('INCR', full_key),
+        ])
+        return replies[1]
+
+    def ping(self) -> bool:
+        return self.execute('PING') == 'PONG'
+
+    def close(self):
+        self._drop_connection()
+
+
+def create_state_backend(url: str = None) -> StateBackend:
+    """Backend for a URL: 'memory' (default) or redis://host:port/db"""
+    url = url if url is not None else os.environ.get('STATE_BACKEND_URL', '')
+    if not url or url == 'memory':
+        return InMemoryStateBackend()
+    return RedisStateBackend(url)
+
+
+def state_backend_configured() -> bool:
+    """True when STATE_BACKEND_URL points at a backend shared between hosts"""
+    return os.environ.get('STATE_BACKEND_URL', 'memory') not in ('', 'memory')
+
+
+# Global state backend instance
+_state_backend: Optional[StateBackend] = None
+_state_backend_lock = threading.Lock()
+
+
+def get_state_backend() -> StateBackend:
+    """Get the global state backend (configured by STATE_BACKEND_URL)"""
+    global _state_backend
+    if _state_backend is None:
+        with _state_backend_lock:
+            if _state_backend is None:
+                _state_backend = create_state_backend()
+    return _state_backend
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Static Asset Cache for Nijenhuis
+In-memory metadata (size, mtime, strong ETag, precompressed .gz variant) of
+files served by the local booking server, so an unchanged asset costs a
+stat() and a 304 instead of a full transfer
+"""
+
+import hashlib
+import os
+import socket
+import stat
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+HASH_CHUNK_SIZE = 1024 * 1024
+MAX_CACHED_ASSETS = 4096
+
+
+def _stat_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    """(mtime_ns, size, inode) of a regular file, or None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _content_etag(path: str, suffix: str = '') -> str:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return '"' + digest.hexdigest()[:20] + suffix + '"'
+
+
+class AssetVariant:
+    """One representation of an asset: the file itself or its .gz"""
+
+    def __init__(self, path: str, size: int, etag: str, encoding: Optional[str] = None):
+        self.path = path
+        self.size = size
+        self.etag = etag
+        self.encoding = encoding
+
+
+class StaticAsset:
+    """Metadata of a file and its optional precompressed variant"""
+
+    def __init__(self, path: str, signature: Tuple[int, int, int], gzip_signature: Optional[Tuple[int, int, int]]):
+        self.path = path
+        self.signature = signature
+        self.gzip_signature = gzip_signature
+        self.mtime = signature[0] // 1_000_000_000
+        self.last_modified = formatdate(self.mtime, usegmt=True)
+        self.identity = AssetVariant(path, signature[1], _content_etag(path))
+        self.gzip = None
+        if gzip_signature:
+            self.gzip = AssetVariant(path + '.gz', gzip_signature[1], _content_etag(path + '.gz', '-gz'), 'gzip')
+
+    def variant(self, accepts_gzip: bool) -> AssetVariant:
+        return self.gzip if accepts_gzip and self.gzip else self.identity
+
+
+class StaticAssetCache:
+    """Asset metadata by path, revalidated with stat() on every lookup"""
+
+    def __init__(self, max_entries: int = MAX_CACHED_ASSETS):
+        self.max_entries = max_entries
+        self._assets: Dict[str, StaticAsset] = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, path: str) -> Optional[StaticAsset]:
+        """The asset at path, or None if it is not a regular file"""
+        signature = _stat_signature(path)
+        if signature is None:
+            with self._lock:
+                self._assets.pop(path, None)
+            return None
+        gzip_signature = _stat_signature(path + '.gz')
+        # A .gz older than its source is stale and not served
+        if gzip_signature and gzip_signature[0] < signature[0]:
+            gzip_signature = None
+
+        with self._lock:
+            asset = self._assets.get(path)
+        if asset and asset.signature == signature and asset.gzip_signature == gzip_signature:
+            return asset
+
+        try:
+            asset = StaticAsset(path, signature, gzip_signature)
+        except OSError:
+            return None
+        with self._lock:
+            if len(self._assets) >= self.max_entries:
+                self._assets.clear()
+            self._assets[path] = asset
+        return asset
+
+    def clear(self):
+        with self._lock:
+            self._assets.clear()
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """True if an Accept-Encoding header allows gzip (q=0 refuses it)"""
+    for part in (accept_encoding or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        if coding.strip().lower() not in ('gzip', 'x-gzip', '*'):
+            continue
+        params = params.replace(' ', '')
+        if params.startswith('q='):
+            try:
+                return float(params[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if if_none_match.strip() == '*':
+        return True
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def not_modified(if_none_match: Optional[str], if_modified_since: Optional[str], etag: str, mtime: int) -> bool:
+    """True if the request's validators still match (If-None-Match wins over If-Modified-Since)"""
+    if if_none_match:
+        return etag_matches(if_none_match, etag)
+    if if_modified_since:
+        try:
+            return mtime <= int(parsedate_to_datetime(if_modified_since).timestamp())
+        except (TypeError, ValueError, IndexError, OverflowError):
+            return False
+    return False
+
+
+def send_file(connection: socket.socket, path: str, size: int) -> int:
+    """Send a file over the connection with sendfile (zero-copy where the OS
+    supports it); returns the bytes sent, less than size if the file shrank"""
+    with open(path, 'rb') as f:
+        return connection.sendfile(f, 0, size)
+
+
+_static_assets: Optional[StaticAssetCache] = None
+_static_assets_lock = threading.Lock()
+
+
+def get_static_assets() -> StaticAssetCache:
+    """Get the process-wide asset cache"""
+    global _static_assets
+    if _static_assets is None:
+        with _static_assets_lock:
+            if _static_assets is None:
+                _static_assets = StaticAssetCache()
+    return _static_assets
@@ -18,6 +18,10 @@ from datetime import datetime
 import sqlite3
 import threading
 
+# Shared atomic JSON helpers (backend/shared) from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+from backend.shared.atomic_json import read_json, update_json
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -187,21 +191,11 @@ class ProductionMollieWebhookHandler(BaseHTTPRequestHandler):
             bookings_file = os.path.join(self._root, 'data', 'bookings.json')
             # Legacy path (migration)
             legacy_admin = os.path.join(self._root, 'admin', 'bookings.json')
-            for path in (bookings_file, legacy_admin):
-                if os.path.exists(path):
-                    with open(path, 'r') as f:
-                        bookings = json.load(f)
-                        for booking in bookings:
-                            if booking.get('paymentId') == payment_id:
-                                return booking
-
             storage_file = os.path.join(self._root, 'local_bookings.json')
-            if os.path.exists(storage_file):
-                with open(storage_file, 'r') as f:
-                    bookings = json.load(f)
-                    for booking in bookings:
-                        if booking.get('paymentId') == payment_id:
-                            return booking
+            for path in (bookings_file, legacy_admin, storage_file):
+                for booking in read_json(path, default=[]):
+                    if booking.get('paymentId') == payment_id:
+                        return booking
             
             return None
         except Exception as e:
@@ -251,25 +245,19 @@ class ProductionMollieWebhookHandler(BaseHTTPRequestHandler):
                 if not os.path.exists(file_path):
                     continue
                 
-                # Read existing bookings
-                with open(file_path, 'r') as f:
-                    bookings = json.load(f)
-                
                 # Find booking with this payment ID and update status
-                updated = False
-                for booking in bookings:
-                    if booking.get('paymentId') == payment_id:
-                        booking['status'] = booking_status
-                        booking['paymentStatus'] = payment_status
-                        booking['updatedAt'] = datetime.now().isoformat()
-                        logging.info(f"Updated booking {booking.get('id')} status to {booking_status} in {file_path}")
-                        updated = True
-                        break
+                def set_status(bookings):
+                    for booking in bookings:
+                        if booking.get('paymentId') == payment_id:
+                            booking['status'] = booking_status
+                            booking['paymentStatus'] = payment_status
+                            booking['updatedAt'] = datetime.now().isoformat()
+                            logging.info(f"Updated booking {booking.get('id')} status to {booking_status} in {file_path}")
+                            return bookings
+                    return None
                 
-                # Write updated bookings back to file
-                if updated:
-                    with open(file_path, 'w') as f:
-                        json.dump(bookings, f, indent=2)
+                # Read-modify-write under the file's lock, replaced atomically
+                update_json(file_path, set_status, default=[])
                 
         except Exception as e:
             logging.error(f"Local storage update error: {str(e)}")
@@ -293,15 +281,11 @@ class ProductionMollieWebhookHandler(BaseHTTPRequestHandler):
             boat_name = booking.get('boatType', 'Unknown')
             boat_found = False
             for bf in (boats_file, legacy_boats):
-                if not os.path.exists(bf):
-                    continue
-                with open(bf, 'r') as f:
-                    boats = json.load(f)
-                    for boat in boats:
-                        if boat.get('id') == booking.get('boatType'):
-                            boat_name = boat.get('name', boat_name)
-                            boat_found = True
-                            break
+                for boat in read_json(bf, default=[]):
+                    if boat.get('id') == booking.get('boatType'):
+                        boat_name = boat.get('name', boat_name)
+                        boat_found = True
+                        break
                 if boat_found:
                     break
             
@@ -74,45 +74,68 @@ function loadJsonSafe($filePath) {
 }
 
 /**
- * Save data to a JSON file safely using exclusive locks.
+ * Save data to a JSON file safely.
+ * 
+ * Writers serialize on the sidecar lock file .<name>.lock, the same lock the
+ * Python side takes (backend/shared/atomic_json.py), and replace the file
+ * with a complete temp file. Readers see the old or the new version, never
+ * a partial one, and no writer writes into a file that is being replaced.
  * 
  * @param string $filePath Absolute path to the JSON file
  * @param array $data The data to save
  * @return bool True on success, false on failure
  */
 function saveJsonSafe($filePath, $data) {
-    $fp = fopen($filePath, 'c+'); // Open for reading and writing; place pointer at beginning
-    if (!$fp) {
-        error_log("saveJsonSafe: Could not open file $filePath");
+    $json = json_encode($data, JSON_PRETTY_PRINT | JSON_UNESCAPED_UNICODE | JSON_UNESCAPED_SLASHES);
+    if ($json === false) {
+        error_log("saveJsonSafe: JSON encoding failed: " . json_last_error_msg());
+        return false;
+    }
+
+    $dir = dirname($filePath);
+    $name = basename($filePath);
+    // Read-only is enough for flock, so the web server and the Python
+    // processes can share the lock file whoever created it
+    $lockPath = $dir . '/.' . $name . '.lock';
+    if (!file_exists($lockPath)) {
+        @touch($lockPath);
+        @chmod($lockPath, 0644);
+    }
+    $lockFp = fopen($lockPath, 'r');
+    if (!$lockFp) {
+        error_log("saveJsonSafe: Could not open lock file for $filePath");
+        return false;
+    }
+    if (!flock($lockFp, LOCK_EX)) {
+        error_log("saveJsonSafe: Could not acquire lock for $filePath");
+        fclose($lockFp);
         return false;
     }
 
     $result = false;
-    // Acquire exclusive lock
-    if (flock($fp, LOCK_EX)) {
-        // Truncate file to 0 length
-        ftruncate($fp, 0);
-        rewind($fp);
-        
-        $json = json_encode($data, JSON_PRETTY_PRINT | JSON_UNESCAPED_UNICODE | JSON_UNESCAPED_SLASHES);
-        if ($json !== false) {
-            $written = fwrite($fp, $json);
-            if ($written !== false) {
-                $result = true;
-            } else {
-                error_log("saveJsonSafe: Failed to write to file $filePath");
-            }
-        } else {
-            error_log("saveJsonSafe: JSON encoding failed: " . json_last_error_msg());
-        }
-        
-        fflush($fp); // Flush output before releasing lock
-        flock($fp, LOCK_UN);
+    $tmpPath = $dir . '/.' . $name . '.' . bin2hex(random_bytes(4)) . '.tmp';
+    if (file_put_contents($tmpPath, $json) === false) {
+        error_log("saveJsonSafe: Failed to write to file $tmpPath");
     } else {
-        error_log("saveJsonSafe: Could not acquire lock for $filePath");
+        @chmod($tmpPath, file_exists($filePath) ? (fileperms($filePath) & 0777) : 0644);
+        // Wait for readers and legacy in-place writers of the current file
+        $current = @fopen($filePath, 'r');
+        if ($current) {
+            flock($current, LOCK_EX);
+        }
+        $result = rename($tmpPath, $filePath);
+        if ($current) {
+            flock($current, LOCK_UN);
+            fclose($current);
+        }
+        if (!$result) {
+            @unlink($tmpPath);
+            error_log("saveJsonSafe: Could not replace $filePath");
+        }
     }
-    
-    fclose($fp);
+
+    flock($lockFp, LOCK_UN);
+    fclose($lockFp);
     return $result;
 }
 ?>
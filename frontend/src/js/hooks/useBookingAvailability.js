@@ -1,8 +1,12 @@
 /**
  * useBookingAvailability Hook
  * 
- * Manages fetching bookings, polling for updates, and checking
+ * Manages fetching availability, polling for updates, and checking
  * real-time availability of boats against the booking calendar.
+ *
+ * Prefers the server's availability calendar (?action=availability:
+ * remaining boats per day, run-length encoded); falls back to fetching the
+ * public booking list when the endpoint is not available.
  */
 (function (window) {
     'use strict';
@@ -13,9 +17,13 @@
     let _isPolling = false;
     let _pollIntervalId = null;
     let _lastHash = '';
+    let _availability = null; // { startDay, days, boats: { id: { total, remaining: [] } } }
+    let _availabilityRaw = '';
+    let _availabilitySupported = true;
 
     // Constants
     const STORAGE_KEY = 'nijenhuis_bookings';
+    const AVAILABILITY_STORAGE_KEY = 'nijenhuis_availability';
     const POLL_INTERVAL = 30000; // 30 sec
 
     // Helper: secure access to global config
@@ -26,12 +34,70 @@
         return '../admin/booking-handler.php';
     };
 
+    // Days since epoch for a YYYY-MM-DD string (UTC, so no DST shifts)
+    const dayNumber = (dateStr) => {
+        const parts = dateStr.split('-');
+        return Math.floor(Date.UTC(parseInt(parts[0]), parseInt(parts[1]) - 1, parseInt(parts[2])) / 86400000);
+    };
+
+    // Expand [value, run, value, run, ...] into one value per day
+    const decodeRuns = (runs) => {
+        const values = [];
+        for (let i = 0; i + 1 < runs.length; i += 2) {
+            for (let n = 0; n < runs[i + 1]; n++) values.push(runs[i]);
+        }
+        return values;
+    };
+
+    const applyAvailability = (raw) => {
+        const data = JSON.parse(raw);
+        if (!data || !data.success || !data.boats || !data.from) return false;
+        const boats = {};
+        Object.keys(data.boats).forEach(id => {
+            boats[id] = { total: Number(data.boats[id].total), remaining: decodeRuns(data.boats[id].remaining || []) };
+        });
+        _availability = { startDay: dayNumber(data.from), days: Number(data.days), boats };
+        _availabilityRaw = raw;
+        return true;
+    };
+
     function useBookingAvailability() {
 
         /**
-         * Fetch bookings from server
+         * Fetch the availability calendar; false if the server does not offer it
+         */
+        const fetchAvailability = async () => {
+            const endpoint = getEndpoint();
+            // no-cache on the response: the browser revalidates with the ETag (304 when unchanged)
+            const res = await fetch(`${endpoint}?action=availability`, { method: 'GET' });
+            if (!res.ok) return false;
+            const raw = await res.text();
+            if (!applyAvailability(raw)) return false;
+            try {
+                localStorage.setItem(AVAILABILITY_STORAGE_KEY, raw);
+            } catch (e) { }
+            return true;
+        };
+
+        /**
+         * Fetch availability from server (calendar endpoint, else the booking list)
          */
         const fetchBookings = async () => {
+            if (_availabilitySupported) {
+                try {
+                    if (await fetchAvailability()) return _bookings;
+                    _availabilitySupported = false;
+                    _availability = null;
+                } catch (e) {
+                    console.warn('Failed to fetch availability:', e);
+                    // Fallback to cache
+                    try {
+                        const stored = localStorage.getItem(AVAILABILITY_STORAGE_KEY);
+                        if (stored && applyAvailability(stored)) return _bookings;
+                    } catch (err) { }
+                }
+            }
+
             try {
                 const endpoint = getEndpoint();
                 const res = await fetch(`${endpoint}?action=getPublicBookings`, {
@@ -66,6 +132,20 @@
          */
         const checkAvailability = (boatId, startDate, endDate, boatTotalConfig = 1) => {
             if (Number(boatTotalConfig) <= 0) return false;
+
+            const calendar = _availability && _availability.boats[boatId];
+            if (calendar) {
+                const first = dayNumber(startDate) - _availability.startDay;
+                const last = dayNumber(endDate || startDate) - _availability.startDay;
+                for (let i = Math.max(first, 0); i <= last && i < _availability.days; i++) {
+                    // Booked = boats in the calendar minus remaining
+                    if (calendar.total - calendar.remaining[i] >= boatTotalConfig) {
+                        return false; // Fully booked on this specific day
+                    }
+                }
+                return true;
+            }
+
             if (!_bookings || !_bookings.length) return true; // Assume available if no data? Or false? 
             // In original code: if bookings empty, they return true (loop doesn't run)
 
@@ -157,7 +237,7 @@
 
         // Polling Logic: server no longer returns booking ids (PII), so key the
         // change-detection hash off the fields that actually affect availability.
-        const _hash = (data) => JSON.stringify(
+        const _hash = (data) => _availability ? _availabilityRaw : JSON.stringify(
             data.map(b => `${b.boatType}|${b.date}|${b.endDate || b.date}|${b.status}`).sort()
         );
 
@@ -44,6 +44,21 @@ tmp_upload_dir = None
 # Preloading
 preload_app = True  # Load app before forking workers
 
+# Keep the cyclic GC off while the app is preloaded; pre_fork freezes the
+# resulting heap and turns it back on (see core/process_memory.py)
+if preload_app:
+    import sys
+    _project_root = os.path.dirname(os.path.abspath(__file__))
+    if _project_root not in sys.path:
+        sys.path.insert(0, _project_root)
+    from backend.chatbot.core.process_memory import disable_gc_for_preload
+    disable_gc_for_preload()
+
+def _preloaded_chatbot_server():
+    """The chatbot API module, if preload_app already imported it in the master"""
+    import sys
+    return sys.modules.get("backend.chatbot.api.server")
+
 # Hooks for systemd watchdog integration
 def on_starting(server):
     """Called just before the master process is initialized."""
@@ -52,6 +67,14 @@ def on_starting(server):
 def when_ready(server):
     """Called just after the server is started."""
     server.log.info("Nijenhuis Chatbot is ready to serve requests")
+    # One connection monitor for all workers, publishing through shared memory
+    chatbot_server = _preloaded_chatbot_server()
+    if chatbot_server is not None:
+        try:
+            pid = chatbot_server.start_shared_health_monitor()
+            server.log.info(f"Shared health monitor started (pid {pid})")
+        except Exception as e:
+            server.log.warning(f"Failed to start shared health monitor: {e}")
     # Notify systemd that we're ready
     try:
         import sdnotify
@@ -65,12 +88,36 @@ def when_ready(server):
 
 def pre_fork(server, worker):
     """Called just before a worker is forked."""
-    pass
+    # Move the preloaded app into the GC's permanent generation so collections
+    # in the workers don't touch (and copy) the shared pages
+    chatbot_server = _preloaded_chatbot_server()
+    if chatbot_server is not None:
+        result = chatbot_server.prepare_for_fork()
+        if result.get('frozen'):
+            server.log.debug(f"Frozen {result['frozen_objects']} preloaded objects before fork")
+    else:
+        import gc
+        gc.enable()
 
 def post_fork(server, worker):
     """Called just after a worker has been forked."""
     server.log.info(f"Worker {worker.pid} spawned")
 
+def post_worker_init(worker):
+    """Called after a worker initialized the application, before it accepts requests."""
+    # Replay the most common questions so caches and lazy components are warm
+    # before the first real user reaches this worker
+    chatbot_server = _preloaded_chatbot_server()
+    if chatbot_server is None:
+        return
+    try:
+        result = chatbot_server.warm_up_worker()
+        worker.log.info(
+            f"Worker {worker.pid} warmed up: {result['questions']} questions in {result['duration_ms']:.0f}ms"
+        )
+    except Exception as e:
+        worker.log.warning(f"Worker {worker.pid} warm-up failed: {e}")
+
 def worker_int(worker):
     """Called when a worker receives SIGINT or SIGQUIT."""
     worker.log.info(f"Worker {worker.pid} interrupted")
@@ -103,6 +150,13 @@ def child_exit(server, worker):
 
 def worker_exit(server, worker):
     """Called just after a worker exits."""
+    # API key usage is counted in memory; persist what this worker has not flushed yet
+    chatbot_server = _preloaded_chatbot_server()
+    if chatbot_server is not None:
+        try:
+            chatbot_server.security_manager.flush_api_key_usage()
+        except Exception as e:
+            server.log.warning(f"Worker {worker.pid} could not flush API key usage: {e}")
     server.log.info(f"Worker {worker.pid} shutdown complete")
 
 def nworkers_changed(server, new_value, old_value):
@@ -112,6 +166,9 @@ def nworkers_changed(server, new_value, old_value):
 def on_exit(server):
     """Called just before exiting gunicorn."""
     server.log.info("Nijenhuis Chatbot shutting down...")
+    chatbot_server = _preloaded_chatbot_server()
+    if chatbot_server is not None:
+        chatbot_server.stop_shared_health_monitor()
     try:
         import sdnotify
         n = sdnotify.SystemdNotifier()
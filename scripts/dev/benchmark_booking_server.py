@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Booking Server Benchmark
+Measures availability requests against admin/booking-handler.py while admin
+exports (getBookings of the full list, read by deliberately slow clients)
+are running, for the old single-threaded HTTP/1.0 server and the pooled
+keep-alive server. Idle clients (browser tabs that keep their connection
+open between sparse requests) outnumber the pool's workers, so the pooled
+server must not let idle connections starve the rest. Runs both in-process
+on a temporary booking store.
+
+Example:
+    python scripts/dev/benchmark_booking_server.py --bookings 20000 --duration 10 \\
+        --clients 8 --exports 2 --idle-clients 32 --workers 16 --output booking_server_bench.json
+"""
+
+import argparse
+import http.client
+import importlib.util
+import json
+import os
+import random
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from http.server import HTTPServer
+from pathlib import Path
+from typing import Dict, Any, List
+
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(project_root))
+
+from backend.shared.booking_store import BookingStore
+from backend.shared.state_backend import InMemoryStateBackend
+
+API_PATH = '/admin/booking-handler.py'
+
+
+def load_handler_module():
+    spec = importlib.util.spec_from_file_location('booking_handler', project_root / 'admin' / 'booking-handler.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_boats() -> List[Dict[str, Any]]:
+    for path in (project_root / 'data' / 'boats.json', project_root / 'admin' / 'boats.json'):
+        if path.exists():
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+    return []
+
+
+def seed_store(store: BookingStore, boat_ids: List[str], count: int, rng: random.Random):
+    season_start = date(date.today().year, 4, 1)
+    bookings = []
+    for i in range(count):
+        start = season_start + timedelta(days=rng.randrange(214))
+        bookings.append({
+            'id': f'bench_{i}',
+            'boatType': rng.choice(boat_ids),
+            'date': start.isoformat(),
+            'endDate': (start + timedelta(days=rng.choice([0, 0, 0, 1, 2, 6]))).isoformat(),
+            'status': rng.choice(['paid', 'confirmed', 'cancelled', 'pending']),
+            'customerName': 'Benchmark Klant',
+            'customerEmail': 'klant@example.nl',
+            'customerPhone': '0612345678',
+            'notes': 'x' * 40,
+        })
+    store.replace_all(bookings)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def slow_export(port: int, token: str, rate_bytes: float, stop: threading.Event, stats: Dict[str, Any]):
+    """Download the full booking list at rate_bytes per second, repeatedly"""
+    body = json.dumps({'action': 'getBookings'}).encode()
+    while not stop.is_set():
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 16384)
+        sock.settimeout(60)
+        try:
+            sock.connect(('127.0.0.1', port))
+            sock.sendall(
+                f'POST {API_PATH} HTTP/1.1\r\nHost: 127.0.0.1\r\nContent-Type: application/json\r\n'
+                f'Content-Length: {len(body)}\r\nCookie: admin_session_token={token}\r\n'
+                f'Connection: close\r\n\r\n'.encode() + body)
+            received = 0
+            while not stop.is_set():
+                chunk = sock.recv(8192)
+                if not chunk:
+                    stats['completed'] += 1
+                    break
+                received += len(chunk)
+                time.sleep(len(chunk) / rate_bytes)
+            stats['bytes'] += received
+        except OSError:
+            stats['errors'] += 1
+        finally:
+            sock.close()
+
+
+def availability_client(port: int, boat_ids: List[str], stop: threading.Event, latencies: List[float],
+                        errors: List[str], seed: int):
+    """Alternate availability calendar reads and cart checks over one (keep-alive) connection"""
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    season_start = date(date.today().year, 4, 1)
+    while not stop.is_set():
+        boat = rng.choice(boat_ids)
+        start = season_start + timedelta(days=rng.randrange(200))
+        end = start + timedelta(days=rng.randrange(7))
+        began = time.perf_counter()
+        try:
+            if rng.random() < 0.5:
+                conn.request('GET', f'{API_PATH}?action=availability&boat={boat}'
+                                    f'&from={start.isoformat()}&to={end.isoformat()}')
+            else:
+                payload = json.dumps({'action': 'validateCartAvailability', 'items': [
+                    {'boatId': boat, 'startDate': start.isoformat(), 'endDate': end.isoformat()}]})
+                conn.request('POST', API_PATH, body=payload, headers={'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            response.read()
+            if response.status not in (200, 409):
+                errors.append(str(response.status))
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(type(e).__name__)
+            conn.close()
+            continue
+        latencies.append(time.perf_counter() - began)
+    conn.close()
+
+
+def idle_client(port: int, think_time: float, stop: threading.Event, latencies: List[float],
+                errors: List[str], stats: Dict[str, int]):
+    """A browser tab: one request, then idle on its keep-alive connection until the next"""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    while not stop.is_set():
+        began = time.perf_counter()
+        for attempt in range(2):
+            try:
+                conn.request('GET', f'{API_PATH}?action=boats')
+                response = conn.getresponse()
+                response.read()
+                break
+            except (OSError, http.client.HTTPException) as e:
+                # The server closed the idle connection: reconnect, like a browser
+                conn.close()
+                if attempt:
+                    errors.append(type(e).__name__)
+                    response = None
+                else:
+                    stats['reconnects'] += 1
+        if response is not None:
+            latencies.append(time.perf_counter() - began)
+        stop.wait(think_time)
+    conn.close()
+
+
+def run_mode(mode: str, handler, args, boat_ids: List[str]) -> Dict[str, Any]:
+    if mode == 'single':
+        # The previous server: one thread, HTTP/1.0 (a new connection per request)
+        handler_class = type('SingleThreadedHandler', (handler.BookingHandler,),
+                             {'protocol_version': 'HTTP/1.0', 'timeout': None})
+        server = HTTPServer(('127.0.0.1', 0), handler_class)
+    else:
+        server = handler.PooledHTTPServer(('127.0.0.1', 0), handler.BookingHandler, args.workers)
+    # Export clients hang up mid-response when a run stops
+    server.handle_error = lambda request, client_address: None
+    port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    token = handler.create_session('benchmark')
+    stop = threading.Event()
+    latencies: List[float] = []
+    errors: List[str] = []
+    export_stats = {'completed': 0, 'bytes': 0, 'errors': 0}
+    idle_latencies: List[float] = []
+    idle_stats = {'reconnects': 0}
+
+    threads = [threading.Thread(target=slow_export, args=(port, token, args.export_rate * 1024, stop, export_stats),
+                                daemon=True) for _ in range(args.exports)]
+    # Let the exports occupy the server before measuring
+    for thread in threads:
+        thread.start()
+    # Idle clients connect first and park on their connections
+    threads += [threading.Thread(target=idle_client, args=(port, args.idle_think, stop, idle_latencies, errors,
+                                                           idle_stats), daemon=True)
+                for _ in range(args.idle_clients)]
+    for thread in threads[args.exports:]:
+        thread.start()
+    time.sleep(0.5)
+    clients = [threading.Thread(target=availability_client, args=(port, boat_ids, stop, latencies, errors, i),
+                                daemon=True) for i in range(args.clients)]
+    began = time.perf_counter()
+    for thread in clients:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in clients + threads:
+        thread.join(timeout=5)
+    elapsed = time.perf_counter() - began
+    server.shutdown()
+    server.server_close()
+
+    return {
+        'mode': mode,
+        'availability_requests': len(latencies),
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50) * 1000, 2),
+            'p95': round(percentile(latencies, 95) * 1000, 2),
+            'p99': round(percentile(latencies, 99) * 1000, 2),
+            'max': round(max(latencies, default=0) * 1000, 2),
+        },
+        'idle_latency_ms': {
+            'p50': round(percentile(idle_latencies, 50) * 1000, 2),
+            'max': round(max(idle_latencies, default=0) * 1000, 2),
+        },
+        'idle_reconnects': idle_stats['reconnects'],
+        'errors': len(errors),
+        'exports_completed': export_stats['completed'],
+        'export_mb_sent': round(export_stats['bytes'] / 1e6, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the booking server under concurrent load')
+    parser.add_argument('--bookings', type=int, default=20000, help='Bookings in the temporary store')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per server mode')
+    parser.add_argument('--clients', type=int, default=8, help='Concurrent availability clients')
+    parser.add_argument('--exports', type=int, default=2, help='Concurrent slow admin exports')
+    parser.add_argument('--idle-clients', type=int, default=32,
+                        help='Keep-alive clients idling between requests (more than --workers)')
+    parser.add_argument('--idle-think', type=float, default=3.0, help='Seconds an idle client waits between requests')
+    parser.add_argument('--export-rate', type=float, default=512, help='KB/s each export client reads')
+    parser.add_argument('--workers', type=int, default=16, help='Worker threads of the pooled server')
+    parser.add_argument('--modes', default='single,pooled', help='Comma-separated: single, pooled')
+    parser.add_argument('--output', help='Write the report as JSON to this file')
+    args = parser.parse_args()
+
+    handler = load_handler_module()
+    temp_dir = tempfile.mkdtemp(prefix='booking_bench_')
+    try:
+        store = BookingStore(os.path.join(temp_dir, 'bookings.db'), None)
+        boat_ids = [boat.get('id') for boat in load_boats() if boat.get('id')] or ['sloep', 'tender', 'kano']
+        seed_store(store, boat_ids, args.bookings, random.Random(1))
+        store.occupancy()
+
+        # Temporary store and in-memory sessions: nothing under admin/ is touched
+        handler.get_booking_store = lambda: store
+        sessions = InMemoryStateBackend()
+        handler.session_backend = lambda: sessions
+        handler.BookingHandler.log_message = lambda self, format, *log_args: None
+        handler.print = lambda *print_args, **kwargs: None  # per-request debug output
+
+        print(f"📊 {args.bookings} bookings, {len(boat_ids)} boats, {args.clients} clients, "
+              f"{args.exports} exports at {args.export_rate:g} KB/s, {args.idle_clients} idle clients, "
+              f"{args.workers} workers, {args.duration:g}s per mode")
+        report = {'config': vars(args), 'results': []}
+        for mode in [m.strip() for m in args.modes.split(',') if m.strip()]:
+            result = run_mode(mode, handler, args, boat_ids)
+            report['results'].append(result)
+            latency = result['latency_ms']
+            print(f"   {mode:>7}: {result['availability_requests']:6d} requests "
+                  f"({result['requests_per_second']}/s), p50 {latency['p50']} ms, p95 {latency['p95']} ms, "
+                  f"max {latency['max']} ms, idle max {result['idle_latency_ms']['max']} ms, "
+                  f"errors {result['errors']}, exports done {result['exports_completed']}")
+
+        store.close()
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            print(f"✅ Report written to {args.output}")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()